@@ -1,3 +1,4 @@
+import re
 import sys
 from pathlib import Path
 import asyncio
@@ -5,12 +6,11 @@ from logging.config import fileConfig
 
 from sqlalchemy import pool
 from sqlalchemy.engine import Connection
-from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 
-from app.config import settings
-from app.database import Base
+from app.config import get_settings
+from app.database import Base, Database
 import app.models
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -27,9 +27,36 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# Хэш-секции создаются вместе с секционированной таблицей и в метаданных
+# не описаны, поэтому autogenerate их не сравнивает. Postgres также
+# заводит копии внешних ключей на каждую секцию таблицы, на которую они
+# ссылаются, — их тоже пропускаем.
+PARTITION_NAME = re.compile(
+    r"^(departments|employees|change_log|department_history|employee_history)"
+    r"_p\d+$"
+)
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not PARTITION_NAME.match(name)
+    return True
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    if type_ == "foreign_key_constraint" and reflected:
+        return not PARTITION_NAME.match(obj.referred_table.name)
+    # Индексы только для SQLite (ddl_if) в схеме Postgres не создаются
+    ddl_if = getattr(obj, "_ddl_if", None)
+    if (type_ == "index" and not reflected and ddl_if is not None
+            and ddl_if.dialect not in (None, "postgresql")):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
-config.set_main_option("sqlalchemy.url", str(settings.DATABASE_URL))
+config.set_main_option("sqlalchemy.url", str(get_settings().DATABASE_URL))
 # ... etc.
 
 
@@ -49,6 +76,8 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -58,7 +87,9 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata,
+                      include_name=include_name,
+                      include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -70,16 +101,13 @@ async def run_async_migrations() -> None:
 
     """
 
-    connectable = async_engine_from_config(
-        config.get_section(config.config_ini_section, {}),
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
+    database = Database(config.get_main_option("sqlalchemy.url"),
+                        poolclass=pool.NullPool)
 
-    async with connectable.connect() as connection:
+    async with database.engine.connect() as connection:
         await connection.run_sync(do_run_migrations)
 
-    await connectable.dispose()
+    await database.dispose()
 
 
 def run_migrations_online() -> None:
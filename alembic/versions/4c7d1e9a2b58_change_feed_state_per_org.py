@@ -0,0 +1,55 @@
+"""change feed horizon per organization
+
+Revision ID: 4c7d1e9a2b58
+Revises: 9b2e4f61d3a7
+Create Date: 2026-10-19 10:12:37.204816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c7d1e9a2b58'
+down_revision: Union[str, Sequence[str], None] = '9b2e4f61d3a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _detach_old_table():
+    op.rename_table('change_feed_state', 'change_feed_state_old')
+    op.execute("ALTER INDEX change_feed_state_pkey RENAME TO change_feed_state_old_pkey")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _detach_old_table()
+    op.create_table('change_feed_state',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('purged_through', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('org_id')
+    )
+    # Какой организации принадлежали очищенные записи, неизвестно:
+    # общая граница становится границей каждой организации
+    op.execute("INSERT INTO change_feed_state (org_id, purged_through) "
+               "SELECT organizations.id, change_feed_state_old.purged_through "
+               "FROM organizations, change_feed_state_old "
+               "WHERE change_feed_state_old.id = 1")
+    op.drop_table('change_feed_state_old')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _detach_old_table()
+    op.create_table('change_feed_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('purged_through', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("INSERT INTO change_feed_state (id, purged_through) "
+               "SELECT 1, max(purged_through) FROM change_feed_state_old "
+               "HAVING count(*) > 0")
+    op.drop_table('change_feed_state_old')
@@ -0,0 +1,30 @@
+"""tree read indexes
+
+Revision ID: 63bbb0b69c5c
+Revises: d7fa7900c2d0
+Create Date: 2026-10-19 13:41:07.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '63bbb0b69c5c'
+down_revision: Union[str, Sequence[str], None] = 'd7fa7900c2d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_departments_parent_id', 'departments', ['parent_id', 'id'], unique=False)
+    op.create_index('ix_employees_department_id_created_at', 'employees', ['department_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_employees_department_id_created_at', table_name='employees')
+    op.drop_index('ix_departments_parent_id', table_name='departments')
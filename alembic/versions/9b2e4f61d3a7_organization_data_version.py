@@ -0,0 +1,28 @@
+"""organization data version
+
+Revision ID: 9b2e4f61d3a7
+Revises: c087d0498fab
+Create Date: 2026-10-19 08:40:12.518364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2e4f61d3a7'
+down_revision: Union[str, Sequence[str], None] = 'c087d0498fab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('organizations', sa.Column('data_version', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('organizations', 'data_version')
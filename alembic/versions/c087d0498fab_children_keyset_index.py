@@ -0,0 +1,30 @@
+"""children keyset index
+
+Revision ID: c087d0498fab
+Revises: cfca67b19e04
+Create Date: 2026-10-19 23:12:40.318274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c087d0498fab'
+down_revision: Union[str, Sequence[str], None] = 'cfca67b19e04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_departments_parent_name', 'departments', ['org_id', 'parent_id', 'name', 'id'], unique=False, postgresql_include=['created_at'])
+    op.drop_index('ix_departments_parent_id', table_name='departments')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_departments_parent_id', 'departments', ['org_id', 'parent_id', 'id'], unique=False)
+    op.drop_index('ix_departments_parent_name', table_name='departments', postgresql_include=['created_at'])
@@ -0,0 +1,86 @@
+"""temporal history
+
+Revision ID: cfca67b19e04
+Revises: dcad7b2a54d7
+Create Date: 2026-10-19 21:37:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cfca67b19e04'
+down_revision: Union[str, Sequence[str], None] = 'dcad7b2a54d7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ORG_PARTITIONS = 16
+
+
+def _create_partitions(table):
+    for remainder in range(ORG_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {ORG_PARTITIONS}, REMAINDER {remainder})"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('department_history',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('version_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('valid_from', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('valid_to', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('org_id', 'version_id'),
+    postgresql_partition_by='HASH (org_id)'
+    )
+    _create_partitions('department_history')
+    op.create_table('employee_history',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('version_id', sa.BigInteger(), autoincrement=True, nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('position', sa.String(), nullable=False),
+    sa.Column('hired_at', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('valid_from', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('valid_to', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('org_id', 'version_id'),
+    postgresql_partition_by='HASH (org_id)'
+    )
+    _create_partitions('employee_history')
+
+    # Текущее состояние становится первой версией, действующей с момента
+    # создания строки: более ранняя история не сохранялась
+    op.execute("INSERT INTO department_history (org_id, id, name, parent_id, created_at, valid_from) "
+               "SELECT org_id, id, name, parent_id, created_at, coalesce(created_at, now()) FROM departments")
+    op.execute("INSERT INTO employee_history (org_id, id, department_id, full_name, position, hired_at, created_at, valid_from) "
+               "SELECT org_id, id, department_id, full_name, position, hired_at, created_at, coalesce(created_at, now()) FROM employees")
+
+    op.create_index('ix_department_history_current', 'department_history', ['org_id', 'id'], unique=True, postgresql_where=sa.text('valid_to IS NULL'))
+    op.create_index('ix_department_history_id_valid', 'department_history', [sa.text("int4range(id, id, '[]')"), sa.text('tstzrange(valid_from, valid_to)')], unique=False, postgresql_using='gist')
+    op.create_index('ix_department_history_parent_valid', 'department_history', [sa.text("int4range(coalesce(parent_id, 0), coalesce(parent_id, 0), '[]')"), sa.text('tstzrange(valid_from, valid_to)')], unique=False, postgresql_using='gist')
+    op.create_index('ix_employee_history_current', 'employee_history', ['org_id', 'id'], unique=True, postgresql_where=sa.text('valid_to IS NULL'))
+    op.create_index('ix_employee_history_department_valid', 'employee_history', [sa.text("int4range(department_id, department_id, '[]')"), sa.text('tstzrange(valid_from, valid_to)')], unique=False, postgresql_using='gist')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_employee_history_department_valid', table_name='employee_history', postgresql_using='gist')
+    op.drop_index('ix_employee_history_current', table_name='employee_history', postgresql_where=sa.text('valid_to IS NULL'))
+    op.drop_table('employee_history')
+    op.drop_index('ix_department_history_parent_valid', table_name='department_history', postgresql_using='gist')
+    op.drop_index('ix_department_history_id_valid', table_name='department_history', postgresql_using='gist')
+    op.drop_index('ix_department_history_current', table_name='department_history', postgresql_where=sa.text('valid_to IS NULL'))
+    op.drop_table('department_history')
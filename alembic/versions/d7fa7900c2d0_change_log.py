@@ -0,0 +1,46 @@
+"""change log
+
+Revision ID: d7fa7900c2d0
+Revises: b14751969714
+Create Date: 2026-10-19 10:12:41.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7fa7900c2d0'
+down_revision: Union[str, Sequence[str], None] = 'b14751969714'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_log',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_change_log_entity_entity_id', 'change_log', ['entity', 'entity_id', 'id'], unique=False)
+    op.create_index('ix_change_log_recorded_at', 'change_log', ['recorded_at'], unique=False)
+    op.create_table('change_feed_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('purged_through', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('change_feed_state')
+    op.drop_index('ix_change_log_recorded_at', table_name='change_log')
+    op.drop_index('ix_change_log_entity_entity_id', table_name='change_log')
+    op.drop_table('change_log')
@@ -0,0 +1,28 @@
+"""employee analytics index
+
+Revision ID: dcad7b2a54d7
+Revises: fa1341b5833f
+Create Date: 2026-10-19 20:41:07.532910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dcad7b2a54d7'
+down_revision: Union[str, Sequence[str], None] = 'fa1341b5833f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_employees_analytics', 'employees', ['org_id', 'department_id'], unique=False, postgresql_include=['position', 'hired_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_employees_analytics', table_name='employees', postgresql_include=['position', 'hired_at'])
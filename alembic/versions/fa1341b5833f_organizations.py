@@ -0,0 +1,185 @@
+"""organizations and tenant partitioning
+
+Revision ID: fa1341b5833f
+Revises: 5ea0ac8a79bb
+Create Date: 2026-10-19 18:22:10.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fa1341b5833f'
+down_revision: Union[str, Sequence[str], None] = '5ea0ac8a79bb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_ORG_ID = 1
+ORG_PARTITIONS = 16
+# Порядок важен: employees ссылается на departments
+TABLES = ('employees', 'departments', 'change_log')
+
+
+def _nextval(table):
+    return sa.text(f"nextval('{table}_id_seq'::regclass)")
+
+
+def _detach_old_tables():
+    """Переименовывает таблицы в *_old, освобождая имена индексов и sequence."""
+    for table in TABLES:
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        op.rename_table(table, f'{table}_old')
+        op.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_old_pkey")
+
+
+def _drop_old_tables():
+    for table in TABLES:
+        op.drop_table(f'{table}_old')
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+
+
+def _create_partitions(table):
+    for remainder in range(ORG_PARTITIONS):
+        op.execute(
+            f"CREATE TABLE {table}_p{remainder} PARTITION OF {table} "
+            f"FOR VALUES WITH (MODULUS {ORG_PARTITIONS}, REMAINDER {remainder})"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('organizations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.execute(f"INSERT INTO organizations (id, name) VALUES ({DEFAULT_ORG_ID}, 'default')")
+    op.execute("SELECT setval('organizations_id_seq', (SELECT max(id) FROM organizations))")
+
+    # Обычную таблицу нельзя превратить в секционированную: создаём новые
+    # таблицы, переносим данные в организацию по умолчанию и удаляем старые
+    op.drop_index('ix_employees_department_id_created_at', table_name='employees')
+    op.drop_index('ix_departments_parent_id', table_name='departments')
+    op.drop_index('ix_change_log_recorded_at', table_name='change_log')
+    op.drop_index('ix_change_log_entity_entity_id', table_name='change_log')
+    _detach_old_tables()
+
+    op.create_table('departments',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), server_default=_nextval('departments'), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['org_id', 'parent_id'], ['departments.org_id', 'departments.id'], ),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('org_id', 'id'),
+    postgresql_partition_by='HASH (org_id)'
+    )
+    _create_partitions('departments')
+    op.create_table('employees',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), server_default=_nextval('employees'), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('position', sa.String(), nullable=False),
+    sa.Column('hired_at', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['org_id', 'department_id'], ['departments.org_id', 'departments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('org_id', 'id'),
+    postgresql_partition_by='HASH (org_id)'
+    )
+    _create_partitions('employees')
+    op.create_table('change_log',
+    sa.Column('org_id', sa.Integer(), nullable=False),
+    sa.Column('id', sa.BigInteger(), server_default=_nextval('change_log'), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('org_id', 'id'),
+    postgresql_partition_by='HASH (org_id)'
+    )
+    _create_partitions('change_log')
+
+    op.execute(f"INSERT INTO departments (org_id, id, name, parent_id, created_at) "
+               f"SELECT {DEFAULT_ORG_ID}, id, name, parent_id, created_at FROM departments_old")
+    op.execute(f"INSERT INTO employees (org_id, id, department_id, full_name, position, hired_at, created_at) "
+               f"SELECT {DEFAULT_ORG_ID}, id, department_id, full_name, position, hired_at, created_at FROM employees_old")
+    op.execute(f"INSERT INTO change_log (org_id, id, entity, entity_id, op, data, recorded_at) "
+               f"SELECT {DEFAULT_ORG_ID}, id, entity, entity_id, op, data, recorded_at FROM change_log_old")
+    _drop_old_tables()
+
+    op.create_index('ix_departments_parent_id', 'departments', ['org_id', 'parent_id', 'id'], unique=False)
+    op.create_index('ix_employees_department_id_created_at', 'employees', ['org_id', 'department_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_change_log_entity_entity_id', 'change_log', ['entity', 'entity_id', 'id'], unique=False)
+    op.create_index('ix_change_log_recorded_at', 'change_log', ['recorded_at'], unique=False)
+    op.create_index('ix_change_log_id', 'change_log', ['id'], unique=False)
+
+    op.add_column('jobs', sa.Column('org_id', sa.Integer(), server_default=str(DEFAULT_ORG_ID), nullable=False))
+    op.alter_column('jobs', 'org_id', server_default=None)
+    op.create_foreign_key(None, 'jobs', 'organizations', ['org_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('jobs_org_id_fkey', 'jobs', type_='foreignkey')
+    op.drop_column('jobs', 'org_id')
+
+    op.drop_index('ix_change_log_id', table_name='change_log')
+    op.drop_index('ix_change_log_recorded_at', table_name='change_log')
+    op.drop_index('ix_change_log_entity_entity_id', table_name='change_log')
+    op.drop_index('ix_employees_department_id_created_at', table_name='employees')
+    op.drop_index('ix_departments_parent_id', table_name='departments')
+    _detach_old_tables()
+
+    # id глобально уникальны, поэтому данные всех организаций сливаются
+    # в обычные таблицы без конфликтов
+    op.create_table('departments',
+    sa.Column('id', sa.Integer(), server_default=_nextval('departments'), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['parent_id'], ['departments.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('employees',
+    sa.Column('id', sa.Integer(), server_default=_nextval('employees'), nullable=False),
+    sa.Column('department_id', sa.Integer(), nullable=False),
+    sa.Column('full_name', sa.String(), nullable=False),
+    sa.Column('position', sa.String(), nullable=False),
+    sa.Column('hired_at', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['department_id'], ['departments.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('change_log',
+    sa.Column('id', sa.BigInteger(), server_default=_nextval('change_log'), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=True),
+    sa.Column('recorded_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    op.execute("INSERT INTO departments (id, name, parent_id, created_at) "
+               "SELECT id, name, parent_id, created_at FROM departments_old")
+    op.execute("INSERT INTO employees (id, department_id, full_name, position, hired_at, created_at) "
+               "SELECT id, department_id, full_name, position, hired_at, created_at FROM employees_old")
+    op.execute("INSERT INTO change_log (id, entity, entity_id, op, data, recorded_at) "
+               "SELECT id, entity, entity_id, op, data, recorded_at FROM change_log_old")
+    _drop_old_tables()
+
+    op.create_index('ix_departments_parent_id', 'departments', ['parent_id', 'id'], unique=False)
+    op.create_index('ix_employees_department_id_created_at', 'employees', ['department_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_change_log_entity_entity_id', 'change_log', ['entity', 'entity_id', 'id'], unique=False)
+    op.create_index('ix_change_log_recorded_at', 'change_log', ['recorded_at'], unique=False)
+    op.drop_table('organizations')
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from collections import deque
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Request
+
+from app.config import get_settings
+from app.deadlines import route_key
+from app.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+CHEAP = "cheap"
+HEAVY = "heavy"
+
+# Маршруты, стоимость которых определяется глубиной дерева
+DEPTH_SCALED_ROUTES = {"GET /departments/{id}", "gRPC GetDepartmentTree"}
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, cost_class: str, reason: str):
+        super().__init__(f"{cost_class}: {reason}")
+        self.cost_class = cost_class
+        self.reason = reason
+
+
+class CostClass:
+    """Лимит одновременных запросов класса и ограниченная очередь ожидания.
+
+    Освободившийся слот передаётся первому ожидающему (FIFO), поэтому
+    новые запросы не обгоняют очередь.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int,
+                 queue_timeout: float):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        if self.limit <= 0 or (self.active < self.limit and not self._waiters):
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise AdmissionRejected(self.name, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except BaseException as exc:
+            if waiter.done():
+                # Слот уже передан, но запрос ушёл (таймаут или отмена)
+                self.release()
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise AdmissionRejected(self.name, "timeout") from None
+            raise
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionController:
+    def __init__(self, route_classes: dict[str, str], limits: dict[str, int],
+                 queue_sizes: dict[str, int], queue_timeout: float,
+                 shallow_depth: int):
+        self.route_classes = route_classes
+        self.shallow_depth = shallow_depth
+        names = {CHEAP, *route_classes.values(), *limits}
+        self.classes = {
+            name: CostClass(name, limits.get(name, 0),
+                            queue_sizes.get(name, 0), queue_timeout)
+            for name in sorted(names)
+        }
+
+    def classify(self, request: Request) -> str:
+        depth = request.query_params.get("depth", "1")
+        return self.classify_route(route_key(request.scope),
+                                   int(depth) if depth.isdigit() else None)
+
+    def classify_route(self, key: str, depth: Optional[int] = None) -> str:
+        cost_class = self.route_classes.get(key, CHEAP)
+        if (key in DEPTH_SCALED_ROUTES and depth is not None
+                and depth <= self.shallow_depth):
+            return CHEAP
+        return cost_class
+
+    async def acquire(self, cost_class: str):
+        try:
+            await self.classes[cost_class].acquire()
+        except AdmissionRejected as exc:
+            admission_shed.inc(cost_class=cost_class, reason=exc.reason)
+            raise
+
+    def release(self, cost_class: str):
+        self.classes[cost_class].release()
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        route_classes=settings.ADMISSION_ROUTE_CLASSES,
+        limits=settings.ADMISSION_LIMITS,
+        queue_sizes=settings.ADMISSION_QUEUE_SIZES,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        shallow_depth=settings.ADMISSION_SHALLOW_DEPTH,
+    )
+
+
+def _class_values(attr: str) -> dict:
+    controller = get_admission_controller()
+    return {(name,): getattr(cost_class, attr)
+            for name, cost_class in controller.classes.items()}
+
+
+admission_shed = counter(
+    "admission_shed_total",
+    "Запросы, отклонённые контролем допуска",
+    ("cost_class", "reason"),
+)
+admission_active = gauge(
+    "admission_active",
+    "Выполняющиеся запросы по классам стоимости",
+    ("cost_class",),
+    callback=lambda: _class_values("active"),
+)
+admission_queue_depth = gauge(
+    "admission_queue_depth",
+    "Запросы, ожидающие допуска, по классам стоимости",
+    ("cost_class",),
+    callback=lambda: _class_values("queued"),
+)
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from app.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+write_batches = counter(
+    "write_batches_total",
+    "Выполненные пакеты объединённых записей",
+    ("batcher",),
+)
+write_batch_items = counter(
+    "write_batch_items_total",
+    "Записи, выполненные в составе пакетов",
+    ("batcher",),
+)
+
+
+class MicroBatcher:
+    """Собирает одновременные запросы в пакеты и выполняет их одним вызовом.
+
+    Первый элемент открывает окно длиной window секунд; пакет уходит
+    в handler по истечении окна или сразу при max_size элементах.
+    Пока выполняются max_concurrent пакетов, окно не закрывает новый:
+    элементы копятся и уходят, как только один из пакетов завершится,
+    поэтому под нагрузкой пакеты растут вместе с задержкой записи.
+    handler получает список элементов и возвращает результаты в том же
+    порядке; исключение handler получают все вызывающие пакета.
+    Пакет выполняется в отдельной задаче, поэтому отмена одного
+    вызывающего не прерывает запись остальных.
+    """
+
+    def __init__(self, name: str,
+                 handler: Callable[[list], Awaitable[list]],
+                 window: float, max_size: int, max_concurrent: int = 2):
+        self.name = name
+        self.handler = handler
+        self.window = window
+        self.max_size = max_size
+        self.max_concurrent = max_concurrent
+        self._pending: list[tuple[Any, asyncio.Future]] = []
+        self._timer = None
+        # Окно истекло, но пакет ждёт завершения одного из выполняющихся
+        self._due = False
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None and not self._due:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.window, self._on_window
+            )
+        return await future
+
+    def _on_window(self):
+        self._timer = None
+        if len(self._tasks) < self.max_concurrent:
+            self._flush()
+        else:
+            self._due = True
+
+    def _on_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if self._due:
+            self._flush()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._due = False
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_done)
+
+    async def _run(self, batch: list[tuple[Any, asyncio.Future]]):
+        write_batches.inc(batcher=self.name)
+        write_batch_items.inc(len(batch), batcher=self.name)
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as exc:
+            logger.warning(f"Batch {self.name} of {len(batch)} failed: {exc}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
@@ -0,0 +1,233 @@
+import asyncio
+import gzip
+import json
+import time
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.config import get_settings
+from app.metrics import counter
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+compressed_responses = counter(
+    "compressed_responses_total",
+    "Ответы, отправленные сжатыми",
+    ("encoding",),
+)
+compression_raw_bytes = counter(
+    "compression_raw_bytes_total",
+    "Размер сжатых ответов до сжатия",
+    ("encoding",),
+)
+compression_sent_bytes = counter(
+    "compression_sent_bytes_total",
+    "Размер сжатых ответов после сжатия",
+    ("encoding",),
+)
+compression_cpu_seconds = counter(
+    "compression_cpu_seconds_total",
+    "Процессорное время сжатия (без ответов из кэша сжатых тел)",
+    ("encoding",),
+)
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    # mtime=0: одинаковое тело — одинаковые байты
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level)
+
+
+def _zstd(body: bytes, level: int) -> bytes:
+    # Компрессор не потокобезопасен, поэтому свой на каждый вызов
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+# Кодировки, для которых установлен кодек
+CODECS = {"gzip": _gzip}
+if brotli is not None:
+    CODECS["br"] = _brotli
+if zstandard is not None:
+    CODECS["zstd"] = _zstd
+
+# Уровни, если кодировки нет в COMPRESSION_LEVELS
+_DEFAULT_LEVELS = {"gzip": 6, "br": 5, "zstd": 3}
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def available_encodings() -> list[str]:
+    """COMPRESSION_ENCODINGS в порядке предпочтения сервера, без неустановленных."""
+    return [encoding for encoding in get_settings().COMPRESSION_ENCODINGS
+            if encoding in CODECS]
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Кодировка ответа по заголовку Accept-Encoding или None.
+
+    Выбирается кодировка с наибольшим q клиента, при равных q — первая
+    в порядке сервера; q=0 запрещает кодировку, «*» задаёт q остальных.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+    default = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in available_encodings():
+        quality = accepted.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _encode(body: bytes, encoding: str) -> tuple[bytes, float]:
+    level = get_settings().COMPRESSION_LEVELS.get(encoding,
+                                                  _DEFAULT_LEVELS[encoding])
+    started = time.thread_time()
+    data = CODECS[encoding](body, level)
+    return data, time.thread_time() - started
+
+
+async def compress(body: bytes, encoding: str) -> bytes:
+    """Сжимает тело; большие тела — в потоке, не занимая цикл событий.
+
+    Кодеки отпускают GIL на время сжатия, поэтому другие запросы
+    в это время обрабатываются.
+    """
+    if len(body) >= get_settings().COMPRESSION_THREAD_MIN_SIZE:
+        data, cpu = await asyncio.to_thread(_encode, body, encoding)
+    else:
+        data, cpu = _encode(body, encoding)
+    compression_cpu_seconds.inc(cpu, encoding=encoding)
+    return data
+
+
+def _record_sent(encoding: str, raw: int, sent: int):
+    compressed_responses.inc(encoding=encoding)
+    compression_raw_bytes.inc(raw, encoding=encoding)
+    compression_sent_bytes.inc(sent, encoding=encoding)
+
+
+def render_json(content) -> bytes:
+    """JSON тех же байтов, что и у JSONResponse FastAPI для content."""
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False,
+                      allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+class EncodedBody:
+    """Сериализованный JSON-ответ и его сжатые варианты.
+
+    Варианты создаются при первом запросе кодировки и хранятся вместе
+    с телом, поэтому повторная отдача не сериализует и не сжимает.
+    """
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._encoded: dict[str, bytes] = {}
+
+    async def encoded(self, encoding: str) -> bytes:
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = await compress(self.body, encoding)
+        return data
+
+    async def response(self, accept_encoding: Optional[str]) -> Response:
+        headers = {"Vary": "Accept-Encoding"}
+        content = self.body
+        encoding = None
+        if len(self.body) >= get_settings().COMPRESSION_MIN_SIZE:
+            encoding = choose_encoding(accept_encoding)
+        if encoding is not None:
+            data = await self.encoded(encoding)
+            if len(data) < len(self.body):
+                content = data
+                headers["Content-Encoding"] = encoding
+                _record_sent(encoding, len(self.body), len(data))
+        return Response(content, media_type="application/json",
+                        headers=headers)
+
+
+def _is_compressible(headers: Headers) -> bool:
+    content_type = headers.get("content-type", "")
+    return ("content-encoding" not in headers
+            and content_type.startswith(_COMPRESSIBLE_TYPES)
+            and not content_type.startswith("text/event-stream"))
+
+
+class CompressionMiddleware:
+    """Сжимает ответы по Accept-Encoding (gzip, zstd и br, если установлены).
+
+    Сжимаются JSON и текстовые ответы от COMPRESSION_MIN_SIZE байт.
+    Тело такого ответа собирается целиком (ответы приложения и так
+    формируются в памяти, а middleware на BaseHTTPMiddleware пересылает
+    их частями) и сжимается одним блоком. Ответы с уже заданным
+    Content-Encoding (например, EncodedBody) проходят как есть.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        chunks = []
+
+        async def send_wrapper(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                if _is_compressible(Headers(raw=message["headers"])):
+                    start = message
+                    return
+            elif message["type"] == "http.response.body" and start is not None:
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                pending, start = start, None
+                body = b"".join(chunks)
+                headers = MutableHeaders(raw=pending["headers"])
+                if len(body) >= get_settings().COMPRESSION_MIN_SIZE:
+                    headers.add_vary_header("Accept-Encoding")
+                    data = await compress(body, encoding)
+                    if len(data) < len(body):
+                        headers["Content-Encoding"] = encoding
+                        headers["Content-Length"] = str(len(data))
+                        _record_sent(encoding, len(body), len(data))
+                        body = data
+                await send(pending)
+                message = {"type": "http.response.body", "body": body}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,9 +1,8 @@
+from functools import lru_cache
+from typing import Optional
+
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
-from dotenv import load_dotenv
-
-
-load_dotenv()
 
 
 class Settings(BaseSettings):
@@ -14,10 +13,126 @@ class Settings(BaseSettings):
     DB_NAME: str
     DATABASE_URL: str
 
+    # Встроенный режим: DATABASE_URL=sqlite+aiosqlite:///./org.db.
+    # PRAGMA задаются каждому соединению; схема создаётся при старте
+    SQLITE_PRAGMAS: dict[str, str] = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "busy_timeout": "5000",
+        "cache_size": "-65536",
+        "temp_store": "MEMORY",
+        "mmap_size": "268435456",
+    }
+
+    # Организация для запросов без заголовка X-Org-Id
+    DEFAULT_ORG_ID: int = 1
+
+    # Пул соединений
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PREWARM: int = 0
+
+    # Продакшн-режим сервера (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 1
+    SERVER_LOOP: str = "auto"
+    SERVER_HTTP: str = "auto"
+    SCHEMA_CHECK: str = "warn"
+
+    # gRPC-сервер в том же процессе и цикле событий, что и FastAPI
+    # (нужен пакет grpcio, без него сервер не запускается)
+    GRPC_ENABLED: bool = True
+    GRPC_PORT: int = 50051
+    # Сжатие сообщений ответов: gzip, deflate или none; клиентам, которые
+    # не объявили поддержку алгоритма, сообщения идут несжатыми
+    GRPC_COMPRESSION: str = "gzip"
+
+    # Дедлайны запросов к БД, мс. ROUTE_DEADLINES переопределяет
+    # statement_timeout для маршрута: {"DELETE /departments/{id}": 30000}
+    STATEMENT_TIMEOUT_MS: int = 5000
+    LOCK_TIMEOUT_MS: int = 2000
+    ROUTE_DEADLINES: dict[str, int] = {}
+
+    # Допуск запросов: классы стоимости маршрутов, лимиты параллелизма
+    # (0 — без ограничения) и размеры очередей ожидания
+    ADMISSION_ROUTE_CLASSES: dict[str, str] = {
+        "GET /departments/{id}": "heavy",
+        "GET /departments/batch": "heavy",
+        "POST /departments/lca": "heavy",
+        "DELETE /departments/{id}": "heavy",
+        "GET /analytics/headcount": "heavy",
+        "GET /analytics/hire-cohorts": "heavy",
+        "GET /analytics/tenure": "heavy",
+        "gRPC GetDepartmentTree": "heavy",
+        "gRPC ExportDepartments": "export",
+        "gRPC ExportEmployees": "export",
+    }
+    ADMISSION_LIMITS: dict[str, int] = {"cheap": 0, "heavy": 4, "export": 2}
+    ADMISSION_QUEUE_SIZES: dict[str, int] = {"cheap": 0, "heavy": 16,
+                                             "export": 0}
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    # GET /departments/{id} с depth не больше этого значения считается дешёвым
+    ADMISSION_SHALLOW_DEPTH: int = 2
+
+    # Объединение одновременных POST /departments/{id}/employees/ в пакеты:
+    # окно сбора, мс, и максимальный размер пакета
+    EMPLOYEE_BATCHING: bool = False
+    EMPLOYEE_BATCH_WINDOW_MS: float = 5.0
+    EMPLOYEE_BATCH_MAX_SIZE: int = 500
+
+    # Служебные эндпоинты /admin/* требуют заголовок X-Admin-Token;
+    # без токена они недоступны
+    ADMIN_TOKEN: Optional[str] = None
+
+    # Профилирование запросов: заголовок X-Profile со значением ADMIN_TOKEN
+    # или доля случайно выбранных запросов; интервал снятия стеков, мс,
+    # и число хранимых отчётов
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_REPORTS_KEPT: int = 50
+
+    # Журнал медленных SQL-запросов (/admin/slow-queries): порог, мс
+    # (0 — выключен), размер кольцевого буфера, доля запросов, для которых
+    # выполняется EXPLAIN (ANALYZE, BUFFERS), и его statement_timeout, мс.
+    # Без SLOW_QUERY_LOG_PARAMS вместо значений параметров пишутся их типы
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 10000
+    SLOW_QUERY_LOG_PARAMS: bool = False
+
+    # Сжатие ответов по Accept-Encoding: кодировки в порядке предпочтения
+    # (br и zstd — если установлены пакеты brotli и zstandard), уровни,
+    # минимальный размер тела и размер, с которого сжатие идёт в потоке.
+    # TREE_CACHE_ENTRIES — сколько сериализованных деревьев (вместе с их
+    # сжатыми вариантами) хранить для повторных чтений той же версии данных
+    COMPRESSION_ENCODINGS: list[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_LEVELS: dict[str, int] = {"gzip": 6, "br": 5, "zstd": 3}
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_THREAD_MIN_SIZE: int = 65536
+    TREE_CACHE_ENTRIES: int = 128
+
+    # Фоновые задачи: размер порции и пауза между порциями
+    JOB_CHUNK_SIZE: int = 500
+    JOB_CHUNK_PAUSE_SECONDS: float = 0.0
+    JOB_MAX_RETRIES: int = 5
+
+    # Лента изменений
+    CHANGE_FEED_GAP_GRACE_SECONDS: int = 30
+    CHANGE_LOG_COMPACT_AFTER_HOURS: int = 24
+    CHANGE_LOG_RETENTION_DAYS: int = 30
+    CHANGE_LOG_COMPACTION_INTERVAL_SECONDS: int = 3600
+
     model_config = ConfigDict(
         env_file=".env",
         env_file_encoding="utf-8"
     )
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Настройки читаются при первом обращении, а не при импорте модуля."""
+    return Settings()
@@ -1,9 +1,43 @@
 from .department import (
     get_department,
     get_department_with_children,
+    get_ancestor_chains,
+    get_ancestors,
+    load_department_forest,
+    get_children_page,
+    list_departments,
+    encode_children_cursor,
+    decode_children_cursor,
     create_department,
     update_department,
     delete_department_cascade,
     delete_department_reassign,
+    get_subtree_ids,
+    lock_for_move,
+    lock_subtree,
+    lock_for_reassign,
+    ConcurrentModificationError,
+    count_subtree_rows,
+    count_reassign_rows,
+    delete_subtree_chunk,
+    reassign_chunk,
+)
+from .employee import (
+    create_employee,
+    create_employees_batch,
+    get_employee_departments,
+    list_employees,
+)
+from .change import (
+    record_change,
+    get_changes,
+    get_change_version,
+    compact_change_log,
+)
+from .job import create_job, get_job, get_unfinished_job_ids
+from .organization import get_organization, organization_exists, create_organization
+from .analytics import (
+    headcount_by_position,
+    hire_cohorts,
+    tenure_by_subtree,
 )
-from .employee import create_employee
@@ -0,0 +1,137 @@
+import logging
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, and_, func, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.department import MAX_HIERARCHY_DEPTH, _subtree_cte
+from app.dialects import days_since, month_start
+from app.models import Department, Employee
+
+logger = logging.getLogger(__name__)
+
+
+def _scoped(stmt, org_id: int, department_id: Optional[int]):
+    """Ограничивает запрос по сотрудникам организацией или поддеревом."""
+    stmt = stmt.where(Employee.org_id == org_id)
+    if department_id is not None:
+        subtree = _subtree_cte(org_id, department_id)
+        stmt = stmt.where(Employee.department_id.in_(select(subtree.c.id)))
+    return stmt
+
+
+def _tenure_days(as_of: date):
+    return days_since(Employee.hired_at, literal(as_of, Date))
+
+
+def _average(total_days, count: int) -> Optional[float]:
+    return float(total_days) / count if count else None
+
+
+async def headcount_by_position(db: AsyncSession, org_id: int,
+                                department_id: Optional[int] = None):
+    headcount = func.count().label("headcount")
+    result = await db.execute(
+        _scoped(select(Employee.position, headcount), org_id, department_id)
+        .group_by(Employee.position)
+        .order_by(headcount.desc(), Employee.position)
+    )
+    positions = [{"position": position, "headcount": count}
+                 for position, count in result]
+    return {
+        "department_id": department_id,
+        "total": sum(item["headcount"] for item in positions),
+        "positions": positions,
+    }
+
+
+async def hire_cohorts(db: AsyncSession, org_id: int,
+                       department_id: Optional[int] = None):
+    month = month_start(Employee.hired_at).label("month")
+    result = await db.execute(
+        _scoped(select(month, func.count()), org_id, department_id)
+        .where(Employee.hired_at.isnot(None))
+        .group_by(month)
+        .order_by(month)
+    )
+    return {
+        "department_id": department_id,
+        "cohorts": [{"month": row_month, "hired": count}
+                    for row_month, count in result],
+    }
+
+
+async def tenure_by_subtree(db: AsyncSession, org_id: int,
+                            department_id: Optional[int] = None,
+                            as_of: Optional[date] = None):
+    """Средний стаж в днях на дату as_of (по умолчанию — сегодня)
+    по области и по каждой её ветви.
+
+    Ветви — дочерние подразделения department_id (корни организации,
+    если он не задан). Один рекурсивный запрос помечает каждое
+    подразделение id его ветви, после чего сотрудники группируются
+    по ветви, так что каждый сотрудник читается один раз.
+    Сотрудники без даты найма учитываются в численности, но не в стаже.
+    """
+    if as_of is None:
+        as_of = date.today()
+    if department_id is None:
+        is_branch = Department.parent_id.is_(None)
+    else:
+        is_branch = Department.parent_id == department_id
+
+    branches = (
+        select(Department.id.label("branch_id"), Department.id,
+               literal(1).label("level"))
+        .where(Department.org_id == org_id, is_branch)
+        .cte("branches", recursive=True)
+    )
+    branches = branches.union_all(
+        select(branches.c.branch_id, Department.id, branches.c.level + 1)
+        .join(branches, Department.parent_id == branches.c.id)
+        .where(Department.org_id == org_id,
+               branches.c.level < MAX_HIERARCHY_DEPTH)
+    )
+    totals = (func.count(Employee.id), func.count(Employee.hired_at),
+              func.coalesce(func.sum(_tenure_days(as_of)), 0))
+    result = await db.execute(
+        select(branches.c.branch_id, *totals)
+        .select_from(branches)
+        .join(Employee, and_(Employee.org_id == org_id,
+                             Employee.department_id == branches.c.id))
+        .group_by(branches.c.branch_id)
+    )
+    stats = {branch_id: (count, dated, days)
+             for branch_id, count, dated, days in result}
+
+    result = await db.execute(
+        select(Department.id, Department.name)
+        .where(Department.org_id == org_id, is_branch)
+        .order_by(Department.name, Department.id)
+    )
+    subtrees = []
+    for branch_id, name in result:
+        count, dated, days = stats.get(branch_id, (0, 0, 0))
+        subtrees.append({"department_id": branch_id, "name": name,
+                         "headcount": count,
+                         "avg_tenure_days": _average(days, dated)})
+
+    # Итог по области складывается из ветвей и сотрудников самого корня
+    headcount, dated, days = (sum(column)
+                              for column in zip((0, 0, 0), *stats.values()))
+    if department_id is not None:
+        result = await db.execute(
+            select(*totals).where(Employee.org_id == org_id,
+                                  Employee.department_id == department_id)
+        )
+        own_count, own_dated, own_days = result.one()
+        headcount += own_count
+        dated += own_dated
+        days += own_days
+    return {
+        "department_id": department_id,
+        "headcount": headcount,
+        "avg_tenure_days": _average(days, dated),
+        "subtrees": subtrees,
+    }
@@ -0,0 +1,248 @@
+import logging
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import (BigInteger, column, delete, event, exists, func, select,
+                        update, values)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+
+from app.models import ChangeFeedState, ChangeLogEntry, Organization
+
+logger = logging.getLogger(__name__)
+
+DEPARTMENT = "department"
+EMPLOYEE = "employee"
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+
+HISTORY_PENDING_KEY = "history_pending"
+VERSION_PENDING_KEY = "version_pending"
+
+
+def _jsonable(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def department_snapshot(dept) -> dict:
+    return {
+        "id": dept.id,
+        "name": dept.name,
+        "parent_id": dept.parent_id,
+        "created_at": _jsonable(dept.created_at),
+    }
+
+
+def employee_snapshot(emp) -> dict:
+    return {
+        "id": emp.id,
+        "department_id": emp.department_id,
+        "full_name": emp.full_name,
+        "position": emp.position,
+        "hired_at": _jsonable(emp.hired_at),
+        "created_at": _jsonable(emp.created_at),
+    }
+
+
+def record_change(db: AsyncSession, org_id: int, entity: str,
+                  entity_id: int, op: str, data: dict = None):
+    """Добавляет запись в ленту изменений в текущей транзакции.
+
+    Изменение также ставится в очередь истории версий, которая
+    записывается при ближайшем flush (см. app.crud.history).
+    """
+    db.add(ChangeLogEntry(org_id=org_id, entity=entity, entity_id=entity_id,
+                          op=op, data=data))
+    db.info.setdefault(HISTORY_PENDING_KEY, []).append(
+        (org_id, entity, entity_id, data)
+    )
+    db.info.setdefault(VERSION_PENDING_KEY, set()).add(org_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_data_versions(session):
+    """Увеличивает версию данных организаций, изменённых транзакцией.
+
+    Строка организации блокируется только от этого UPDATE до коммита;
+    организации обновляются по возрастанию id, чтобы пакеты нескольких
+    организаций не блокировали друг друга.
+    """
+    pending = session.info.pop(VERSION_PENDING_KEY, None)
+    if not pending:
+        return
+    connection = session.connection()
+    for org_id in sorted(pending):
+        connection.execute(
+            update(Organization)
+            .where(Organization.id == org_id)
+            .values(data_version=Organization.data_version + 1)
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_versions_after_rollback(session):
+    session.info.pop(VERSION_PENDING_KEY, None)
+
+
+async def get_change_horizon(db: AsyncSession, org_id: int) -> int:
+    result = await db.execute(
+        select(ChangeFeedState.purged_through)
+        .where(ChangeFeedState.org_id == org_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def get_change_head(db: AsyncSession, org_id: int,
+                          settled_before: datetime) -> int:
+    """Курсор, с которого продолжать ленту после полной синхронизации.
+
+    Берётся последняя запись организации старше settled_before: более
+    свежие записи могут стоять за ещё не закоммиченными, и такой курсор
+    пропустил бы их. Записи после курсора просто придут повторно.
+    """
+    result = await db.execute(
+        select(func.max(ChangeLogEntry.id))
+        .where(ChangeLogEntry.org_id == org_id,
+               ChangeLogEntry.recorded_at <= settled_before)
+    )
+    head = result.scalar_one_or_none() or 0
+    return max(head, await get_change_horizon(db, org_id))
+
+
+async def get_change_version(db: AsyncSession, org_id: int) -> int:
+    """Версия данных организации для кэшей производных результатов.
+
+    Счётчик увеличивается в той же транзакции, что и изменение данных,
+    поэтому видим вместе с ним и никогда не повторяется: ни поздний коммит,
+    ни компакция и очистка ленты не возвращают прежнее значение.
+    """
+    result = await db.execute(
+        select(Organization.data_version).where(Organization.id == org_id)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def _unfilled_gaps(db: AsyncSession, gaps: list[tuple[int, int]]):
+    """Возвращает правые границы дыр, в которых видны не все id.
+
+    Дыра в ленте организации обычно занята записями других организаций;
+    она безопасна, если все id внутри неё уже закоммичены.
+    """
+    bounds = values(column("lo", BigInteger), column("hi", BigInteger),
+                    name="gaps").data(gaps)
+    visible = (
+        select(func.count())
+        .where(ChangeLogEntry.id > bounds.c.lo,
+               ChangeLogEntry.id < bounds.c.hi)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(bounds.c.hi).where(visible < bounds.c.hi - bounds.c.lo - 1)
+    )
+    return set(result.scalars())
+
+
+async def get_changes(db: AsyncSession, org_id: int, since: int, limit: int,
+                      gap_grace: timedelta, through: int = 0):
+    """Читает изменения после курсора since по ключу id.
+
+    Записи с id <= through возвращаются целиком, без учёта limit.
+
+    Id выдаются последовательностью при вставке, а видны после коммита,
+    поэтому запись с меньшим id может появиться позже записи с большим.
+    Чтение останавливается на первой «свежей» дыре в id: такая дыра
+    либо заполнится коммитом, либо (после gap_grace) считается
+    откатанной транзакцией или результатом компакции.
+    Свежая дыра, целиком заполненная записями других организаций,
+    не останавливает чтение.
+    Возвращает (записи, has_more).
+    """
+    head = []
+    if since < through:
+        result = await db.execute(
+            select(ChangeLogEntry)
+            .where(ChangeLogEntry.org_id == org_id,
+                   ChangeLogEntry.id > since, ChangeLogEntry.id <= through)
+            .order_by(ChangeLogEntry.id)
+        )
+        head = result.scalars().all()
+    result = await db.execute(
+        select(ChangeLogEntry)
+        .where(ChangeLogEntry.org_id == org_id,
+               ChangeLogEntry.id > max(since, through))
+        .order_by(ChangeLogEntry.id)
+        .limit(limit + 1)
+    )
+    rows = result.scalars().all()
+    has_more = len(rows) > limit
+    rows = head + rows[:limit]
+
+    settled_before = datetime.now(timezone.utc) - gap_grace
+    young_gaps = []
+    prev_id = since
+    for row in rows:
+        if row.id != prev_id + 1 and row.recorded_at > settled_before:
+            young_gaps.append((prev_id, row.id))
+        prev_id = row.id
+    unfilled = await _unfilled_gaps(db, young_gaps) if young_gaps else set()
+
+    changes = []
+    for row in rows:
+        if row.id in unfilled:
+            logger.debug(f"Change feed stopped at gap before id {row.id}")
+            has_more = True
+            break
+        changes.append(row)
+    return changes, has_more
+
+
+async def compact_change_log(db: AsyncSession, compact_before: datetime,
+                             purge_before: datetime):
+    """Компакция и очистка ленты изменений.
+
+    Старше compact_before остаётся только последняя запись по каждой
+    сущности, удаления старше purge_before убираются совсем, а граница
+    удалённого сохраняется для каждой организации, чтобы отставших
+    потребителей отправлять на полную пересинхронизацию.
+    """
+    newer = aliased(ChangeLogEntry)
+    result = await db.execute(
+        delete(ChangeLogEntry)
+        .where(
+            ChangeLogEntry.recorded_at < compact_before,
+            exists().where(
+                newer.org_id == ChangeLogEntry.org_id,
+                newer.entity == ChangeLogEntry.entity,
+                newer.entity_id == ChangeLogEntry.entity_id,
+                newer.id > ChangeLogEntry.id,
+            ),
+        )
+    )
+    compacted = result.rowcount
+
+    result = await db.execute(
+        delete(ChangeLogEntry)
+        .where(
+            ChangeLogEntry.recorded_at < purge_before,
+            ChangeLogEntry.op == DELETE,
+        )
+        .returning(ChangeLogEntry.org_id, ChangeLogEntry.id)
+    )
+    purged = result.tuples().all()
+    purged_through: dict[int, int] = {}
+    for org_id, entry_id in purged:
+        purged_through[org_id] = max(purged_through.get(org_id, 0), entry_id)
+    for org_id, last_id in sorted(purged_through.items()):
+        state = await db.get(ChangeFeedState, org_id)
+        if state is None:
+            state = ChangeFeedState(org_id=org_id, purged_through=0)
+            db.add(state)
+        state.purged_through = max(state.purged_through, last_id)
+
+    logger.info(f"Change log compacted: {compacted} superseded, "
+                f"{len(purged)} expired tombstones removed")
+    return compacted, len(purged)
+
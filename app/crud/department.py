@@ -1,20 +1,43 @@
+import base64
+import json
 import logging
+from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import select, update
+from sqlalchemy import (and_, delete, exists, func, literal, select, tuple_,
+                        update)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
 
+from app.crud import change as change_crud
+from app.crud import history as history_crud
+from app.dialects import advisory_xact_lock
+from app.hierarchy import mark_hierarchy_changed
 from app.schemas import department as dept_schema
-from app.models import Employee, Department
+from app.models import (Department, DepartmentHistory, Employee,
+                        EmployeeHistory)
 
 logger = logging.getLogger(__name__)
 
+# Защита рекурсивных запросов от зацикливания на повреждённых данных
+MAX_HIERARCHY_DEPTH = 1000
 
-async def get_department(db: AsyncSession, dept_id: int):
+# Сколько раз пытаться захватить стабильный набор блокировок
+LOCK_ATTEMPTS = 5
+# Пространство ключей advisory-блокировок имён внутри одного родителя
+SIBLING_NAMES_LOCK_SPACE = 0x4F52
+
+
+class ConcurrentModificationError(Exception):
+    pass
+
+
+async def get_department(db: AsyncSession, org_id: int, dept_id: int):
     logger.debug(f"Fetching department with id {dept_id}")
 
     result = await db.execute(
-        select(Department).where(Department.id == dept_id)
+        select(Department).where(Department.org_id == org_id,
+                                 Department.id == dept_id)
     )
     dept = result.scalar_one_or_none()
     if dept:
@@ -24,11 +47,12 @@ async def get_department(db: AsyncSession, dept_id: int):
     return dept
 
 
-async def get_department_with_children(db: AsyncSession, dept_id: int):
+async def get_department_with_children(db: AsyncSession, org_id: int,
+                                       dept_id: int):
     logger.debug(f"Fetching department with children, id {dept_id}")
     result = await db.execute(
         select(Department)
-        .where(Department.id == dept_id)
+        .where(Department.org_id == org_id, Department.id == dept_id)
         .options(selectinload(Department.children))
     )
     dept = result.scalar_one_or_none()
@@ -39,16 +63,391 @@ async def get_department_with_children(db: AsyncSession, dept_id: int):
     return dept
 
 
-async def create_department(db: AsyncSession,
+async def get_ancestor_chains(db: AsyncSession, org_id: int,
+                              dept_ids: list[int]):
+    """Возвращает цепочки предков для нескольких подразделений.
+
+    Все цепочки читаются одним рекурсивным запросом. Каждая цепочка
+    упорядочена от корня к самому подразделению; для ненайденных id
+    ключ в результате отсутствует.
+    """
+    logger.debug(f"Fetching ancestor chains for ids={dept_ids}")
+    chain = (
+        select(
+            Department.id.label("origin_id"),
+            literal(0).label("level"),
+            Department.id,
+            Department.name,
+            Department.parent_id,
+            Department.created_at,
+        )
+        .where(Department.org_id == org_id, Department.id.in_(dept_ids))
+        .cte("ancestor_chain", recursive=True)
+    )
+    chain = chain.union_all(
+        select(
+            chain.c.origin_id,
+            chain.c.level + 1,
+            Department.id,
+            Department.name,
+            Department.parent_id,
+            Department.created_at,
+        )
+        .join(chain, Department.id == chain.c.parent_id)
+        .where(Department.org_id == org_id,
+               chain.c.level < MAX_HIERARCHY_DEPTH)
+    )
+    result = await db.execute(
+        select(chain.c.origin_id, chain.c.id, chain.c.name,
+               chain.c.parent_id, chain.c.created_at)
+        .order_by(chain.c.origin_id, chain.c.level.desc())
+    )
+
+    chains = {}
+    for row in result:
+        chains.setdefault(row.origin_id, []).append({
+            "id": row.id,
+            "name": row.name,
+            "parent_id": row.parent_id,
+            "created_at": row.created_at,
+        })
+    return chains
+
+
+async def get_ancestors(db: AsyncSession, org_id: int, dept_id: int):
+    chains = await get_ancestor_chains(db, org_id, [dept_id])
+    return chains.get(dept_id)
+
+
+def _subtree_cte(org_id: int, dept_id: int):
+    subtree = (
+        select(Department.id, literal(0).label("level"))
+        .where(Department.org_id == org_id, Department.id == dept_id)
+        .cte("subtree", recursive=True)
+    )
+    return subtree.union_all(
+        select(Department.id, subtree.c.level + 1)
+        .join(subtree, Department.parent_id == subtree.c.id)
+        .where(Department.org_id == org_id,
+               subtree.c.level < MAX_HIERARCHY_DEPTH)
+    )
+
+
+async def get_subtree_ids(db: AsyncSession, org_id: int,
+                          dept_id: int) -> set[int]:
+    subtree = _subtree_cte(org_id, dept_id)
+    result = await db.execute(select(subtree.c.id))
+    return set(result.scalars())
+
+
+async def _lock_stable_set(db: AsyncSession, org_id: int, collect,
+                           key_share: bool):
+    """Блокирует строки подразделений, которые возвращает collect().
+
+    Все строки блокируются одним запросом по возрастанию id, поэтому
+    транзакции, захватывающие пересекающиеся наборы, не образуют
+    взаимоблокировок. После захвата набор перечитывается: если он
+    расширился, блокировки отпускаются откатом точки сохранения и
+    захватывается объединение — снова целиком и по порядку.
+    key_share=True берёт FOR NO KEY UPDATE: он запрещает менять строки,
+    но не мешает вставке дочерних записей по внешнему ключу.
+    """
+    wanted = await collect()
+    for attempt in range(LOCK_ATTEMPTS):
+        savepoint = await db.begin_nested()
+        result = await db.execute(
+            select(Department.id)
+            .where(Department.org_id == org_id,
+                   Department.id.in_(sorted(wanted)))
+            .order_by(Department.id)
+            .with_for_update(key_share=key_share)
+        )
+        locked = set(result.scalars())
+        current = await collect()
+        if current <= locked:
+            await savepoint.commit()
+            return locked
+        logger.debug(f"Lock set changed on attempt {attempt + 1}, "
+                     f"retrying with {len(wanted | current)} rows")
+        await savepoint.rollback()
+        wanted |= current
+    raise ConcurrentModificationError(
+        "Concurrent modification in progress, please retry"
+    )
+
+
+async def lock_for_move(db: AsyncSession, org_id: int, dept_id: int,
+                        new_parent_id: int = None):
+    """Блокирует перемещаемое подразделение и цепочку предков нового родителя.
+
+    Пока блокировки удерживаются, ни один узел цепочки не может быть
+    перемещён или удалён, поэтому проверка цикла остаётся верной до
+    коммита. Возвращает (существует ли подразделение, цепочка предков
+    нового родителя от корня; пустая, если родитель не найден).
+    """
+    state = {}
+
+    async def collect():
+        ids = [dept_id] if new_parent_id is None else [dept_id, new_parent_id]
+        chains = await get_ancestor_chains(db, org_id, ids)
+        state["parent_chain"] = (chains.get(new_parent_id, [])
+                                 if new_parent_id is not None else [])
+        wanted = {a["id"] for a in state["parent_chain"]}
+        if dept_id in chains:
+            wanted.add(dept_id)
+        return wanted
+
+    locked = await _lock_stable_set(db, org_id, collect, key_share=True)
+    return dept_id in locked, state["parent_chain"]
+
+
+async def lock_subtree(db: AsyncSession, org_id: int,
+                       dept_id: int) -> set[int]:
+    """Блокирует подразделение со всем поддеревом перед удалением."""
+    return await _lock_stable_set(
+        db, org_id, lambda: get_subtree_ids(db, org_id, dept_id),
+        key_share=False
+    )
+
+
+async def lock_for_reassign(db: AsyncSession, org_id: int, dept_id: int,
+                            target_id: int) -> set[int]:
+    """Блокирует удаляемое подразделение, его детей и целевое подразделение."""
+    async def collect():
+        result = await db.execute(
+            select(Department.id).where(
+                Department.org_id == org_id,
+                (Department.id.in_([dept_id, target_id]))
+                | (Department.parent_id == dept_id)
+            )
+        )
+        return set(result.scalars())
+
+    return await _lock_stable_set(db, org_id, collect, key_share=False)
+
+
+async def _lock_sibling_names(db: AsyncSession, org_id: int, parent_id):
+    # Сериализует проверки уникальности имени среди детей одного родителя.
+    # Берётся после блокировок строк, чтобы сохранить общий порядок.
+    # id подразделений глобальны; корни организации делят ключ -org_id.
+    await db.execute(
+        select(advisory_xact_lock(SIBLING_NAMES_LOCK_SPACE,
+                                  parent_id or -org_id))
+    )
+
+
+def _tree_source(org_id: int, as_of: Optional[datetime]):
+    """Модели и условия выборки дерева: текущие таблицы или история."""
+    if as_of is None:
+        def roots(ids):
+            return and_(Department.org_id == org_id, Department.id.in_(ids))
+
+        def children_of(ids):
+            return and_(Department.org_id == org_id,
+                        Department.parent_id.in_(ids))
+
+        def employees_of(ids):
+            return and_(Employee.org_id == org_id,
+                        Employee.department_id.in_(ids))
+
+        return Department, Employee, roots, children_of, employees_of
+
+    def roots(ids):
+        return history_crud.departments_at(org_id, as_of, ids)
+
+    def children_of(ids):
+        return history_crud.department_children_at(org_id, as_of, ids)
+
+    def employees_of(ids):
+        return history_crud.employees_at(org_id, as_of, ids)
+
+    return (DepartmentHistory, EmployeeHistory,
+            roots, children_of, employees_of)
+
+
+def _department_columns(dept):
+    return (dept.id, dept.name, dept.parent_id, dept.created_at)
+
+
+async def _count_children(db: AsyncSession, dept, children_of,
+                          parent_ids: list[int]) -> dict[int, int]:
+    result = await db.execute(
+        select(dept.parent_id, func.count())
+        .where(children_of(parent_ids))
+        .group_by(dept.parent_id)
+    )
+    return dict(result.all())
+
+
+async def load_department_forest(db: AsyncSession, org_id: int,
+                                 root_ids: list[int],
+                                 depth: int,
+                                 include_employees: bool = True,
+                                 as_of: Optional[datetime] = None,
+                                 children_limit: Optional[int] = None):
+    """Загружает поддеревья нескольких подразделений поуровневыми запросами.
+
+    Вместо запроса на каждый узел выполняется один запрос на уровень
+    дерева (``parent_id IN (...)``) и один запрос на всех сотрудников,
+    поэтому общее число запросов не превышает ``depth + 2``.
+    Пересекающиеся поддеревья загружаются один раз.
+    С as_of те же запросы читают версии из таблиц истории, действовавшие
+    в этот момент, по GiST-индексам (ключ, интервал действия).
+
+    Дети узла упорядочены по (name, id); с children_limit раскрываются
+    только первые children_limit детей каждого узла. Возвращает также
+    полное число детей каждого узла, включая узлы на границе глубины.
+    """
+    logger.debug(f"Loading department forest for ids={root_ids}, "
+                 f"depth={depth}, include_employees={include_employees}, "
+                 f"as_of={as_of}, children_limit={children_limit}")
+    dept, emp, roots, children_of, employees_of = _tree_source(org_id, as_of)
+    columns = _department_columns(dept)
+
+    result = await db.execute(select(*columns).where(roots(root_ids)))
+    nodes = {row.id: row._asdict() for row in result}
+    children = {dept_id: [] for dept_id in nodes}
+    child_counts = {}
+
+    # Поиск в ширину сразу от всех корней: глубина у всех общая,
+    # поэтому узел, найденный первым, уже имеет максимальный
+    # оставшийся запас глубины и повторно не раскрывается.
+    frontier = list(nodes)
+    for _ in range(depth - 1):
+        if not frontier:
+            break
+        sibling_order = (dept.name, dept.id)
+        ranked = (
+            select(*columns,
+                   func.row_number().over(partition_by=dept.parent_id,
+                                          order_by=sibling_order)
+                   .label("position"),
+                   func.count().over(partition_by=dept.parent_id)
+                   .label("siblings"))
+            .where(children_of(frontier))
+            .subquery()
+        )
+        level = select(ranked)
+        if children_limit is not None:
+            # Широкие уровни отсекаются в БД, а не после передачи строк
+            level = level.where(ranked.c.position <= children_limit)
+        result = await db.execute(
+            level.order_by(ranked.c.parent_id, ranked.c.position)
+        )
+        for parent_id in frontier:
+            child_counts[parent_id] = 0
+        next_frontier = []
+        for row in result:
+            child_counts[row.parent_id] = row.siblings
+            children[row.parent_id].append(row.id)
+            if row.id not in nodes:
+                nodes[row.id] = {"id": row.id, "name": row.name,
+                                 "parent_id": row.parent_id,
+                                 "created_at": row.created_at}
+                children[row.id] = []
+                next_frontier.append(row.id)
+        frontier = next_frontier
+
+    # Узлы на границе глубины не раскрываются, но число детей
+    # нужно клиенту, чтобы догрузить их через GET /departments/{id}/children
+    if frontier:
+        counts = await _count_children(db, dept, children_of, frontier)
+        for dept_id in frontier:
+            child_counts[dept_id] = counts.get(dept_id, 0)
+
+    employees = {dept_id: [] for dept_id in nodes}
+    if include_employees and nodes:
+        result = await db.execute(
+            select(emp.id, emp.department_id, emp.full_name,
+                   emp.position, emp.hired_at, emp.created_at)
+            .where(employees_of(list(nodes)))
+            # Для текущего состояния порядок по дате создания обеспечивает
+            # индекс ix_employees_department_id_created_at
+            .order_by(emp.department_id, emp.created_at, emp.id)
+        )
+        for row in result:
+            employees[row.department_id].append(row._asdict())
+
+    logger.debug(f"Loaded {len(nodes)} departments for forest {root_ids}")
+    return nodes, children, employees, child_counts
+
+
+async def list_departments(db: AsyncSession, org_id: int, after_id: int,
+                           limit: int):
+    """Порция подразделений организации с id > after_id по возрастанию id."""
+    result = await db.execute(
+        select(*_department_columns(Department))
+        .where(Department.org_id == org_id, Department.id > after_id)
+        .order_by(Department.id)
+        .limit(limit)
+    )
+    return [row._asdict() for row in result]
+
+
+def encode_children_cursor(name: str, dept_id: int) -> str:
+    """Курсор страницы детей: (name, id) последнего выданного ребёнка."""
+    raw = json.dumps([name, dept_id], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_children_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        decoded = json.loads(raw)
+    except ValueError as exc:
+        raise ValueError("Invalid cursor") from exc
+    # bool — подкласс int, его тоже отвергаем
+    if (not isinstance(decoded, list) or len(decoded) != 2
+            or not isinstance(decoded[0], str)
+            or not isinstance(decoded[1], int)
+            or isinstance(decoded[1], bool)):
+        raise ValueError("Invalid cursor")
+    name, dept_id = decoded
+    return name, dept_id
+
+
+async def get_children_page(db: AsyncSession, org_id: int, dept_id: int,
+                            limit: int, after: Optional[tuple[str, int]] = None,
+                            as_of: Optional[datetime] = None):
+    """Страница детей подразделения в порядке (name, id) после курсора.
+
+    Keyset-пагинация: условие (name, id) > after и LIMIT читают
+    из ix_departments_parent_name ровно одну страницу независимо от её
+    номера. Возвращает строки детей, число детей у каждого из них
+    и признак наличия следующей страницы.
+    """
+    dept, _, _, children_of, _ = _tree_source(org_id, as_of)
+    stmt = select(*_department_columns(dept)).where(children_of([dept_id]))
+    if after is not None:
+        stmt = stmt.where(tuple_(dept.name, dept.id) > tuple_(*after))
+    result = await db.execute(
+        stmt.order_by(dept.name, dept.id).limit(limit + 1)
+    )
+    rows = [row._asdict() for row in result]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    counts = {}
+    if rows:
+        counts = await _count_children(db, dept, children_of,
+                                       [row["id"] for row in rows])
+    return rows, counts, has_more
+
+
+async def create_department(db: AsyncSession, org_id: int,
                             dept: dept_schema.DepartmentCreate):
     name = dept.name.strip()
     if not name:
         raise ValueError("Department name cannot be empty")
     parent_id = dept.parent_id if dept.parent_id != 0 else None
     logger.info(f"Creating department: name='{name}', parent_id={parent_id}")
+    # Родитель из другой организации для этой организации не существует
+    if parent_id is not None and not await get_department(db, org_id, parent_id):
+        raise ValueError("Parent department not found")
 
     # Проверка уникальности имени в рамках одного родителя
+    await _lock_sibling_names(db, org_id, parent_id)
     stmt = select(Department).where(
+        Department.org_id == org_id,
         Department.name == name,
         Department.parent_id.is_(parent_id) if parent_id is None else Department.parent_id == parent_id
     )
@@ -58,19 +457,25 @@ async def create_department(db: AsyncSession,
         raise ValueError("Department with this name already exists under the same parent")
 
     db_dept = Department(
+        org_id=org_id,
         name=name,
         parent_id=parent_id,
     )
     db.add(db_dept)
     await db.flush()
     await db.refresh(db_dept)
+    mark_hierarchy_changed(db, org_id)
+    change_crud.record_change(db, org_id, change_crud.DEPARTMENT, db_dept.id,
+                              change_crud.CREATE,
+                              change_crud.department_snapshot(db_dept))
     logger.info(f"Department created with id {db_dept.id}")
     return db_dept
 
 
-async def update_department(db: AsyncSession, dept_id: int, data: dict):
+async def update_department(db: AsyncSession, org_id: int, dept_id: int,
+                            data: dict):
     logger.info(f"Updating department {dept_id} with data: {data}")
-    department = await get_department(db, dept_id)
+    department = await get_department(db, org_id, dept_id)
     if not department:
         logger.warning(f"Department {dept_id} not found")
         return None
@@ -93,7 +498,9 @@ async def update_department(db: AsyncSession, dept_id: int, data: dict):
         new_parent = department.parent_id
 
     if "name" in data or "parent_id" in data:
+        await _lock_sibling_names(db, org_id, new_parent)
         stmt = select(Department).where(
+            Department.org_id == org_id,
             Department.name == new_name,
             Department.id != dept_id,
             Department.parent_id.is_(new_parent) if new_parent is None else Department.parent_id == new_parent
@@ -105,32 +512,53 @@ async def update_department(db: AsyncSession, dept_id: int, data: dict):
     if update_values:
         await db.execute(
             update(Department)
-            .where(Department.id == dept_id)
+            .where(Department.org_id == org_id, Department.id == dept_id)
             .values(**update_values)
         )
+        if "parent_id" in update_values:
+            mark_hierarchy_changed(db, org_id)
         logger.info(f"Department {dept_id} updated with {update_values}")
     else:
         logger.info(f"No changes for department {dept_id}")
+        return department
 
-    return await get_department(db, dept_id)
+    department = await get_department(db, org_id, dept_id)
+    change_crud.record_change(db, org_id, change_crud.DEPARTMENT, dept_id,
+                              change_crud.UPDATE,
+                              change_crud.department_snapshot(department))
+    return department
 
 
-async def delete_department_cascade(db: AsyncSession, dept: Department):
+async def delete_department_cascade(db: AsyncSession, org_id: int,
+                                    dept: Department):
     logger.info(f"Cascade deleting department {dept.id} ({dept.name})")
     result = await db.execute(
-        select(Department).where(Department.parent_id == dept.id)
+        select(Department).where(Department.org_id == org_id,
+                                 Department.parent_id == dept.id)
     )
     children = result.scalars().all()
     if children:
         logger.debug(f"Found {len(children)} child"
                      f" departments, deleting recursively")
         for child in children:
-            await delete_department_cascade(db, child)
+            await delete_department_cascade(db, org_id, child)
+
+    result = await db.execute(
+        select(Employee.id).where(Employee.org_id == org_id,
+                                  Employee.department_id == dept.id)
+    )
+    for emp_id in result.scalars():
+        change_crud.record_change(db, org_id, change_crud.EMPLOYEE, emp_id,
+                                  change_crud.DELETE)
+    change_crud.record_change(db, org_id, change_crud.DEPARTMENT, dept.id,
+                              change_crud.DELETE)
     await db.delete(dept)
+    mark_hierarchy_changed(db, org_id)
     logger.info(f"Department {dept.id} deleted in cascade mode")
 
 
 async def delete_department_reassign(db: AsyncSession,
+                                     org_id: int,
                                      dept: Department,
                                      target_id: int):
     logger.info(f"Reassign deleting department {dept.id}"
@@ -139,25 +567,217 @@ async def delete_department_reassign(db: AsyncSession,
     # Перемещаем сотрудников
     result = await db.execute(
         update(Employee)
-        .where(Employee.department_id == dept.id)
+        .where(Employee.org_id == org_id, Employee.department_id == dept.id)
         .values(department_id=target_id)
-        .returning(Employee.id)
+        .returning(Employee.id, Employee.department_id, Employee.full_name,
+                   Employee.position, Employee.hired_at, Employee.created_at)
     )
-    moved_employees = result.scalars().all()
+    moved_employees = result.all()
+    for emp in moved_employees:
+        change_crud.record_change(db, org_id, change_crud.EMPLOYEE, emp.id,
+                                  change_crud.UPDATE,
+                                  change_crud.employee_snapshot(emp))
     logger.info(f"Moved {len(moved_employees)} "
                 f"employees to department {target_id}")
 
     # Делаем детей корневыми
     result = await db.execute(
         update(Department)
-        .where(Department.parent_id == dept.id)
+        .where(Department.org_id == org_id, Department.parent_id == dept.id)
         .values(parent_id=None)
-        .returning(Department.id)
+        .returning(Department.id, Department.name,
+                   Department.parent_id, Department.created_at)
     )
-    orphaned_children = result.scalars().all()
+    orphaned_children = result.all()
     if orphaned_children:
         logger.info(f"Set parent_id=NULL for "
-                     f"{len(orphaned_children)} child departments: {orphaned_children}")
+                     f"{len(orphaned_children)} child departments: "
+                     f"{[child.id for child in orphaned_children]}")
+    for child in orphaned_children:
+        change_crud.record_change(db, org_id, change_crud.DEPARTMENT,
+                                  child.id, change_crud.UPDATE,
+                                  change_crud.department_snapshot(child))
 
+    change_crud.record_change(db, org_id, change_crud.DEPARTMENT, dept.id,
+                              change_crud.DELETE)
     await db.delete(dept)
+    mark_hierarchy_changed(db, org_id)
     logger.info(f"Department {dept.id} deleted in reassign mode")
+
+
+# Пошаговое удаление для фоновых задач: каждый шаг затрагивает не больше
+# chunk_size строк каждой таблицы и коммитится отдельно, поэтому
+# блокировки держатся недолго и не мешают работе с остальным деревом.
+
+def _has_children():
+    child = aliased(Department)
+    return exists().where(child.org_id == Department.org_id,
+                          child.parent_id == Department.id)
+
+
+async def count_subtree_rows(db: AsyncSession, org_id: int,
+                             dept_id: int) -> int:
+    """Число подразделений и сотрудников поддерева — объём фоновой задачи."""
+    subtree = _subtree_cte(org_id, dept_id)
+    departments = await db.scalar(select(func.count()).select_from(subtree))
+    employees = await db.scalar(
+        select(func.count(Employee.id))
+        .where(Employee.org_id == org_id,
+               Employee.department_id.in_(select(subtree.c.id)))
+    )
+    return departments + employees
+
+
+async def count_reassign_rows(db: AsyncSession, org_id: int,
+                              dept_id: int) -> int:
+    employees = await db.scalar(
+        select(func.count(Employee.id))
+        .where(Employee.org_id == org_id, Employee.department_id == dept_id)
+    )
+    children = await db.scalar(
+        select(func.count(Department.id))
+        .where(Department.org_id == org_id, Department.parent_id == dept_id)
+    )
+    return employees + children + 1
+
+
+async def delete_subtree_chunk(db: AsyncSession, org_id: int, dept_id: int,
+                               chunk_size: int) -> tuple[int, bool]:
+    """Удаляет очередную порцию поддерева снизу вверх.
+
+    Блокирует до chunk_size листьев поддерева, удаляет их сотрудников,
+    а когда сотрудников не осталось — сами листья. Заблокированные листья
+    не принимают новых сотрудников и дочерних подразделений до коммита.
+    Возвращает (число удалённых строк, удалён ли корень).
+    """
+    subtree = _subtree_cte(org_id, dept_id)
+    result = await db.execute(
+        select(Department.id)
+        .where(Department.org_id == org_id,
+               Department.id.in_(select(subtree.c.id)), ~_has_children())
+        .order_by(Department.id)
+        .limit(chunk_size)
+        .with_for_update(of=Department)
+    )
+    leaves = result.scalars().all()
+    if not leaves:
+        exists_now = await get_department(db, org_id, dept_id)
+        return 0, exists_now is None
+
+    result = await db.execute(
+        delete(Employee)
+        .where(Employee.org_id == org_id, Employee.id.in_(
+            select(Employee.id)
+            .where(Employee.org_id == org_id,
+                   Employee.department_id.in_(leaves))
+            .order_by(Employee.id)
+            .limit(chunk_size)
+        ))
+        .returning(Employee.id)
+        .execution_options(synchronize_session=False)
+    )
+    emp_ids = result.scalars().all()
+    for emp_id in emp_ids:
+        change_crud.record_change(db, org_id, change_crud.EMPLOYEE, emp_id,
+                                  change_crud.DELETE)
+    if len(emp_ids) == chunk_size:
+        return len(emp_ids), False
+
+    # Дети, добавленные до захвата блокировок, видны этому запросу
+    result = await db.execute(
+        delete(Department)
+        .where(Department.org_id == org_id, Department.id.in_(leaves),
+               ~_has_children())
+        .returning(Department.id)
+        .execution_options(synchronize_session=False)
+    )
+    dept_ids = result.scalars().all()
+    for deleted_id in dept_ids:
+        change_crud.record_change(db, org_id, change_crud.DEPARTMENT,
+                                  deleted_id, change_crud.DELETE)
+    if dept_ids:
+        mark_hierarchy_changed(db, org_id)
+    logger.info(f"Subtree {dept_id}: deleted {len(emp_ids)} employees "
+                f"and {len(dept_ids)} departments")
+    return len(emp_ids) + len(dept_ids), dept_id in dept_ids
+
+
+async def reassign_chunk(db: AsyncSession, org_id: int, dept_id: int,
+                         target_id: int, chunk_size: int) -> tuple[int, bool]:
+    """Очередная порция удаления в режиме reassign.
+
+    Переводит до chunk_size сотрудников в target_id, затем делает детей
+    корневыми, и когда у подразделения не осталось ни сотрудников,
+    ни детей, удаляет его. Возвращает (число изменённых строк, завершено ли).
+    """
+    result = await db.execute(
+        select(Department.id)
+        .where(Department.org_id == org_id,
+               Department.id.in_([dept_id, target_id]))
+        .order_by(Department.id)
+        .with_for_update()
+    )
+    locked = set(result.scalars())
+    if dept_id not in locked:
+        return 0, True
+    if target_id not in locked:
+        raise ValueError("Target department not found")
+
+    result = await db.execute(
+        update(Employee)
+        .where(Employee.org_id == org_id, Employee.id.in_(
+            select(Employee.id)
+            .where(Employee.org_id == org_id,
+                   Employee.department_id == dept_id)
+            .order_by(Employee.id)
+            .limit(chunk_size)
+        ))
+        .values(department_id=target_id)
+        .returning(Employee.id, Employee.department_id, Employee.full_name,
+                   Employee.position, Employee.hired_at, Employee.created_at)
+        .execution_options(synchronize_session=False)
+    )
+    moved = result.all()
+    for emp in moved:
+        change_crud.record_change(db, org_id, change_crud.EMPLOYEE, emp.id,
+                                  change_crud.UPDATE,
+                                  change_crud.employee_snapshot(emp))
+    budget = chunk_size - len(moved)
+    if budget == 0:
+        return len(moved), False
+
+    result = await db.execute(
+        update(Department)
+        .where(Department.org_id == org_id, Department.id.in_(
+            select(Department.id)
+            .where(Department.org_id == org_id,
+                   Department.parent_id == dept_id)
+            .order_by(Department.id)
+            .limit(budget)
+        ))
+        .values(parent_id=None)
+        .returning(Department.id, Department.name,
+                   Department.parent_id, Department.created_at)
+        .execution_options(synchronize_session=False)
+    )
+    orphaned = result.all()
+    for child in orphaned:
+        change_crud.record_change(db, org_id, change_crud.DEPARTMENT,
+                                  child.id, change_crud.UPDATE,
+                                  change_crud.department_snapshot(child))
+    if orphaned:
+        mark_hierarchy_changed(db, org_id)
+    if len(orphaned) == budget:
+        return len(moved) + len(orphaned), False
+
+    await db.execute(
+        delete(Department)
+        .where(Department.org_id == org_id, Department.id == dept_id)
+        .execution_options(synchronize_session=False)
+    )
+    change_crud.record_change(db, org_id, change_crud.DEPARTMENT, dept_id,
+                              change_crud.DELETE)
+    mark_hierarchy_changed(db, org_id)
+    logger.info(f"Department {dept_id} deleted in reassign mode, "
+                f"employees moved to {target_id}")
+    return len(moved) + len(orphaned) + 1, True
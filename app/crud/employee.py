@@ -1,14 +1,18 @@
 import logging
+from typing import Optional
 
+from sqlalchemy import insert, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models import Employee
+from app.crud import change as change_crud
+from app.models import Department, Employee
 from app.schemas import employee as emp_schema
 
 logger = logging.getLogger(__name__)
 
 
 async def create_employee(db: AsyncSession,
+                          org_id: int,
                           department_id: int,
                           emp: emp_schema.EmployeeCreate):
     logger.info(f"Creating employee in department_id={department_id}: "
@@ -16,6 +20,7 @@ async def create_employee(db: AsyncSession,
                 f"hired_at={emp.hired_at}")
 
     db_emp = Employee(
+        org_id=org_id,
         department_id=department_id,
         full_name=emp.full_name.strip(),
         position=emp.position.strip(),
@@ -24,6 +29,85 @@ async def create_employee(db: AsyncSession,
     db.add(db_emp)
     await db.flush()
     await db.refresh(db_emp)
+    change_crud.record_change(db, org_id, change_crud.EMPLOYEE, db_emp.id,
+                              change_crud.CREATE,
+                              change_crud.employee_snapshot(db_emp))
 
     logger.info(f"Employee created successfully with id={db_emp.id}")
     return db_emp
+
+
+async def create_employees_batch(db: AsyncSession,
+                                 items: list[tuple]) -> list[Optional[dict]]:
+    """Создаёт сотрудников из пакета (org_id, department_id, данные).
+
+    Подразделения проверяются одним запросом и блокируются FOR KEY SHARE,
+    чтобы параллельное удаление не сорвало вставку на внешнем ключе;
+    сотрудники вставляются одним INSERT ... RETURNING. Возвращает строку
+    сотрудника для каждого элемента или None, если подразделения нет.
+    """
+    result = await db.execute(
+        select(Department.org_id, Department.id)
+        .where(tuple_(Department.org_id, Department.id)
+               .in_(list({(org_id, dept_id)
+                          for org_id, dept_id, _ in items})))
+        .with_for_update(key_share=True)
+    )
+    existing = set(result.tuples())
+
+    rows = []
+    keys = []
+    for org_id, dept_id, emp in items:
+        if (org_id, dept_id) not in existing:
+            keys.append(None)
+            continue
+        row = {"org_id": org_id, "department_id": dept_id,
+               "full_name": emp.full_name.strip(),
+               "position": emp.position.strip(),
+               "hired_at": emp.hired_at}
+        rows.append(row)
+        keys.append(tuple(row.values()))
+    if not rows:
+        return [None] * len(items)
+
+    result = await db.execute(
+        insert(Employee).values(rows).returning(
+            Employee.org_id, Employee.department_id, Employee.full_name,
+            Employee.position, Employee.hired_at, Employee.id,
+            Employee.created_at
+        )
+    )
+    # Порядок RETURNING не гарантирован: строки сопоставляются с элементами
+    # по данным, а одинаковые элементы взаимозаменяемы
+    created: dict[tuple, list[dict]] = {}
+    for row in result:
+        change_crud.record_change(db, row.org_id, change_crud.EMPLOYEE,
+                                  row.id, change_crud.CREATE,
+                                  change_crud.employee_snapshot(row))
+        created.setdefault(tuple(row[:5]), []).append(row._asdict())
+    await db.flush()
+    logger.info(f"Created {len(rows)} employees in one batch")
+    return [created[key].pop() if key is not None else None for key in keys]
+
+
+async def get_employee_departments(db: AsyncSession, org_id: int,
+                                   employee_ids: list[int]):
+    logger.debug(f"Fetching departments for {len(employee_ids)} employees")
+    result = await db.execute(
+        select(Employee.id, Employee.department_id)
+        .where(Employee.org_id == org_id, Employee.id.in_(employee_ids))
+    )
+    return dict(result.tuples().all())
+
+
+async def list_employees(db: AsyncSession, org_id: int, after_id: int,
+                         limit: int):
+    """Порция сотрудников организации с id > after_id по возрастанию id."""
+    result = await db.execute(
+        select(Employee.id, Employee.department_id, Employee.full_name,
+               Employee.position, Employee.hired_at, Employee.created_at)
+        .where(Employee.org_id == org_id, Employee.id > after_id)
+        .order_by(Employee.id)
+        .limit(limit)
+    )
+    return [row._asdict() for row in result]
@@ -0,0 +1,118 @@
+import logging
+from datetime import date, datetime, timezone
+
+from sqlalchemy import Date, DateTime, and_, event, insert, literal, update
+from sqlalchemy.orm import Session
+
+from app.crud.change import DEPARTMENT, EMPLOYEE, HISTORY_PENDING_KEY
+from app.dialects import (AwareDateTime, IdArray, contains_any, greatest,
+                          valid_at)
+from app.models import DepartmentHistory, EmployeeHistory
+from app.models.history import key_range, parent_key_range, valid_range
+
+logger = logging.getLogger(__name__)
+
+HISTORY_MODELS = {DEPARTMENT: DepartmentHistory, EMPLOYEE: EmployeeHistory}
+
+# Сколько текущих версий закрывается одним UPDATE
+CLOSE_BATCH_SIZE = 1000
+
+
+def _version_row(model, org_id: int, data: dict, valid_from: datetime):
+    """Строка версии из снимка ленты изменений (даты там в ISO-формате)."""
+    row = {"org_id": org_id, "valid_from": valid_from}
+    for key, value in data.items():
+        column_type = model.__table__.c[key].type
+        if value is not None and isinstance(column_type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column_type, Date):
+            value = date.fromisoformat(value)
+        row[key] = value
+    return row
+
+
+@event.listens_for(Session, "before_flush")
+def _write_history(session, flush_context, instances):
+    """Закрывает текущие версии изменённых сущностей и открывает новые.
+
+    Изменения приходят из record_change. Все изменения одного flush
+    получают одно время, поэтому промежуточные состояния сущности внутри
+    него всё равно не видны ни в какой момент — пишется только последнее.
+    Удалённая сущность получает только закрытие версии.
+    """
+    pending = session.info.pop(HISTORY_PENDING_KEY, None)
+    if not pending:
+        return
+    latest = {}
+    for org_id, entity, entity_id, data in pending:
+        latest[(entity, org_id, entity_id)] = data
+
+    now = datetime.now(timezone.utc)
+    connection = session.connection()
+    for entity, model in HISTORY_MODELS.items():
+        touched: dict[int, list[int]] = {}
+        rows = []
+        for (row_entity, org_id, entity_id), data in latest.items():
+            if row_entity != entity:
+                continue
+            touched.setdefault(org_id, []).append(entity_id)
+            if data is not None:
+                rows.append(_version_row(model, org_id, data, now))
+
+        table = model.__table__
+        for org_id, ids in touched.items():
+            for start in range(0, len(ids), CLOSE_BATCH_SIZE):
+                connection.execute(
+                    update(table)
+                    .where(table.c.org_id == org_id,
+                           table.c.id.in_(ids[start:start + CLOSE_BATCH_SIZE]),
+                           table.c.valid_to.is_(None))
+                    # Часы процессов могут расходиться: интервал не должен
+                    # получиться с концом раньше начала
+                    .values(valid_to=greatest(table.c.valid_from, now))
+                )
+        if rows:
+            connection.execute(insert(table), rows)
+    logger.debug(f"History recorded for {len(latest)} entities")
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop(HISTORY_PENDING_KEY, None)
+
+
+def _as_aware(as_of: datetime) -> datetime:
+    # Время без часового пояса считается UTC
+    return as_of if as_of.tzinfo else as_of.replace(tzinfo=timezone.utc)
+
+
+def _range_contains_any(range_expr, key, ids):
+    return contains_any(range_expr, key, literal(list(ids), IdArray))
+
+
+def _valid_at(model, as_of: datetime):
+    return valid_at(valid_range(model), model.valid_from, model.valid_to,
+                    literal(_as_aware(as_of), AwareDateTime))
+
+
+def departments_at(org_id: int, as_of: datetime, ids):
+    """Условие: версии подразделений ids, действовавшие в момент as_of."""
+    return and_(DepartmentHistory.org_id == org_id,
+                _range_contains_any(key_range(DepartmentHistory.id),
+                                    DepartmentHistory.id, ids),
+                _valid_at(DepartmentHistory, as_of))
+
+
+def department_children_at(org_id: int, as_of: datetime, parent_ids):
+    return and_(DepartmentHistory.org_id == org_id,
+                _range_contains_any(parent_key_range(),
+                                    DepartmentHistory.parent_id, parent_ids),
+                _valid_at(DepartmentHistory, as_of))
+
+
+def employees_at(org_id: int, as_of: datetime, department_ids):
+    return and_(EmployeeHistory.org_id == org_id,
+                _range_contains_any(key_range(EmployeeHistory.department_id),
+                                    EmployeeHistory.department_id,
+                                    department_ids),
+                _valid_at(EmployeeHistory, as_of))
@@ -0,0 +1,44 @@
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+DELETE_DEPARTMENT = "delete_department"
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+async def create_job(db: AsyncSession, org_id: int, kind: str,
+                     params: dict) -> Job:
+    job = Job(org_id=org_id, kind=kind, params=params, status=PENDING,
+              processed=0)
+    db.add(job)
+    await db.flush()
+    await db.refresh(job)
+    logger.info(f"Job {job.id} ({kind}) created with params {params}")
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: int, org_id: int = None):
+    """Задача по id; с org_id — только если она принадлежит организации."""
+    job = await db.get(Job, job_id)
+    if job is not None and org_id is not None and job.org_id != org_id:
+        return None
+    return job
+
+
+async def get_unfinished_job_ids(db: AsyncSession) -> list[int]:
+    """Задачи, которые нужно (до)выполнить после перезапуска процесса."""
+    result = await db.execute(
+        select(Job.id)
+        .where(Job.status.in_([PENDING, RUNNING]))
+        .order_by(Job.id)
+    )
+    return result.scalars().all()
@@ -0,0 +1,45 @@
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Organization
+
+logger = logging.getLogger(__name__)
+
+# Организации не удаляются, поэтому подтверждённые id можно кэшировать
+_known_org_ids: set[int] = set()
+
+
+async def get_organization(db: AsyncSession, org_id: int):
+    result = await db.execute(
+        select(Organization).where(Organization.id == org_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def organization_exists(db: AsyncSession, org_id: int) -> bool:
+    if org_id in _known_org_ids:
+        return True
+    if await get_organization(db, org_id) is None:
+        return False
+    _known_org_ids.add(org_id)
+    return True
+
+
+async def create_organization(db: AsyncSession, name: str) -> Organization:
+    name = name.strip()
+    if not name:
+        raise ValueError("Organization name cannot be empty")
+    existing = await db.execute(
+        select(Organization.id).where(Organization.name == name)
+    )
+    if existing.scalar_one_or_none() is not None:
+        raise ValueError("Organization with this name already exists")
+
+    org = Organization(name=name)
+    db.add(org)
+    await db.flush()
+    await db.refresh(org)
+    logger.info(f"Organization created with id {org.id}")
+    return org
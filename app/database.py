@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import asyncio
+from contextvars import ContextVar
+from functools import lru_cache
+
+from sqlalchemy import Column, Integer, event
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.util import await_only
 
-from app.config import settings
+from app.config import get_settings
+from app.metrics import gauge
 
 
 class PreBase:
@@ -16,6 +21,162 @@ class PreBase:
 
 Base = declarative_base()
 
-engine = create_async_engine(settings.DATABASE_URL)
+# Транзакции текущей задачи только читают. В SQLite остальные начинаются
+# BEGIN IMMEDIATE: запись, начатая отложенной транзакцией после чтения,
+# получает «database is locked» без ожидания, если базу уже изменил другой
+# писатель; IMMEDIATE ждёт блокировку записи (busy_timeout) сразу при BEGIN.
+read_only_transactions: ContextVar[bool] = ContextVar("read_only_transactions",
+                                                      default=False)
+_WRITER_KEY = "sqlite_writer"
+
+
+def _configure_sqlite(sync_engine):
+    """Настройка соединений SQLite-режима.
+
+    Транзакции начинает сам SQLAlchemy: модуль sqlite3 открывает их
+    неявно и ломает SAVEPOINT, поэтому у соединения выключается его
+    управление транзакциями. PRAGMA задаются на каждое соединение
+    (WAL, проверка внешних ключей, ожидание блокировки базы).
+
+    Пишущие транзакции начинаются BEGIN IMMEDIATE (см. read_only_transactions)
+    и перед этим встают в очередь писателей движка. Обработчик занятости
+    SQLite опрашивает блокировку с растущими паузами и очереди не соблюдает:
+    при десятке одновременных писателей отдельная транзакция может ждать
+    дольше busy_timeout. Ожидание очереди ограничено тем же busy_timeout,
+    после чего транзакция ждёт блокировку базы обычным образом.
+    """
+    pragmas = get_settings().SQLITE_PRAGMAS
+    wait = int(pragmas.get("busy_timeout", 0)) / 1000
+    writers = asyncio.Lock()
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    def _release(info):
+        if info.pop(_WRITER_KEY, False):
+            writers.release()
+
+    @event.listens_for(sync_engine, "begin")
+    def _on_begin(conn):
+        if read_only_transactions.get():
+            conn.exec_driver_sql("BEGIN")
+            return
+        try:
+            await_only(asyncio.wait_for(writers.acquire(), wait))
+            conn.info[_WRITER_KEY] = True
+        except asyncio.TimeoutError:
+            pass
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        except BaseException:
+            _release(conn.info)
+            raise
+
+    # Очередь освобождается в начале COMMIT/ROLLBACK, а также при возврате
+    # соединения в пул без них (отмена запроса, ошибка соединения)
+    @event.listens_for(sync_engine, "commit")
+    @event.listens_for(sync_engine, "rollback")
+    def _on_end(conn):
+        _release(conn.info)
+
+    @event.listens_for(sync_engine.pool, "reset")
+    def _on_reset(dbapi_connection, connection_record, reset_state):
+        _release(connection_record.info)
+
+    @event.listens_for(sync_engine.pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        _release(connection_record.info)
+
+
+def make_engine(url: str, **kwargs):
+    """Асинхронный движок; для sqlite+aiosqlite:// — с настройкой SQLite."""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(url, **kwargs)
+    if engine.dialect.name == "sqlite":
+        _configure_sqlite(engine.sync_engine)
+    return engine
+
+
+class Database:
+    """Движок и фабрика сессий, создаваемые при первом обращении.
+
+    Импорт моделей и CRUD не тянет за собой драйвер БД и не открывает
+    пул: это происходит в процессе, который действительно обращается
+    к базе (воркер uvicorn, seed, Alembic), с его собственными настройками.
+    """
+
+    def __init__(self, url: str = None, **engine_kwargs):
+        self._url = url
+        self._engine_kwargs = engine_kwargs
+        self._engine = None
+        self._session_factory = None
+        self._max_overflow = 0
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            settings = get_settings()
+            kwargs = dict(self._engine_kwargs)
+            if "poolclass" not in kwargs:
+                kwargs.setdefault("pool_size", settings.DB_POOL_SIZE)
+                kwargs.setdefault("max_overflow", settings.DB_MAX_OVERFLOW)
+                self._max_overflow = kwargs["max_overflow"]
+            self._engine = make_engine(self._url or settings.DATABASE_URL,
+                                       **kwargs)
+        return self._engine
+
+    @property
+    def session_factory(self):
+        if self._session_factory is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker
+
+            self._session_factory = async_sessionmaker(
+                self.engine, expire_on_commit=False
+            )
+        return self._session_factory
+
+    def pool_status(self) -> dict:
+        """Загрузка пула соединений; пусто, пока движок не создан."""
+        if self._engine is None:
+            return {}
+        pool = self._engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {}
+        return {
+            "size": pool.size(),
+            "capacity": pool.size() + self._max_overflow,
+            "checked_out": pool.checkedout(),
+            # overflow() отрицателен, пока открыто меньше pool_size соединений
+            "overflow": max(pool.overflow(), 0),
+        }
+
+    async def dispose(self):
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._session_factory = None
+
+
+@lru_cache
+def get_database() -> Database:
+    return Database()
+
+
+def _pool_gauge(key: str, description: str):
+    def values():
+        status = get_database().pool_status()
+        return {(): status[key]} if status else {}
+
+    return gauge(f"db_pool_{key}", description, callback=values)
+
 
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+_pool_gauge("size", "Постоянные соединения пула (pool_size)")
+_pool_gauge("capacity", "Предел соединений пула: pool_size + max_overflow")
+_pool_gauge("checked_out", "Соединения, выданные запросам")
+_pool_gauge("overflow", "Открытые сверх pool_size соединения")
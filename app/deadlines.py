@@ -0,0 +1,151 @@
+import asyncio
+import logging
+from contextlib import suppress
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+_TIMEOUTS_KEY = "db_timeouts"
+
+# query_canceled (statement_timeout или отмена) и lock_not_available
+TIMEOUT_SQLSTATES = {"57014", "55P03"}
+# SQLITE_BUSY: база заблокирована дольше busy_timeout — аналог lock_timeout
+SQLITE_BUSY = 5
+
+requests_cancelled = counter(
+    "requests_cancelled_total",
+    "Запросы, отменённые из-за отключения клиента",
+    ("route",),
+)
+requests_timed_out = counter(
+    "requests_timed_out_total",
+    "Запросы, прерванные statement_timeout или lock_timeout",
+    ("route",),
+)
+
+
+def route_key(scope) -> str:
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return f"{scope['method']} {route.path}"
+
+
+def resolve_timeouts(key: str) -> tuple[int, int]:
+    """Возвращает (statement_timeout, lock_timeout) в мс для маршрута."""
+    settings = get_settings()
+    statement_ms = settings.ROUTE_DEADLINES.get(key,
+                                                settings.STATEMENT_TIMEOUT_MS)
+    return statement_ms, min(settings.LOCK_TIMEOUT_MS, statement_ms)
+
+
+def apply_deadline(session, key: str):
+    """Запоминает дедлайн маршрута в сессии; применяется в каждой транзакции."""
+    session.info[_TIMEOUTS_KEY] = resolve_timeouts(key)
+
+
+def apply_request_deadline(session, request: Request):
+    apply_deadline(session, route_key(request.scope))
+
+
+@event.listens_for(Session, "after_begin")
+def _set_local_timeouts(session, transaction, connection):
+    timeouts = session.info.get(_TIMEOUTS_KEY)
+    if timeouts is None or connection.dialect.name != "postgresql":
+        return
+    # SET LOCAL действует до конца транзакции, поэтому соединение
+    # возвращается в пул без «прилипших» настроек
+    statement_ms, lock_ms = timeouts
+    connection.execute(
+        text("SELECT set_config('statement_timeout', :statement, true), "
+             "set_config('lock_timeout', :lock, true)"),
+        {"statement": f"{statement_ms}ms", "lock": f"{lock_ms}ms"},
+    )
+
+
+def is_timeout_error(exc: BaseException) -> bool:
+    if not isinstance(exc, DBAPIError):
+        return False
+    # sqlite_errorcode — расширенный код, младший байт — основной
+    sqlite_code = getattr(exc.orig, "sqlite_errorcode", None) or 0
+    return (getattr(exc.orig, "sqlstate", None) in TIMEOUT_SQLSTATES
+            or sqlite_code & 0xFF == SQLITE_BUSY)
+
+
+async def db_error_handler(request: Request, exc: DBAPIError):
+    if is_timeout_error(exc):
+        key = route_key(request.scope)
+        requests_timed_out.inc(route=key)
+        logger.warning(f"Deadline exceeded for {key}: {exc.orig}")
+        return JSONResponse(status_code=504,
+                            content={"detail": "Request deadline exceeded"})
+    logger.exception("Database error", exc_info=exc)
+    return JSONResponse(status_code=500,
+                        content={"detail": "Internal Server Error"})
+
+
+class CancelOnDisconnectMiddleware:
+    """Отменяет обработку запроса, если клиент отключился до ответа.
+
+    Сообщения receive читаются фоновой задачей и передаются приложению
+    через очередь; получив http.disconnect до завершения ответа, задача
+    отменяет обработчик. Отмена прерывает ожидающий запрос к БД,
+    а сессия закрывается штатно и возвращает соединение в пул.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        messages = asyncio.Queue()
+        response_done = False
+        disconnected = False
+
+        async def send_wrapper(message):
+            nonlocal response_done
+            if (message["type"] == "http.response.body"
+                    and not message.get("more_body", False)):
+                response_done = True
+            await send(message)
+
+        handler = asyncio.create_task(
+            self.app(scope, messages.get, send_wrapper)
+        )
+
+        async def watch():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    if not response_done and not handler.done():
+                        disconnected = True
+                        requests_cancelled.inc(route=route_key(scope))
+                        logger.info(f"Client disconnected, cancelling "
+                                    f"{scope['method']} {scope['path']}")
+                        handler.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await handler
+        except asyncio.CancelledError:
+            if not disconnected:
+                handler.cancel()
+                raise
+        finally:
+            watcher.cancel()
+            with suppress(asyncio.CancelledError):
+                await watcher
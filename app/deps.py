@@ -1,6 +1,66 @@
-from app.database import AsyncSessionLocal
+import hmac
+from typing import Optional
 
+from fastapi import Depends, Header, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
+from app.admission import AdmissionRejected, get_admission_controller
+from app.config import get_settings
+from app.crud import organization as org_crud
+from app.database import get_database, read_only_transactions
+from app.deadlines import apply_request_deadline, route_key
+from app.slow_queries import current_route
+
+
+async def get_db(request: Request):
+    async with get_database().session_factory() as session:
+        apply_request_deadline(session, request)
         yield session
+
+
+async def get_org_id(
+    x_org_id: Optional[int] = Header(
+        None, description="ID организации; без заголовка — организация по умолчанию"
+    ),
+    db: AsyncSession = Depends(get_db),
+) -> int:
+    org_id = x_org_id if x_org_id is not None else get_settings().DEFAULT_ORG_ID
+    if not await org_crud.organization_exists(db, org_id):
+        raise HTTPException(status_code=404, detail="Organization not found")
+    return org_id
+
+
+async def admit_request(request: Request):
+    """Занимает слот класса стоимости маршрута на время обработки запроса.
+
+    Маршрут также становится меткой медленных SQL-запросов обработчика,
+    а транзакции GET-запросов помечаются как читающие.
+    """
+    current_route.set(route_key(request.scope))
+    read_only_transactions.set(request.method in ("GET", "HEAD"))
+    controller = get_admission_controller()
+    cost_class = controller.classify(request)
+    try:
+        await controller.acquire(cost_class)
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Service overloaded, retry later",
+            headers={"Retry-After":
+                     str(get_settings().ADMISSION_RETRY_AFTER_SECONDS)},
+        ) from exc
+    try:
+        yield
+    finally:
+        controller.release(cost_class)
+
+
+async def require_admin(
+    x_admin_token: Optional[str] = Header(
+        None, description="Токен служебных эндпоинтов (ADMIN_TOKEN)"
+    ),
+):
+    token = get_settings().ADMIN_TOKEN
+    if not token or x_admin_token is None or not hmac.compare_digest(
+            x_admin_token.encode(), token.encode()):
+        raise HTTPException(status_code=403, detail="Admin token required")
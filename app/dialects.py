@@ -0,0 +1,236 @@
+"""SQL, который в Postgres и SQLite записывается по-разному.
+
+Конструкции компилируются под диалект соединения, поэтому crud и модели
+не проверяют диалект сами: Postgres получает прежний SQL (и работающие
+с ним индексы), SQLite — эквивалент на своих функциях.
+"""
+from datetime import timezone
+
+from sqlalchemy import (JSON, Boolean, Date, DateTime, Integer, TypeDecorator,
+                        and_, any_, cast, func, literal_column, or_)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn, PrimaryKeyConstraint
+from sqlalchemy.sql.expression import FunctionElement, Values
+
+
+class _SQLiteUTCDateTime(TypeDecorator):
+    # SQLite хранит время текстом без пояса: пишем UTC, читаем как UTC
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+
+# timestamptz в Postgres; в SQLite значения тоже возвращаются с поясом UTC
+AwareDateTime = DateTime(timezone=True).with_variant(_SQLiteUTCDateTime(),
+                                                      "sqlite")
+
+# Список id одним параметром: int[] в Postgres, JSON-массив в SQLite
+IdArray = ARRAY(Integer).with_variant(JSON(), "sqlite")
+
+
+def _rowid_column(table):
+    """Автоинкрементный столбец составного первичного ключа.
+
+    SQLite выдаёт значения только столбцу INTEGER PRIMARY KEY, поэтому
+    такой столбец (id, общий для всех организаций, как последовательность
+    в Postgres) становится ключом таблицы, а составной ключ — уникальным
+    ограничением, на которое ссылаются внешние ключи.
+    """
+    columns = table.primary_key.columns
+    if len(columns) < 2:
+        return None
+    for column in columns:
+        if column.autoincrement is True:
+            return column
+    return None
+
+
+@compiles(CreateColumn, "sqlite")
+def _sqlite_column(element, compiler, **kw):
+    column = element.element
+    if column.table is not None and _rowid_column(column.table) is column:
+        # AUTOINCREMENT: id удалённых строк не выдаются повторно
+        return (f"{compiler.preparer.format_column(column)} "
+                f"INTEGER PRIMARY KEY AUTOINCREMENT")
+    return compiler.visit_create_column(element, **kw)
+
+
+@compiles(PrimaryKeyConstraint, "sqlite")
+def _sqlite_primary_key(constraint, compiler, **kw):
+    if _rowid_column(constraint.table) is None:
+        return compiler.visit_primary_key_constraint(constraint, **kw)
+    columns = ", ".join(compiler.preparer.format_column(column)
+                        for column in constraint.columns)
+    return f"UNIQUE ({columns})"
+
+
+@compiles(Values, "sqlite")
+def _sqlite_values(element, compiler, asfrom=False, **kw):
+    # SQLite не принимает список столбцов у псевдонима VALUES (... ) AS t (a, b):
+    # безымянные column1, column2... переименовываются во внешнем SELECT
+    if not asfrom or element._unnamed:
+        return compiler.visit_values(element, asfrom=asfrom, **kw)
+    kw.pop("from_linter", None)
+    rows = compiler._render_values(element, **kw)
+    columns = ", ".join(
+        f"column{position} AS {compiler.preparer.quote(column.name)}"
+        for position, column in enumerate(element.columns, 1)
+    )
+    name = compiler.preparer.quote(element.name)
+    return f"(SELECT {columns} FROM ({rows})) AS {name}"
+
+
+class contains_any(FunctionElement):
+    """Диапазон range_expr содержит один из ids (параметр типа IdArray).
+
+    В Postgres условие записывается через диапазон, чтобы использовать
+    GiST-индекс; в SQLite — как key IN ids.
+    contains_any(range_expr, key, ids)
+    """
+    inherit_cache = True
+    name = "contains_any"
+
+
+@compiles(contains_any)
+def _contains_any(element, compiler, **kw):
+    range_expr, _, ids = element.clauses
+    return compiler.process(range_expr.op("@>")(any_(ids)), **kw)
+
+
+@compiles(contains_any, "sqlite")
+def _contains_any_sqlite(element, compiler, **kw):
+    _, key, ids = element.clauses
+    return (f"{compiler.process(key, **kw)} IN "
+            f"(SELECT value FROM json_each({compiler.process(ids, **kw)}))")
+
+
+class valid_at(FunctionElement):
+    """Интервал [valid_from, valid_to) содержит момент at.
+
+    valid_at(range_expr, valid_from, valid_to, at)
+    """
+    inherit_cache = True
+    name = "valid_at"
+
+
+@compiles(valid_at)
+def _valid_at(element, compiler, **kw):
+    range_expr, _, _, at = element.clauses
+    return compiler.process(range_expr.op("@>")(at), **kw)
+
+
+@compiles(valid_at, "sqlite")
+def _valid_at_sqlite(element, compiler, **kw):
+    _, valid_from, valid_to, at = element.clauses
+    return compiler.process(
+        and_(valid_from <= at, or_(valid_to.is_(None), valid_to > at)), **kw
+    )
+
+
+class greatest(FunctionElement):
+    """Большее из значений: greatest() в Postgres, max() в SQLite."""
+    inherit_cache = True
+    name = "greatest"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.type = args[0].type
+
+
+@compiles(greatest)
+def _greatest(element, compiler, **kw):
+    return f"greatest({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(greatest, "sqlite")
+def _greatest_sqlite(element, compiler, **kw):
+    return f"max({compiler.process(element.clauses, **kw)})"
+
+
+class days_since(FunctionElement):
+    """Целое число дней от даты до даты as_of: days_since(value, as_of)."""
+    type = Integer()
+    inherit_cache = True
+    name = "days_since"
+
+
+@compiles(days_since)
+def _days_since(element, compiler, **kw):
+    value, as_of = element.clauses
+    return compiler.process(as_of - value, **kw)
+
+
+@compiles(days_since, "sqlite")
+def _days_since_sqlite(element, compiler, **kw):
+    value, as_of = (compiler.process(clause, **kw)
+                    for clause in element.clauses)
+    return f"CAST(julianday({as_of}) - julianday({value}) AS INTEGER)"
+
+
+class month_start(FunctionElement):
+    """Первое число месяца даты."""
+    type = Date()
+    inherit_cache = True
+    name = "month_start"
+
+
+@compiles(month_start)
+def _month_start(element, compiler, **kw):
+    [value] = element.clauses
+    # Единица встроена в SQL: выражение в SELECT и GROUP BY должно совпадать
+    month = literal_column("'month'")
+    return compiler.process(
+        cast(func.date_trunc(month, cast(value, DateTime)), Date), **kw
+    )
+
+
+@compiles(month_start, "sqlite")
+def _month_start_sqlite(element, compiler, **kw):
+    return f"date({compiler.process(element.clauses, **kw)}, 'start of month')"
+
+
+# Advisory-блокировки. В SQLite записи и так сериализует блокировка всей
+# базы, а приложение в этом режиме работает одним процессом, поэтому
+# блокировки всегда «берутся» сразу.
+
+class advisory_xact_lock(FunctionElement):
+    """pg_advisory_xact_lock(space, key) до конца транзакции."""
+    inherit_cache = True
+    name = "pg_advisory_xact_lock"
+
+
+class try_advisory_lock(FunctionElement):
+    """pg_try_advisory_lock(space, key): True, если блокировка взята."""
+    type = Boolean()
+    inherit_cache = True
+    name = "pg_try_advisory_lock"
+
+
+class advisory_unlock(FunctionElement):
+    type = Boolean()
+    inherit_cache = True
+    name = "pg_advisory_unlock"
+
+
+@compiles(advisory_xact_lock)
+@compiles(try_advisory_lock)
+@compiles(advisory_unlock)
+def _advisory(element, compiler, **kw):
+    return f"{element.name}({compiler.process(element.clauses, **kw)})"
+
+
+@compiles(advisory_xact_lock, "sqlite")
+@compiles(try_advisory_lock, "sqlite")
+@compiles(advisory_unlock, "sqlite")
+def _advisory_sqlite(element, compiler, **kw):
+    return "1"
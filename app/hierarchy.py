@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models import Department
+
+logger = logging.getLogger(__name__)
+
+_CHANGED_KEY = "hierarchy_changed"
+
+
+class HierarchyIndex:
+    """Эйлеров обход леса подразделений и разреженная таблица над ним.
+
+    Построение занимает O(n log n), запрос LCA и расстояния — O(1).
+    """
+
+    def __init__(self, edges: Iterable[tuple[int, Optional[int]]]):
+        parents = dict(edges)
+        children: dict[int, list[int]] = {}
+        roots = []
+        for dept_id, parent_id in parents.items():
+            if parent_id is None or parent_id not in parents:
+                roots.append(dept_id)
+            else:
+                children.setdefault(parent_id, []).append(dept_id)
+
+        self.depth: dict[int, int] = {}
+        self.root: dict[int, int] = {}
+        self._first: dict[int, int] = {}
+        euler: list[int] = []
+
+        # Итеративный обход, чтобы глубина дерева не упиралась в рекурсию
+        for root_id in sorted(roots):
+            self.depth[root_id] = 0
+            stack = [(root_id, iter(children.get(root_id, ())))]
+            self.root[root_id] = root_id
+            self._first[root_id] = len(euler)
+            euler.append(root_id)
+            while stack:
+                node_id, it = stack[-1]
+                child_id = next(it, None)
+                if child_id is None:
+                    stack.pop()
+                    if stack:
+                        euler.append(stack[-1][0])
+                    continue
+                self.depth[child_id] = self.depth[node_id] + 1
+                self.root[child_id] = root_id
+                self._first[child_id] = len(euler)
+                euler.append(child_id)
+                stack.append((child_id, iter(children.get(child_id, ()))))
+
+        depth = self.depth
+        self._table = [euler]
+        span = 1
+        while span * 2 <= len(euler):
+            prev = self._table[-1]
+            self._table.append([
+                a if depth[a] <= depth[b] else b
+                for a, b in zip(prev, prev[span:])
+            ])
+            span *= 2
+
+    def __contains__(self, dept_id: int) -> bool:
+        return dept_id in self._first
+
+    def __len__(self) -> int:
+        return len(self._first)
+
+    def lca(self, a: int, b: int) -> Optional[int]:
+        """Ближайший общий предок или None, если узлы в разных деревьях."""
+        if a not in self._first or b not in self._first:
+            return None
+        if self.root[a] != self.root[b]:
+            return None
+        left, right = sorted((self._first[a], self._first[b]))
+        level = (right - left + 1).bit_length() - 1
+        row = self._table[level]
+        x, y = row[left], row[right - (1 << level) + 1]
+        return x if self.depth[x] <= self.depth[y] else y
+
+
+class HierarchyIndexCache:
+    """Индексы организаций, перестраиваемые после изменений структуры.
+
+    Индекс хранится под версией данных организации (get_change_version)
+    и перестраивается, когда она меняется, в том числе после записи
+    другим процессом. Локальная инвалидация после коммита лишь
+    избавляет этот процесс от лишнего сравнения версий.
+    Хранятся индексы не более чем max_orgs организаций, давно не
+    использованные вытесняются.
+    """
+
+    def __init__(self, max_orgs: int = 256):
+        self.max_orgs = max_orgs
+        self._indexes: OrderedDict[int, tuple[tuple[int, int],
+                                              HierarchyIndex]] = OrderedDict()
+        self._versions: dict[int, int] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def invalidate(self, org_id: int):
+        self._versions[org_id] = self._versions.get(org_id, 0) + 1
+
+    def clear(self):
+        self._indexes.clear()
+
+    def _key(self, org_id: int, data_version: int) -> tuple[int, int]:
+        return data_version, self._versions.get(org_id, 0)
+
+    def _cached(self, org_id: int,
+                data_version: int) -> Optional[HierarchyIndex]:
+        cached = self._indexes.get(org_id)
+        if cached is None or cached[0] != self._key(org_id, data_version):
+            return None
+        self._indexes.move_to_end(org_id)
+        return cached[1]
+
+    async def get(self, db: AsyncSession, org_id: int,
+                  data_version: int) -> HierarchyIndex:
+        index = self._cached(org_id, data_version)
+        if index is not None:
+            return index
+        lock = self._locks.setdefault(org_id, asyncio.Lock())
+        async with lock:
+            index = self._cached(org_id, data_version)
+            if index is None:
+                version = self._key(org_id, data_version)
+                result = await db.execute(
+                    select(Department.id, Department.parent_id)
+                    .where(Department.org_id == org_id)
+                )
+                index = HierarchyIndex(result.tuples().all())
+                self._indexes[org_id] = (version, index)
+                self._indexes.move_to_end(org_id)
+                while len(self._indexes) > self.max_orgs:
+                    evicted, _ = self._indexes.popitem(last=False)
+                    self._locks.pop(evicted, None)
+                logger.info(f"Hierarchy index of org {org_id} rebuilt for "
+                            f"{len(index)} departments")
+        return index
+
+
+hierarchy_index = HierarchyIndexCache()
+
+
+def mark_hierarchy_changed(db: AsyncSession, org_id: int):
+    """Помечает сессию: после коммита индекс организации будет перестроен."""
+    db.info.setdefault(_CHANGED_KEY, set()).add(org_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for org_id in session.info.pop(_CHANGED_KEY, ()):
+        hierarchy_index.invalidate(org_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_after_rollback(session):
+    session.info.pop(_CHANGED_KEY, None)
+
+
+def resolve_lca(index: HierarchyIndex,
+                a: tuple[int, Optional[int]], b: tuple[int, Optional[int]]):
+    """Считает LCA и расстояние для пары узлов оргструктуры.
+
+    Узел задаётся как (department_id, employee_id): сотрудник считается
+    листом на уровень ниже своего подразделения, для подразделения
+    employee_id равен None.
+    Возвращает (lca_department_id, distance) или (None, None).
+    """
+    (dept_a, emp_a), (dept_b, emp_b) = a, b
+    lca_id = index.lca(dept_a, dept_b)
+    if lca_id is None:
+        return None, None
+    if emp_a is not None and emp_a == emp_b:
+        return lca_id, 0
+    distance = (index.depth[dept_a] + (emp_a is not None)
+                + index.depth[dept_b] + (emp_b is not None)
+                - 2 * index.depth[lca_id])
+    return lca_id, distance
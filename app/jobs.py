@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from contextlib import suppress
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+
+from app.config import get_settings
+from app.crud import department as dept_crud
+from app.crud import job as job_crud
+from app.database import get_database
+from app.dialects import advisory_unlock, try_advisory_lock
+
+logger = logging.getLogger(__name__)
+
+# Пространство ключей advisory-блокировок выполняемых задач
+JOBS_LOCK_SPACE = 0x4A42
+
+
+async def _count_delete_department(db, org_id: int, params: dict) -> int:
+    if params["mode"] == "reassign":
+        return await dept_crud.count_reassign_rows(db, org_id,
+                                                   params["department_id"])
+    return await dept_crud.count_subtree_rows(db, org_id,
+                                              params["department_id"])
+
+
+async def _delete_department_step(db, org_id: int, params: dict,
+                                  chunk_size: int):
+    if params["mode"] == "reassign":
+        return await dept_crud.reassign_chunk(
+            db, org_id, params["department_id"],
+            params["reassign_to_department_id"], chunk_size
+        )
+    return await dept_crud.delete_subtree_chunk(
+        db, org_id, params["department_id"], chunk_size
+    )
+
+
+# kind -> (оценка объёма, шаг; шаг возвращает (обработано, завершено))
+JOB_KINDS = {
+    job_crud.DELETE_DEPARTMENT: (_count_delete_department,
+                                 _delete_department_step),
+}
+
+
+async def execute_job(job_id: int, session_factory):
+    """Выполняет задачу порциями, каждая порция — отдельная транзакция.
+
+    Прогресс задачи обновляется в той же транзакции, что и порция,
+    поэтому после перезапуска выполнение продолжается с того же места.
+    """
+    settings = get_settings()
+    async with session_factory() as db:
+        job = await job_crud.get_job(db, job_id)
+        if job is None or job.status in (job_crud.DONE, job_crud.FAILED):
+            return
+        try:
+            count, step = JOB_KINDS[job.kind]
+            if job.total is None:
+                job.total = await count(db, job.org_id, job.params)
+        except Exception as e:
+            # Иначе задача останется невыполненной и упадёт так же
+            # после перезапуска
+            logger.exception(f"Job {job_id} could not start")
+            await _fail_after_error(db, job, repr(e))
+            return
+        job.status = job_crud.RUNNING
+        await db.commit()
+        logger.info(f"Job {job_id} started, ~{job.total} rows")
+
+        retries = 0
+        while True:
+            try:
+                processed, finished = await step(db, job.org_id, job.params,
+                                                 settings.JOB_CHUNK_SIZE)
+                job.processed += processed
+                if finished:
+                    job.status = job_crud.DONE
+                await db.commit()
+                retries = 0
+            except DBAPIError as e:
+                # Взаимоблокировки и таймауты блокировок с живым трафиком
+                await db.rollback()
+                await db.refresh(job)
+                retries += 1
+                if retries <= settings.JOB_MAX_RETRIES:
+                    logger.warning(f"Job {job_id} chunk failed, "
+                                   f"retry {retries}: {e.orig}")
+                    await asyncio.sleep(0.1 * retries)
+                    continue
+                await _fail_job(db, job, str(e.orig))
+                return
+            except ValueError as e:
+                await _fail_after_error(db, job, str(e))
+                return
+            except Exception as e:
+                logger.exception(f"Job {job_id} chunk crashed")
+                await _fail_after_error(db, job, repr(e))
+                return
+
+            if finished:
+                logger.info(f"Job {job_id} done, {job.processed} rows")
+                return
+            # Отдаём цикл событий обработчикам запросов между порциями
+            await asyncio.sleep(settings.JOB_CHUNK_PAUSE_SECONDS)
+
+
+async def _fail_job(db, job, error: str):
+    job.status = job_crud.FAILED
+    job.error = error
+    await db.commit()
+    logger.error(f"Job {job.id} failed: {error}")
+
+
+async def _fail_after_error(db, job, error: str):
+    await db.rollback()
+    await db.refresh(job)
+    await _fail_job(db, job, error)
+
+
+async def run_job(job_id: int):
+    """Выполняет задачу, если её не выполняет другой процесс.
+
+    Сессионная advisory-блокировка держится на отдельном соединении
+    и снимается сама, если процесс упадёт.
+    """
+    database = get_database()
+    async with database.engine.connect() as conn:
+        acquired = await conn.scalar(
+            select(try_advisory_lock(JOBS_LOCK_SPACE, job_id))
+        )
+        await conn.commit()
+        if not acquired:
+            logger.info(f"Job {job_id} is running in another process")
+            return
+        try:
+            await execute_job(job_id, database.session_factory)
+        finally:
+            await conn.execute(
+                select(advisory_unlock(JOBS_LOCK_SPACE, job_id))
+            )
+            await conn.commit()
+
+
+class JobWorker:
+    """Очередь задач процесса; задачи выполняются по одной."""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, job_id: int):
+        if self._queue is None:
+            logger.warning(f"Job worker is not running, job {job_id} "
+                           f"will be picked up on next start")
+            return
+        self._queue.put_nowait(job_id)
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        async with get_database().session_factory() as db:
+            for job_id in await job_crud.get_unfinished_job_ids(db):
+                self._queue.put_nowait(job_id)
+        if self._queue.qsize():
+            logger.info(f"Resuming {self._queue.qsize()} unfinished jobs")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+        self._task = None
+        self._queue = None
+
+    async def _run(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await run_job(job_id)
+            except Exception:
+                logger.exception(f"Job {job_id} crashed")
+
+
+job_worker = JobWorker()
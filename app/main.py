@@ -1,9 +1,24 @@
+import asyncio
 import logging
 import sys
-from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from contextlib import asynccontextmanager, suppress
+from datetime import datetime, timedelta, timezone
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import departments, employees
+from sqlalchemy.exc import DBAPIError
+from app.config import get_settings
+from app.crud import change as change_crud
+from app.database import get_database
+from app.compression import CompressionMiddleware
+from app.deadlines import CancelOnDisconnectMiddleware, db_error_handler
+from app.deps import admit_request
+from app.startup import (check_schema_version, create_sqlite_schema,
+                         prewarm_pool)
+from app.jobs import job_worker
+from app.profiling import ProfilingMiddleware
+from app.rpc.server import start_grpc_server, stop_grpc_server
+from app.routers import (admin, analytics, changes, departments, employees,
+                         jobs, metrics, organizations)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,17 +28,60 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def compact_change_log_periodically():
+    settings = get_settings()
+    while True:
+        await asyncio.sleep(settings.CHANGE_LOG_COMPACTION_INTERVAL_SECONDS)
+        now = datetime.now(timezone.utc)
+        try:
+            async with get_database().session_factory() as db:
+                await change_crud.compact_change_log(
+                    db,
+                    compact_before=now - timedelta(
+                        hours=settings.CHANGE_LOG_COMPACT_AFTER_HOURS),
+                    purge_before=now - timedelta(
+                        days=settings.CHANGE_LOG_RETENTION_DAYS),
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("Change log compaction failed")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting up...")
+    settings = get_settings()
+    database = get_database()
+    if database.engine.dialect.name == "sqlite":
+        await create_sqlite_schema(database.engine)
+    else:
+        await check_schema_version(database.engine, settings.SCHEMA_CHECK)
+    if settings.DB_POOL_PREWARM:
+        await prewarm_pool(database.engine, settings.DB_POOL_PREWARM)
+    compaction = asyncio.create_task(compact_change_log_periodically())
+    await job_worker.start()
+    grpc_server = None
+    if settings.GRPC_ENABLED:
+        grpc_server = await start_grpc_server(
+            settings.SERVER_HOST, settings.GRPC_PORT, database.session_factory
+        )
     yield
+    await stop_grpc_server(grpc_server)
+    await job_worker.stop()
+    compaction.cancel()
+    with suppress(asyncio.CancelledError):
+        await compaction
+    await database.dispose()
     logger.info("Shutting down...")
 
 
 app = FastAPI(
     title="Org Structure API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Глобальная зависимость разрешается раньше get_db и освобождается
+    # после неё, поэтому слот допуска покрывает всё время работы с БД
+    dependencies=[Depends(admit_request)],
 )
 
 app.add_middleware(
@@ -34,8 +92,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(organizations.router)
 app.include_router(departments.router)
 app.include_router(employees.router)
+app.include_router(analytics.router)
+app.include_router(changes.router)
+app.include_router(jobs.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
+
+app.add_exception_handler(DBAPIError, db_error_handler)
 
 
 @app.middleware("http")
@@ -46,6 +112,16 @@ async def log_requests(request, call_next):
     return response
 
 
+# Сжатие видит готовые ответы всех обработчиков и middleware выше
+app.add_middleware(CompressionMiddleware)
+
+# Профиль охватывает все middleware, кроме отмены по отключению клиента
+app.add_middleware(ProfilingMiddleware)
+
+# Добавляется последним, чтобы оборачивать все остальные middleware
+app.add_middleware(CancelOnDisconnectMiddleware)
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from app.server import main
+    main()
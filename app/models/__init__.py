@@ -1,2 +1,6 @@
+from .organization import Organization, DEFAULT_ORG_ID, ORG_PARTITIONS
 from .department import Department
 from .employee import Employee
+from .change import ChangeLogEntry, ChangeFeedState
+from .job import Job
+from .history import DepartmentHistory, EmployeeHistory
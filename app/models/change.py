@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import (BigInteger, Column, ForeignKey, Index,
+                        Integer, JSON, PrimaryKeyConstraint, String)
+
+from app.database import Base
+from app.dialects import AwareDateTime
+from app.models.organization import partition_by_org
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
+class ChangeLogEntry(Base):
+    __tablename__ = "change_log"
+
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    # Общая последовательность: курсор ленты сравним между организациями
+    id = Column(BigInteger, autoincrement=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)
+    data = Column(JSON)
+    # Время вставки строки, а не начала транзакции: по нему читатель
+    # ленты решает, можно ли пропустить дыру в последовательности id
+    recorded_at = Column(AwareDateTime,
+                         nullable=False,
+                         default=_utcnow)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("org_id", "id"),
+        Index("ix_change_log_entity_entity_id", "entity", "entity_id", "id"),
+        Index("ix_change_log_recorded_at", "recorded_at"),
+        # Проверка дыр в ленте смотрит на id всех организаций
+        Index("ix_change_log_id", "id"),
+        {"postgresql_partition_by": "HASH (org_id)"},
+    )
+
+
+partition_by_org(ChangeLogEntry.__table__)
+
+
+class ChangeFeedState(Base):
+    __tablename__ = "change_feed_state"
+
+    org_id = Column(Integer, ForeignKey("organizations.id"), primary_key=True)
+    # Все записи организации с id <= purged_through могли быть удалены
+    # по сроку хранения
+    purged_through = Column(BigInteger, nullable=False, default=0)
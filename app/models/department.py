@@ -1,20 +1,50 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import (Column, Integer, String, ForeignKey,
+                        ForeignKeyConstraint, Index,
+                        PrimaryKeyConstraint)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.database import Base
+from app.dialects import AwareDateTime
+from app.models.organization import partition_by_org
 
 
 class Department(Base):
     __tablename__ = "departments"
 
-    id = Column(Integer, primary_key=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    # id выдаётся общей последовательностью и уникален во всех организациях
+    id = Column(Integer, autoincrement=True)
     name = Column(String, nullable=False)
-    parent_id = Column(Integer, ForeignKey("departments.id"))
+    parent_id = Column(Integer)
 
-    # Отношения (используем строки)
-    parent = relationship("Department", remote_side=[id], backref="children")
+    # Отношения (используем строки); id глобально уникален,
+    # поэтому для загрузки связей org_id в условии не нужен
+    parent = relationship("Department",
+                          primaryjoin="Department.parent_id == Department.id",
+                          foreign_keys=[parent_id],
+                          remote_side=[id],
+                          backref="children")
     employees = relationship("Employee",
+                             primaryjoin="Department.id == "
+                                         "Employee.department_id",
+                             foreign_keys="Employee.department_id",
                              back_populates="department",
                              cascade="all, delete-orphan")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(AwareDateTime, server_default=func.now())
+
+    __table_args__ = (
+        # Ключ секционирования обязан входить в первичный ключ
+        PrimaryKeyConstraint("org_id", "id"),
+        # Родитель всегда в той же организации
+        ForeignKeyConstraint(["org_id", "parent_id"],
+                             ["departments.org_id", "departments.id"]),
+        # Дети в порядке (name, id) для keyset-пагинации; created_at
+        # включён, чтобы страница читалась только из индекса
+        Index("ix_departments_parent_name", "org_id", "parent_id", "name",
+              "id", postgresql_include=["created_at"]),
+        {"postgresql_partition_by": "HASH (org_id)"},
+    )
+
+
+partition_by_org(Department.__table__)
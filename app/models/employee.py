@@ -1,20 +1,43 @@
-from sqlalchemy import Column, DateTime, Integer, String, Date, ForeignKey
+from sqlalchemy import (Column, Integer, String, Date, ForeignKey,
+                        ForeignKeyConstraint, Index, PrimaryKeyConstraint)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.database import Base
+from app.dialects import AwareDateTime
+from app.models.organization import partition_by_org
 
 
 class Employee(Base):
     __tablename__ = "employees"
 
-    id = Column(Integer, primary_key=True)
-    department_id = Column(Integer,
-                           ForeignKey("departments.id", ondelete="CASCADE"),
-                           nullable=False)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    id = Column(Integer, autoincrement=True)
+    department_id = Column(Integer, nullable=False)
     full_name = Column(String, nullable=False)
     position = Column(String, nullable=False)
     hired_at = Column(Date)
 
-    department = relationship("Department", back_populates="employees")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    department = relationship("Department",
+                              primaryjoin="Department.id == "
+                                          "Employee.department_id",
+                              foreign_keys=[department_id],
+                              back_populates="employees")
+    created_at = Column(AwareDateTime, server_default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("org_id", "id"),
+        ForeignKeyConstraint(["org_id", "department_id"],
+                             ["departments.org_id", "departments.id"],
+                             ondelete="CASCADE"),
+        Index("ix_employees_department_id_created_at",
+              "org_id", "department_id", "created_at", "id"),
+        # Покрывающий индекс аналитики: агрегаты по должности и дате найма
+        # считаются index-only scan по организации или поддереву
+        Index("ix_employees_analytics", "org_id", "department_id",
+              postgresql_include=["position", "hired_at"]),
+        {"postgresql_partition_by": "HASH (org_id)"},
+    )
+
+
+partition_by_org(Employee.__table__)
@@ -0,0 +1,102 @@
+from sqlalchemy import (BigInteger, Column, Date, ForeignKey, Index,
+                        Integer, PrimaryKeyConstraint, String, func,
+                        literal_column)
+
+from app.database import Base
+from app.dialects import AwareDateTime
+from app.models.organization import partition_by_org
+
+
+def key_range(column):
+    """Точечный диапазон [key, key] для GiST-индекса вместе с интервалом.
+
+    Без расширения btree_gist GiST не индексирует обычные integer,
+    а диапазоны — индексирует, и условие «диапазон содержит id» выбирает
+    ровно строки с этим id. Аргументы выражения встроены в SQL, чтобы
+    запрос совпадал с выражением индекса и в подготовленных планах.
+    """
+    return func.int4range(column, column, literal_column("'[]'"))
+
+
+def valid_range(model):
+    """Интервал действия версии [valid_from, valid_to)."""
+    return func.tstzrange(model.valid_from, model.valid_to)
+
+
+class DepartmentHistory(Base):
+    """Версии подразделений; valid_to IS NULL у текущей версии."""
+    __tablename__ = "department_history"
+
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    version_id = Column(BigInteger, autoincrement=True)
+    id = Column(Integer, nullable=False)
+    name = Column(String, nullable=False)
+    parent_id = Column(Integer)
+    created_at = Column(AwareDateTime)
+    valid_from = Column(AwareDateTime, nullable=False)
+    valid_to = Column(AwareDateTime)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("org_id", "version_id"),
+        # По ней закрывается текущая версия при изменении
+        Index("ix_department_history_current", "org_id", "id", unique=True,
+              postgresql_where=valid_to.is_(None),
+              sqlite_where=valid_to.is_(None)),
+        {"postgresql_partition_by": "HASH (org_id)"},
+    )
+
+
+class EmployeeHistory(Base):
+    """Версии сотрудников, включая их принадлежность подразделению."""
+    __tablename__ = "employee_history"
+
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    version_id = Column(BigInteger, autoincrement=True)
+    id = Column(Integer, nullable=False)
+    department_id = Column(Integer, nullable=False)
+    full_name = Column(String, nullable=False)
+    position = Column(String, nullable=False)
+    hired_at = Column(Date)
+    created_at = Column(AwareDateTime)
+    valid_from = Column(AwareDateTime, nullable=False)
+    valid_to = Column(AwareDateTime)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("org_id", "version_id"),
+        Index("ix_employee_history_current", "org_id", "id", unique=True,
+              postgresql_where=valid_to.is_(None),
+              sqlite_where=valid_to.is_(None)),
+        {"postgresql_partition_by": "HASH (org_id)"},
+    )
+
+
+def parent_key_range():
+    # У корней parent_id IS NULL, а точечный диапазон от NULL бесконечен;
+    # 0 не выдаётся как id, поэтому при поиске детей корни не находятся
+    return key_range(func.coalesce(DepartmentHistory.parent_id,
+                                   literal_column("0")))
+
+
+Index("ix_department_history_id_valid",
+      key_range(DepartmentHistory.id), valid_range(DepartmentHistory),
+      postgresql_using="gist").ddl_if(dialect="postgresql")
+Index("ix_department_history_parent_valid",
+      parent_key_range(), valid_range(DepartmentHistory),
+      postgresql_using="gist").ddl_if(dialect="postgresql")
+Index("ix_employee_history_department_valid",
+      key_range(EmployeeHistory.department_id), valid_range(EmployeeHistory),
+      postgresql_using="gist").ddl_if(dialect="postgresql")
+
+# В SQLite нет диапазонных типов: чтения на момент времени идут
+# по обычным индексам ключа и начала версии
+Index("ix_department_history_id_from", DepartmentHistory.org_id,
+      DepartmentHistory.id, DepartmentHistory.valid_from).ddl_if(dialect="sqlite")
+Index("ix_department_history_parent_from", DepartmentHistory.org_id,
+      DepartmentHistory.parent_id,
+      DepartmentHistory.valid_from).ddl_if(dialect="sqlite")
+Index("ix_employee_history_department_from", EmployeeHistory.org_id,
+      EmployeeHistory.department_id,
+      EmployeeHistory.valid_from).ddl_if(dialect="sqlite")
+
+partition_by_org(DepartmentHistory.__table__)
+partition_by_org(EmployeeHistory.__table__)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, JSON, String
+from sqlalchemy.sql import func
+
+from app.database import Base
+from app.dialects import AwareDateTime
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    org_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    kind = Column(String, nullable=False)
+    params = Column(JSON, nullable=False)
+    # pending -> running -> done | failed
+    status = Column(String, nullable=False, default="pending")
+    total = Column(Integer)
+    processed = Column(Integer, nullable=False, default=0)
+    error = Column(String)
+    created_at = Column(AwareDateTime, server_default=func.now())
+    updated_at = Column(AwareDateTime,
+                        server_default=func.now(),
+                        onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_jobs_status", "status"),
+    )
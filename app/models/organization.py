@@ -0,0 +1,56 @@
+from sqlalchemy import BigInteger, Column, DDL, Integer, String, event, text
+from sqlalchemy.sql import func
+
+from app.database import Base
+from app.dialects import AwareDateTime
+
+# Организация, в которую попадают данные без явного X-Org-Id
+DEFAULT_ORG_ID = 1
+
+# Число хэш-секций у таблиц, секционированных по org_id
+ORG_PARTITIONS = 16
+
+
+class Organization(Base):
+    __tablename__ = "organizations"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    created_at = Column(AwareDateTime, server_default=func.now())
+    # Версия данных организации для кэшей производных результатов:
+    # увеличивается в каждой транзакции, изменившей её подразделения
+    # или сотрудников (см. app.crud.change)
+    data_version = Column(BigInteger, nullable=False, server_default="0")
+
+
+event.listen(
+    Organization.__table__, "after_create",
+    DDL(f"INSERT INTO organizations (id, name) "
+        f"VALUES ({DEFAULT_ORG_ID}, 'default')")
+)
+event.listen(
+    Organization.__table__, "after_create",
+    DDL("SELECT setval('organizations_id_seq', "
+        "(SELECT max(id) FROM organizations))").execute_if(
+        dialect="postgresql")
+)
+
+
+def partition_by_org(table):
+    """Создаёт хэш-секции по org_id вместе с таблицей.
+
+    Запрос с условием org_id = :org затрагивает одну секцию, а её индексы
+    содержат строки только части организаций.
+    """
+    def create_partitions(target, connection, **kw):
+        if connection.dialect.name != "postgresql":
+            return
+        for remainder in range(ORG_PARTITIONS):
+            connection.execute(text(
+                f"CREATE TABLE {target.name}_p{remainder} "
+                f"PARTITION OF {target.name} FOR VALUES "
+                f"WITH (MODULUS {ORG_PARTITIONS}, REMAINDER {remainder})"
+            ))
+
+    event.listen(table, "after_create", create_partitions)
+    return table
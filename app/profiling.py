@@ -0,0 +1,246 @@
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+from app.deadlines import route_key
+from app.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+profiles_recorded = counter(
+    "profiles_recorded_total",
+    "Запросы, выполненные под профилировщиком",
+    ("trigger",),
+)
+profiles_skipped = counter(
+    "profiles_skipped_total",
+    "Выбранные для профилирования запросы, пропущенные из-за уже идущего профиля",
+)
+
+# Отчёт профилируемого запроса; задачи, созданные внутри запроса,
+# наследуют его, поэтому SQL других запросов в отчёт не попадает
+_current: ContextVar[Optional["ProfileReport"]] = ContextVar(
+    "profile_report", default=None
+)
+
+
+def _frame_label(code) -> str:
+    path = "/".join(code.co_filename.split(os.sep)[-2:])
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+
+
+def _sql_label(statement: str) -> str:
+    # В свёрнутом формате ';' разделяет кадры
+    head = " ".join(statement.split()).replace(";", ",")
+    return f"[sql] {head[:80]}"
+
+
+class ProfileReport:
+    def __init__(self, method: str, path: str, trigger: str, interval: float):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.trigger = trigger
+        self.interval_ms = interval * 1000
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.stacks: Counter = Counter()
+        self.queries: list[dict] = []
+        # Запрос к БД, который сейчас ждёт профилируемый обработчик
+        self.sql_in_flight: Optional[str] = None
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    @property
+    def sql_ms(self) -> float:
+        return sum(query["duration_ms"] for query in self.queries)
+
+    def collapsed(self) -> str:
+        """Стеки в свёрнутом формате flamegraph.pl/speedscope: «a;b;c N»."""
+        return "".join(f"{stack} {count}\n"
+                       for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Последние отчёты профилирования в памяти процесса."""
+
+    def __init__(self):
+        self._reports: OrderedDict[str, ProfileReport] = OrderedDict()
+
+    def add(self, report: ProfileReport):
+        self._reports[report.id] = report
+        while len(self._reports) > get_settings().PROFILE_REPORTS_KEPT:
+            self._reports.popitem(last=False)
+
+    def get(self, report_id: str) -> Optional[ProfileReport]:
+        return self._reports.get(report_id)
+
+    def list(self) -> list[ProfileReport]:
+        return list(reversed(self._reports.values()))
+
+    def clear(self):
+        self._reports.clear()
+
+
+profile_store = ProfileStore()
+
+
+class _Sampler(threading.Thread):
+    """Снимает стек потока цикла событий каждые interval секунд.
+
+    Стек берётся из sys._current_frames() и содержит код, который цикл
+    выполняет в момент снимка, — в том числе чужих запросов; пока
+    профилируемый запрос ждёт БД, к стеку добавляется кадр [sql].
+    """
+
+    def __init__(self, report: ProfileReport, thread_id: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.report = report
+        self.thread_id = thread_id
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.reverse()
+            statement = self.report.sql_in_flight
+            if statement is not None:
+                labels.append(_sql_label(statement))
+            if labels:
+                self.report.stacks[";".join(labels)] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    report = _current.get()
+    if report is not None:
+        report.sql_in_flight = statement
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    report = _current.get()
+    started = getattr(context, "_profile_started", None)
+    if report is None or started is None:
+        return
+    report.sql_in_flight = None
+    report.queries.append({
+        "statement": statement,
+        "duration_ms": (time.perf_counter() - started) * 1000,
+        "rowcount": cursor.rowcount,
+        "executemany": executemany,
+    })
+
+
+_SQL_EVENTS = (("before_cursor_execute", _before_cursor_execute),
+               ("after_cursor_execute", _after_cursor_execute))
+
+# Профиль снимает стек всего потока, поэтому одновременно идёт только один
+_active = False
+
+
+def _choose_trigger(scope) -> Optional[str]:
+    settings = get_settings()
+    if settings.ADMIN_TOKEN:
+        token = settings.ADMIN_TOKEN.encode()
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER and hmac.compare_digest(value, token):
+                return "header"
+    if settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+class ProfilingMiddleware:
+    """Выполняет выбранный запрос под семплирующим профилировщиком.
+
+    Запрос выбирается заголовком X-Profile со значением ADMIN_TOKEN
+    или случайно с вероятностью PROFILE_SAMPLE_RATE. Отчёт — стеки
+    и выполненные запросом SQL с длительностями — сохраняется
+    в profile_store, его ID возвращается в заголовке X-Profile-Id.
+    Для остальных запросов профилировщик и обработчики событий
+    SQLAlchemy не установлены.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _active
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trigger = _choose_trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        if _active:
+            profiles_skipped.inc()
+            await self.app(scope, receive, send)
+            return
+
+        _active = True
+        interval = get_settings().PROFILE_INTERVAL_MS / 1000
+        report = ProfileReport(scope["method"], scope["path"], trigger, interval)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                report.status = message["status"]
+                if trigger == "header":
+                    message = dict(message, headers=[
+                        *message.get("headers", []),
+                        (PROFILE_ID_HEADER, report.id.encode()),
+                    ])
+            await send(message)
+
+        for name, listener in _SQL_EVENTS:
+            event.listen(Engine, name, listener)
+        sampler = _Sampler(report, threading.get_ident(), interval)
+        token = _current.set(report)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            report.duration_ms = (time.perf_counter() - started) * 1000
+            sampler.stop()
+            _current.reset(token)
+            for name, listener in _SQL_EVENTS:
+                event.remove(Engine, name, listener)
+            _active = False
+            report.route = route_key(scope)
+            profile_store.add(report)
+            profiles_recorded.inc(trigger=trigger)
+            logger.info(f"Profiled {report.method} {report.path}: "
+                        f"{report.duration_ms:.1f} ms, {report.samples} samples, "
+                        f"{len(report.queries)} queries, report {report.id}")
@@ -0,0 +1,101 @@
+import logging
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.deps import require_admin
+from app.profiling import profile_store
+from app.schemas import profile as profile_schema
+from app.schemas import slow_query as slow_query_schema
+from app.slow_queries import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+def _get_report(id: str):
+    report = profile_store.get(id)
+    if report is None:
+        logger.warning(f"Profile {id} not found")
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
+
+
+@router.get(
+    "/admin/profiles",
+    response_model=List[profile_schema.ProfileSummary],
+    summary="Отчёты профилирования",
+    description="""
+    Последние отчёты профилирования этого процесса, новые первыми.
+    Запрос профилируется с заголовком X-Profile: <ADMIN_TOKEN> (ID отчёта
+    возвращается в X-Profile-Id) или по случайной выборке с долей
+    PROFILE_SAMPLE_RATE. При нескольких воркерах у каждого свои отчёты.
+    """,
+    responses={
+        200: {"description": "Успешный ответ"},
+        403: {"description": "Нет или неверный X-Admin-Token"}
+    }
+)
+async def list_profiles_endpoint():
+    return profile_store.list()
+
+
+@router.get(
+    "/admin/profiles/{id}",
+    response_model=profile_schema.ProfileReport,
+    summary="Отчёт профилирования",
+    description="""
+    Стеки цикла событий, снятые во время запроса, и выполненные им
+    SQL-запросы с длительностями. Стеки содержат весь код, который цикл
+    выполнял в момент снимка; пока запрос ждёт БД, последний кадр —
+    [sql] с началом текста запроса.
+    """,
+    responses={
+        200: {"description": "Успешный ответ"},
+        403: {"description": "Нет или неверный X-Admin-Token"},
+        404: {"description": "Отчёт не найден"}
+    }
+)
+async def get_profile_endpoint(id: str):
+    report = _get_report(id)
+    return profile_schema.ProfileReport.model_validate(
+        {**vars(report), "samples": report.samples, "sql_ms": report.sql_ms}
+    )
+
+
+@router.get(
+    "/admin/profiles/{id}/collapsed",
+    response_class=PlainTextResponse,
+    summary="Стеки отчёта для flame graph",
+    description="Стеки в свёрнутом формате «кадр;кадр;кадр N» для flamegraph.pl, speedscope или inferno.",
+    responses={
+        200: {"description": "Успешный ответ"},
+        403: {"description": "Нет или неверный X-Admin-Token"},
+        404: {"description": "Отчёт не найден"}
+    }
+)
+async def get_profile_collapsed_endpoint(id: str):
+    return _get_report(id).collapsed()
+
+
+@router.get(
+    "/admin/slow-queries",
+    response_model=List[slow_query_schema.SlowQueryRead],
+    summary="Медленные SQL-запросы",
+    description="""
+    Последние SQL-запросы этого процесса дольше SLOW_QUERY_MS, новые первыми:
+    текст без литералов, параметры, длительность и маршрут. Для доли
+    SLOW_QUERY_EXPLAIN_RATE чтений после записи в отдельном соединении
+    выполняется EXPLAIN (ANALYZE, BUFFERS), план появляется в поле explain.
+    """,
+    responses={
+        200: {"description": "Успешный ответ"},
+        403: {"description": "Нет или неверный X-Admin-Token"}
+    }
+)
+async def list_slow_queries_endpoint(
+    limit: int = Query(100, ge=1, le=1000, description="Сколько записей вернуть"),
+):
+    return slow_query_log.list(limit)
@@ -0,0 +1,112 @@
+import logging
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import VersionedCache
+from app.crud import analytics as analytics_crud
+from app.crud import change as change_crud
+from app.crud import department as dept_crud
+from app.schemas import analytics as analytics_schema
+from app.deps import get_db, get_org_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+analytics_cache = VersionedCache()
+
+SCOPE_DESCRIPTION = "Корень поддерева; без параметра — вся организация"
+
+
+def _today() -> date:
+    return date.today()
+
+
+async def _cached_report(db: AsyncSession, org_id: int, report,
+                         department_id: Optional[int], *args):
+    """Отчёт из кэша или расчёт report(db, org_id, department_id, *args).
+
+    args входят в ключ: отчёт, зависящий от даты, получает её здесь,
+    и результат прошлого дня не отдаётся после его окончания.
+    """
+    # Версия читается до расчёта: если данные изменятся между запросами,
+    # результат окажется новее версии и будет пересчитан при следующем чтении
+    version = await change_crud.get_change_version(db, org_id)
+    key = (org_id, report.__name__, department_id, *args)
+    cached = analytics_cache.get(key, version)
+    if cached is not None:
+        return cached
+
+    if department_id is not None and not await dept_crud.get_department(
+            db, org_id, department_id):
+        logger.warning(f"Department {department_id} not found")
+        raise HTTPException(status_code=404, detail="Department not found")
+    result = await report(db, org_id, department_id, *args)
+    analytics_cache.put(key, version, result)
+    return result
+
+
+@router.get(
+    "/analytics/headcount",
+    response_model=analytics_schema.HeadcountReport,
+    summary="Численность по должностям",
+    description="Считает сотрудников по должностям во всей организации или в поддереве подразделения.",
+    responses={
+        200: {"description": "Успешный ответ"},
+        404: {"description": "Подразделение не найдено"}
+    }
+)
+async def headcount_endpoint(
+    department_id: Optional[int] = Query(None, description=SCOPE_DESCRIPTION),
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"GET /analytics/headcount called with department_id={department_id}")
+    return await _cached_report(db, org_id, analytics_crud.headcount_by_position,
+                                department_id)
+
+
+@router.get(
+    "/analytics/hire-cohorts",
+    response_model=analytics_schema.HireCohortReport,
+    summary="Когорты найма по месяцам",
+    description="Число нанятых сотрудников по месяцам даты найма. Сотрудники без даты найма не учитываются.",
+    responses={
+        200: {"description": "Успешный ответ"},
+        404: {"description": "Подразделение не найдено"}
+    }
+)
+async def hire_cohorts_endpoint(
+    department_id: Optional[int] = Query(None, description=SCOPE_DESCRIPTION),
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"GET /analytics/hire-cohorts called with department_id={department_id}")
+    return await _cached_report(db, org_id, analytics_crud.hire_cohorts,
+                                department_id)
+
+
+@router.get(
+    "/analytics/tenure",
+    response_model=analytics_schema.TenureReport,
+    summary="Средний стаж по поддеревьям",
+    description="""
+    Средний стаж сотрудников в днях по всей области и по каждой её ветви:
+    дочерним подразделениям department_id или корням организации.
+    """,
+    responses={
+        200: {"description": "Успешный ответ"},
+        404: {"description": "Подразделение не найдено"}
+    }
+)
+async def tenure_endpoint(
+    department_id: Optional[int] = Query(None, description=SCOPE_DESCRIPTION),
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"GET /analytics/tenure called with department_id={department_id}")
+    return await _cached_report(db, org_id, analytics_crud.tenure_by_subtree,
+                                department_id, _today())
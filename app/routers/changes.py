@@ -0,0 +1,69 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.crud import change as change_crud
+from app.schemas import change as change_schema
+from app.deps import get_db, get_org_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get(
+    "/changes",
+    response_model=change_schema.ChangeFeed,
+    summary="Лента изменений",
+    description="""
+    Возвращает изменения подразделений и сотрудников после курсора since
+    в порядке их записи. Для инкрементальной синхронизации передавайте
+    next_cursor из предыдущего ответа; since=0 возвращает всю сохранённую
+    историю (после компакции — последнее состояние каждой сущности),
+    причём записи не новее горизонта очистки приходят первой страницей
+    целиком, без учёта limit.
+    Если курсор старше сохранённой истории, ответ 410 содержит horizon
+    и next_cursor: после полной синхронизации продолжайте с next_cursor.
+    """,
+    responses={
+        200: {"description": "Успешный ответ"},
+        410: {"model": change_schema.ChangeFeedGone,
+              "description": "Курсор старше сохранённой истории, нужна полная синхронизация"}
+    }
+)
+async def get_changes_endpoint(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"GET /changes called with since={since}, limit={limit}")
+    horizon = await change_crud.get_change_horizon(db, org_id)
+    gap_grace = timedelta(seconds=get_settings().CHANGE_FEED_GAP_GRACE_SECONDS)
+    # since=0 — новый потребитель: очищенные удаления ему не нужны, а
+    # последние состояния сущностей ниже горизонта сохранены. Они отдаются
+    # одной страницей: курсор внутри них неотличим от устаревшего
+    if 0 < since < horizon:
+        logger.warning(f"Change cursor {since} is older than "
+                       f"retention horizon {horizon}")
+        head = await change_crud.get_change_head(
+            db, org_id, datetime.now(timezone.utc) - gap_grace
+        )
+        return JSONResponse(status_code=410, content={
+            "detail": "Cursor is older than retained change history, "
+                      "full resync required",
+            "horizon": horizon,
+            "next_cursor": head,
+        })
+
+    changes, has_more = await change_crud.get_changes(
+        db, org_id, since, limit, gap_grace,
+        through=horizon if since == 0 else 0
+    )
+    next_cursor = changes[-1].id if changes else since
+    return {"changes": changes, "next_cursor": next_cursor,
+            "has_more": has_more}
@@ -1,67 +1,312 @@
 import logging
+from datetime import datetime
+from functools import lru_cache
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 
+from app.cache import VersionedCache
+from app.compression import EncodedBody, render_json
+from app.config import get_settings
+from app.crud import change as change_crud
 from app.crud import department as dept_crud
+from app.crud import employee as emp_crud
+from app.crud import job as job_crud
 from app.schemas import department as dept_schema
-from app.deps import get_db
-from app.models import Department
+from app.schemas import hierarchy as hierarchy_schema
+from app.deps import get_db, get_org_id
+from app.hierarchy import hierarchy_index, resolve_lca
+from app.jobs import job_worker
+from app.singleflight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+AS_OF_DESCRIPTION = ("Момент времени (ISO 8601) для исторического снимка; "
+                     "без часового пояса — UTC")
 
-# Вспомогательная функция для построения дерева
-async def _build_tree(db: AsyncSession, dept_id: int, depth: int) -> dict:
-    stmt = select(Department).where(Department.id == dept_id).options(
-        selectinload(Department.employees),
-        selectinload(Department.children)
-    )
-    result = await db.execute(stmt)
-    dept = result.scalar_one_or_none()
-    if not dept:
+# Одновременные одинаковые чтения деревьев выполняются один раз
+tree_reads = SingleFlight("department_tree")
+batch_reads = SingleFlight("department_batch")
+
+
+@lru_cache
+def get_read_cache() -> VersionedCache:
+    """Сериализованные деревья со сжатыми вариантами по ключу чтения."""
+    return VersionedCache(max_entries=get_settings().TREE_CACHE_ENTRIES)
+
+
+async def _read_key(db: AsyncSession, org_id: int, *params) -> tuple:
+    """Ключ объединения чтений: параметры и версия данных организации.
+
+    Версия читается до присоединения к вычислению: запрос, пришедший
+    после коммита изменения, получает другой ключ и не дождётся
+    результата, прочитанного до этого изменения.
+    """
+    version = await change_crud.get_change_version(db, org_id)
+    return (org_id, *params, version)
+
+
+async def _encoded_read(flight: SingleFlight, key: tuple,
+                        compute) -> Optional[EncodedBody]:
+    """Результат чтения в виде готового JSON (None, если compute вернул None).
+
+    Чтения той же версии данных берут из кэша тело и его сжатые
+    варианты, не загружая, не сериализуя и не сжимая дерево заново.
+    Одновременные чтения объединяются через flight; лидер сохраняет тело
+    в кэш сразу после вычисления, поэтому ожидавшие его запросы
+    не сериализуют результат повторно.
+    """
+    *params, version = key
+    cache_key = (flight.name, *params)
+    read_cache = get_read_cache()
+    encoded = read_cache.get(cache_key, version)
+    if encoded is not None:
+        return encoded
+    result = await flight.do(key, compute)
+    if result is None:
         return None
+    encoded = read_cache.get(cache_key, version)
+    if encoded is None:
+        encoded = EncodedBody(render_json(result))
+        read_cache.put(cache_key, version, encoded)
+    return encoded
 
-    data = {
-        "id": dept.id,
-        "name": dept.name,
-        "parent_id": dept.parent_id,
-        "created_at": dept.created_at,
-        "employees": [],
-        "children": []
-    }
 
-    employees_sorted = sorted(dept.employees, key=lambda e: e.created_at)
-    data["employees"] = [
-        {
-            "id": e.id,
-            "department_id": e.department_id,
-            "full_name": e.full_name,
-            "position": e.position,
-            "hired_at": e.hired_at,
-            "created_at": e.created_at
-        }
-        for e in employees_sorted
-    ]
+CHILDREN_LIMIT_DESCRIPTION = ("Сколько первых детей (по name, id) раскрывать "
+                              "у каждого узла; остальные — через "
+                              "GET /departments/{id}/children")
+
 
+def _assemble_tree(dept_id: int, depth: int, nodes: dict, children: dict,
+                   employees: dict, child_counts: dict,
+                   include_employees: bool) -> dict:
+    data = dict(nodes[dept_id])
+    if include_employees:
+        data["employees"] = employees[dept_id]
+    data["children_count"] = child_counts.get(dept_id, 0)
+    data["children_cursor"] = None
     if depth > 1:
-        children = []
-        for child in dept.children:
-            child_tree = await _build_tree(db, child.id, depth - 1)
-            if child_tree:
-                children.append(child_tree)
-        data["children"] = children
+        data["children"] = [
+            _assemble_tree(child_id, depth - 1, nodes, children,
+                           employees, child_counts, include_employees)
+            for child_id in children[dept_id]
+        ]
+        if data["children"] and len(data["children"]) < data["children_count"]:
+            last = data["children"][-1]
+            data["children_cursor"] = dept_crud.encode_children_cursor(
+                last["name"], last["id"]
+            )
     else:
         data["children"] = []
-
     return data
 
 
+def _tree_response(tree: dict) -> dict:
+    return {
+        "department": {
+            "id": tree["id"],
+            "name": tree["name"],
+            "parent_id": tree["parent_id"],
+            "created_at": tree["created_at"]
+        },
+        "employees": tree.get("employees", []),
+        "children": tree["children"],
+        "children_count": tree["children_count"],
+        "children_cursor": tree["children_cursor"]
+    }
+
+
+@router.get(
+    "/departments/batch",
+    summary="Получить несколько подразделений с деревьями",
+    description="""
+    Пакетный вариант GET /departments/{id}: принимает список ids
+    и общие параметры depth и include_employees.
+    Все деревья загружаются несколькими запросами с IN по уровням,
+    пересекающиеся поддеревья читаются один раз. Как и в одиночном
+    запросе, у каждого узла раскрываются первые children_limit детей.
+    Возвращает словарь деревьев по id и список ненайденных id.
+    """,
+    responses={
+        200: {
+            "description": "Успешный ответ",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "departments": {
+                            "1": {
+                                "department": {"id": 1, "name": "IT",
+                                               "parent_id": None,
+                                               "created_at": "2023-01-01T00:00:00"},
+                                "employees": [],
+                                "children": [],
+                                "children_count": 0,
+                                "children_cursor": None
+                            }
+                        },
+                        "not_found": [42]
+                    }
+                }
+            }
+        },
+        422: {"description": "Ошибка валидации входных данных"}
+    }
+)
+async def get_departments_batch_endpoint(
+    request: Request,
+    ids: List[int] = Query(..., min_length=1, max_length=500),
+    depth: int = Query(1, ge=1, le=5),
+    include_employees: bool = True,
+    as_of: Optional[datetime] = Query(None, description=AS_OF_DESCRIPTION),
+    children_limit: int = Query(100, ge=1, le=1000,
+                                description=CHILDREN_LIMIT_DESCRIPTION),
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    unique_ids = list(dict.fromkeys(ids))
+    logger.info(f"GET /departments/batch called for {len(unique_ids)} ids "
+                f"with depth={depth}, include_employees={include_employees}, "
+                f"as_of={as_of}, children_limit={children_limit}")
+
+    async def read_batch():
+        nodes, children, employees, child_counts = (
+            await dept_crud.load_department_forest(
+                db, org_id, unique_ids, depth, include_employees, as_of,
+                children_limit
+            )
+        )
+        departments = {}
+        not_found = []
+        for dept_id in unique_ids:
+            if dept_id not in nodes:
+                not_found.append(dept_id)
+                continue
+            tree = _assemble_tree(dept_id, depth, nodes, children,
+                                  employees, child_counts, include_employees)
+            departments[dept_id] = _tree_response(tree)
+        logger.info(f"Batch retrieved {len(departments)} departments, "
+                    f"{len(not_found)} not found")
+        return {"departments": departments, "not_found": not_found}
+
+    key = await _read_key(db, org_id, tuple(unique_ids), depth,
+                          include_employees, as_of, children_limit)
+    encoded = await _encoded_read(batch_reads, key, read_batch)
+    return await encoded.response(request.headers.get("accept-encoding"))
+
+
+@router.get(
+    "/departments/paths",
+    summary="Получить цепочки предков нескольких подразделений",
+    description="""
+    Пакетный вариант GET /departments/{id}/path: для каждого id
+    возвращает цепочку подразделений от корня до него самого.
+    Все цепочки читаются одним рекурсивным запросом.
+    """,
+    responses={
+        200: {"description": "Успешный ответ"},
+        422: {"description": "Ошибка валидации входных данных"}
+    }
+)
+async def get_department_paths_endpoint(
+    ids: List[int] = Query(..., min_length=1, max_length=500),
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    unique_ids = list(dict.fromkeys(ids))
+    logger.info(f"GET /departments/paths called for {len(unique_ids)} ids")
+    chains = await dept_crud.get_ancestor_chains(db, org_id, unique_ids)
+    return {
+        "paths": {dept_id: chains[dept_id]
+                  for dept_id in unique_ids if dept_id in chains},
+        "not_found": [dept_id for dept_id in unique_ids
+                      if dept_id not in chains]
+    }
+
+
+@router.get(
+    "/departments/{id}/path",
+    response_model=List[dept_schema.DepartmentRead],
+    summary="Получить цепочку предков подразделения",
+    description="Возвращает подразделения от корня до указанного (включительно) одним рекурсивным запросом. Удобно для построения «хлебных крошек».",
+    responses={
+        200: {"description": "Успешный ответ"},
+        404: {"description": "Подразделение не найдено"}
+    }
+)
+async def get_department_path_endpoint(
+    id: int,
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"GET /departments/{id}/path called")
+    ancestors = await dept_crud.get_ancestors(db, org_id, id)
+    if not ancestors:
+        logger.warning(f"Department {id} not found")
+        raise HTTPException(status_code=404, detail="Department not found")
+    return ancestors
+
+
+@router.get(
+    "/departments/{id}/children",
+    response_model=dept_schema.DepartmentChildrenPage,
+    summary="Страница дочерних подразделений",
+    description="""
+    Возвращает прямых детей подразделения в порядке (name, id)
+    страницами по limit. Для следующей страницы передавайте next_cursor
+    из предыдущего ответа или children_cursor узла из дерева.
+    Страница читается по индексу с условием (name, id) > курсора,
+    поэтому стоимость не зависит от её номера.
+    """,
+    responses={
+        200: {"description": "Успешный ответ"},
+        400: {"description": "Некорректный курсор"},
+        404: {"description": "Подразделение не найдено"}
+    }
+)
+async def get_department_children_endpoint(
+    id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    as_of: Optional[datetime] = Query(None, description=AS_OF_DESCRIPTION),
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"GET /departments/{id}/children called with limit={limit}, "
+                f"cursor={cursor}, as_of={as_of}")
+    after = None
+    if cursor is not None:
+        try:
+            after = dept_crud.decode_children_cursor(cursor)
+        except ValueError as e:
+            logger.warning(f"Invalid children cursor {cursor!r}")
+            raise HTTPException(status_code=400, detail=str(e))
+
+    rows, counts, has_more = await dept_crud.get_children_page(
+        db, org_id, id, limit, after, as_of
+    )
+    if not rows:
+        nodes, _, _, _ = await dept_crud.load_department_forest(
+            db, org_id, [id], 1, False, as_of
+        )
+        if id not in nodes:
+            logger.warning(f"Department {id} not found")
+            raise HTTPException(status_code=404, detail="Department not found")
+
+    next_cursor = None
+    if has_more:
+        next_cursor = dept_crud.encode_children_cursor(rows[-1]["name"],
+                                                       rows[-1]["id"])
+    return {
+        "children": [{**row, "children_count": counts.get(row["id"], 0)}
+                     for row in rows],
+        "next_cursor": next_cursor
+    }
+
+
 @router.get(
     "/departments/{id}",
     summary="Получить подразделение с деревом",
@@ -70,6 +315,12 @@ async def _build_tree(db: AsyncSession, dept_id: int, depth: int) -> dict:
     и вложенныи дочерние подразделения
     до указанной глубины (depth).
     Можно исключить сотрудников через include_employees=false.
+    С as_of возвращает структуру и сотрудников на указанный момент.
+    У каждого узла раскрываются первые children_limit детей в порядке
+    (name, id); children_count — общее число детей, children_cursor —
+    курсор для догрузки остальных через GET /departments/{id}/children.
+    Повторные чтения той же версии данных отдаются готовым JSON,
+    сжатым по Accept-Encoding, без повторной загрузки дерева.
     """,
     responses={
         200: {
@@ -82,7 +333,9 @@ async def _build_tree(db: AsyncSession, dept_id: int, depth: int) -> dict:
                                        "created_at": "2023-01-01T00:00:00"},
                         "employees": [{"id": 10, "full_name": "Иван",
                                        "position": "Dev"}],
-                        "children": []
+                        "children": [],
+                        "children_count": 0,
+                        "children_cursor": None
                     }
                 }
             }
@@ -91,43 +344,45 @@ async def _build_tree(db: AsyncSession, dept_id: int, depth: int) -> dict:
     }
 )
 async def get_department_endpoint(
+    request: Request,
     id: int,
     depth: int = Query(1, ge=1, le=5),
     include_employees: bool = True,
+    as_of: Optional[datetime] = Query(None, description=AS_OF_DESCRIPTION),
+    children_limit: int = Query(100, ge=1, le=1000,
+                                description=CHILDREN_LIMIT_DESCRIPTION),
+    org_id: int = Depends(get_org_id),
     db: AsyncSession = Depends(get_db)
 ):
     logger.info(f"GET /departments/{id} called with depth={depth},"
-                f"include_employees={include_employees}")
-    dept = await dept_crud.get_department(db, id)
-    if not dept:
-        logger.warning(f"Department {id} not found")
-        raise HTTPException(status_code=404, detail="Department not found")
+                f"include_employees={include_employees}, as_of={as_of}, "
+                f"children_limit={children_limit}")
 
-    tree = await _build_tree(db, id, depth)
-    if not tree:
-        logger.error(f"Failed to build tree for department {id}")
-        raise HTTPException(status_code=404, detail="Department not found")
-
-    def strip_employees(node):
-        if not include_employees:
-            node.pop("employees", None)
-        for child in node.get("children", []):
-            strip_employees(child)
-
-    strip_employees(tree)
+    async def read_tree():
+        # План загрузки зависит от параметров: по запросу на уровень дерева,
+        # сотрудники читаются одним запросом и только если они нужны.
+        # Корень приходит тем же первым запросом, отдельный get_department
+        # не нужен.
+        nodes, children, employees, child_counts = (
+            await dept_crud.load_department_forest(
+                db, org_id, [id], depth, include_employees, as_of,
+                children_limit
+            )
+        )
+        if id not in nodes:
+            return None
+        return _tree_response(_assemble_tree(id, depth, nodes, children,
+                                             employees, child_counts,
+                                             include_employees))
 
+    key = await _read_key(db, org_id, id, depth, include_employees, as_of,
+                          children_limit)
+    encoded = await _encoded_read(tree_reads, key, read_tree)
+    if encoded is None:
+        logger.warning(f"Department {id} not found")
+        raise HTTPException(status_code=404, detail="Department not found")
     logger.info(f"Successfully retrieved department {id}")
-
-    return {
-        "department": {
-            "id": dept.id,
-            "name": dept.name,
-            "parent_id": dept.parent_id,
-            "created_at": dept.created_at
-        },
-        "employees": tree.get("employees", []) if include_employees else [],
-        "children": tree.get("children", [])
-    }
+    return await encoded.response(request.headers.get("accept-encoding"))
 
 
 @router.post(
@@ -143,11 +398,12 @@ async def get_department_endpoint(
 )
 async def create_department_endpoint(
     payload: dept_schema.DepartmentCreate,
+    org_id: int = Depends(get_org_id),
     db: AsyncSession = Depends(get_db)
 ):
     logger.info(f"POST /departments/ called with payload: {payload.model_dump()}")
     try:
-        dept = await dept_crud.create_department(db, payload)
+        dept = await dept_crud.create_department(db, org_id, payload)
         await db.commit()
         await db.refresh(dept)
         logger.info(f"Department created successfully with id={dept.id}")
@@ -157,6 +413,58 @@ async def create_department_endpoint(
     return dept
 
 
+@router.post(
+    "/departments/lca",
+    response_model=hierarchy_schema.LcaResponse,
+    summary="Ближайшие общие подразделения для пар узлов",
+    description="""
+    Для каждой пары подразделений и/или сотрудников возвращает ближайшее
+    общее подразделение (LCA) и расстояние между узлами в уровнях.
+    Ответы строятся по индексу иерархии (эйлеров обход + разреженная
+    таблица), поэтому каждая пара обрабатывается за O(1).
+    Индекс перестраивается после изменения структуры.
+    """,
+    responses={
+        200: {"description": "Успешный ответ, порядок совпадает с порядком пар"},
+        422: {"description": "Ошибка валидации входных данных"}
+    }
+)
+async def departments_lca_endpoint(
+    payload: hierarchy_schema.LcaRequest,
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"POST /departments/lca called with "
+                f"{len(payload.pairs)} pairs")
+    employee_ids = {ref.employee_id
+                    for pair in payload.pairs
+                    for ref in (pair.a, pair.b)
+                    if ref.employee_id is not None}
+    employee_departments = {}
+    if employee_ids:
+        employee_departments = await emp_crud.get_employee_departments(
+            db, org_id, list(employee_ids)
+        )
+    index = await hierarchy_index.get(
+        db, org_id, await change_crud.get_change_version(db, org_id)
+    )
+
+    def resolve_ref(ref):
+        if ref.employee_id is None:
+            return ref.department_id, None
+        return employee_departments.get(ref.employee_id), ref.employee_id
+
+    results = []
+    for pair in payload.pairs:
+        a, b = resolve_ref(pair.a), resolve_ref(pair.b)
+        if a[0] is None or b[0] is None:
+            results.append({"lca_department_id": None, "distance": None})
+            continue
+        lca_id, distance = resolve_lca(index, a, b)
+        results.append({"lca_department_id": lca_id, "distance": distance})
+    return {"results": results}
+
+
 @router.patch(
     "/departments/{id}",
     response_model=dept_schema.DepartmentRead,
@@ -166,17 +474,18 @@ async def create_department_endpoint(
         200: {"description": "Подразделение успешно обновлено"},
         400: {"description": "Ошибка валидации (неверный родитель, дубликат имени или попытка сделать себя родителем)"},
         404: {"description": "Подразделение не найдено"},
-        409: {"description": "Обнаружен цикл (попытка переместить подразделение внутрь своего поддерева)"}
+        409: {"description": "Обнаружен цикл (попытка переместить подразделение внутрь своего поддерева) или конкурирующее изменение"}
     }
 )
 async def patch_department(
     id: int,
     payload: dept_schema.DepartmentUpdate,
+    org_id: int = Depends(get_org_id),
     db: AsyncSession = Depends(get_db)
 ):
     logger.info(f"PATCH /departments/{id} called with payload:"
                 f"{payload.model_dump(exclude_unset=True)}")
-    dept = await dept_crud.get_department(db, id)
+    dept = await dept_crud.get_department(db, org_id, id)
     if not dept:
         logger.warning(f"Department {id} not found for update")
         raise HTTPException(status_code=404, detail="Department not found")
@@ -187,28 +496,34 @@ async def patch_department(
         raise HTTPException(status_code=400,
                             detail="Cannot set department as its own parent")
 
+    # Блокируем перемещаемый отдел и цепочку предков нового родителя:
+    # параллельные перемещения не смогут создать цикл до нашего коммита
+    try:
+        exists, ancestors = await dept_crud.lock_for_move(
+            db, org_id, id, new_parent_id
+        )
+    except dept_crud.ConcurrentModificationError as e:
+        logger.warning(f"Could not lock department {id} for update: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
+    if not exists:
+        logger.warning(f"Department {id} was deleted concurrently")
+        raise HTTPException(status_code=404, detail="Department not found")
+
     if new_parent_id is not None:
-        parent = await dept_crud.get_department(db, new_parent_id)
-        if not parent:
+        if not ancestors:
             logger.warning(f"Parent department {new_parent_id} not found")
             raise HTTPException(status_code=400,
                                 detail="Parent department not found")
-        cur = parent
-        while cur:
-            if cur.id == id:
-                logger.warning(f"Cycle detected: moving department"
-                               f"{id} into its own subtree")
-                raise HTTPException(status_code=409,
-                                    detail="Cannot move department \n"
-                                    "inside its own subtree")
-            if cur.parent_id:
-                cur = await dept_crud.get_department(db, cur.parent_id)
-            else:
-                cur = None
+        if any(ancestor["id"] == id for ancestor in ancestors):
+            logger.warning(f"Cycle detected: moving department"
+                           f"{id} into its own subtree")
+            raise HTTPException(status_code=409,
+                                detail="Cannot move department \n"
+                                "inside its own subtree")
 
     data = payload.dict(exclude_unset=True)
     try:
-        updated = await dept_crud.update_department(db, id, data)
+        updated = await dept_crud.update_department(db, org_id, id, data)
         await db.commit()
         logger.info(f"Department {id} updated successfully")
     except ValueError as e:
@@ -225,22 +540,32 @@ async def patch_department(
     - **cascade** (по умолчанию): удаляет подразделение и всех его сотрудников (каскадно через БД).
     - **reassign**: переводит всех сотрудников в указанное подразделение (reassign_to_department_id),
       делает дочерние подразделения корневыми (parent_id=NULL) и удаляет само подразделение.
+
+    С background=true удаление выполняется фоновой задачей порциями,
+    каждая порция коммитится отдельно; ответ 202 содержит job_id,
+    прогресс доступен через GET /jobs/{job_id}. Пока задача выполняется,
+    поддерево видно частично удалённым.
     """,
     responses={
         200: {"description": "Подразделение успешно удалено"},
+        202: {"description": "Создана фоновая задача удаления"},
         400: {"description": "Ошибка в параметрах удаления (неверный режим, отсутствует целевой ID для reassign, целевой отдел не найден)"},
-        404: {"description": "Подразделение не найдено"}
+        404: {"description": "Подразделение не найдено"},
+        409: {"description": "Конкурирующее изменение, повторите запрос"}
     }
 )
 async def delete_department_endpoint(
     id: int,
     mode: str = Query("cascade"),
     reassign_to_department_id: Optional[int] = None,
+    background: bool = False,
+    org_id: int = Depends(get_org_id),
     db: AsyncSession = Depends(get_db)
 ):
     logger.info(f"DELETE /departments/{id} called with mode={mode},"
-                f"reassign_to={reassign_to_department_id}")
-    dept = await dept_crud.get_department(db, id)
+                f"reassign_to={reassign_to_department_id}, "
+                f"background={background}")
+    dept = await dept_crud.get_department(db, org_id, id)
     if not dept:
         logger.warning(f"Department {id} not found for deletion")
         raise HTTPException(status_code=404, detail="Department not found")
@@ -256,19 +581,54 @@ async def delete_department_endpoint(
             raise HTTPException(status_code=400,
                                 detail="reassign_to_department_id \n"
                                 "is required for reassign mode")
-        target = await dept_crud.get_department(db, reassign_to_department_id)
+        target = await dept_crud.get_department(db, org_id,
+                                                reassign_to_department_id)
         if not target:
             logger.warning(f"Target department "
                            f"{reassign_to_department_id} not found")
             raise HTTPException(status_code=400,
                                 detail="Target department not found")
-        await dept_crud.delete_department_reassign(db,
+
+    if background:
+        job = await job_crud.create_job(db, org_id, job_crud.DELETE_DEPARTMENT, {
+            "department_id": id,
+            "mode": mode,
+            "reassign_to_department_id": reassign_to_department_id,
+        })
+        await db.commit()
+        job_worker.enqueue(job.id)
+        return JSONResponse(status_code=202,
+                            content={"job_id": job.id, "status": job.status},
+                            headers={"Location": f"/jobs/{job.id}"})
+
+    if mode == "reassign":
+        try:
+            locked = await dept_crud.lock_for_reassign(
+                db, org_id, id, reassign_to_department_id
+            )
+        except dept_crud.ConcurrentModificationError as e:
+            logger.warning(f"Could not lock department {id} for deletion: {e}")
+            raise HTTPException(status_code=409, detail=str(e))
+        if id not in locked or reassign_to_department_id not in locked:
+            logger.warning(f"Department {id} or target "
+                           f"{reassign_to_department_id} deleted concurrently")
+            raise HTTPException(status_code=409,
+                                detail="Department was modified concurrently")
+        await dept_crud.delete_department_reassign(db, org_id,
                                                    dept,
                                                    reassign_to_department_id)
         logger.info(f"Department {id} deleted in reassign mode, "
                     f"employees moved to {reassign_to_department_id}")
     else:
-        await dept_crud.delete_department_cascade(db, dept)
+        try:
+            locked = await dept_crud.lock_subtree(db, org_id, id)
+        except dept_crud.ConcurrentModificationError as e:
+            logger.warning(f"Could not lock department {id} for deletion: {e}")
+            raise HTTPException(status_code=409, detail=str(e))
+        if id not in locked:
+            logger.warning(f"Department {id} deleted concurrently")
+            raise HTTPException(status_code=404, detail="Department not found")
+        await dept_crud.delete_department_cascade(db, org_id, dept)
         logger.info(f"Department {id} deleted in cascade mode")
 
     await db.commit()
@@ -1,19 +1,53 @@
+from functools import lru_cache
+
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.batching import MicroBatcher
+from app.config import get_settings
 from app.crud import department as dept_crud
 from app.crud import employee as emp_crud
+from app.database import get_database
+from app.deadlines import apply_deadline
 from app.schemas import employee as emp_schema
-from app.deps import get_db
+from app.deps import get_db, get_org_id
 
 router = APIRouter()
 
+CREATE_ROUTE = "POST /departments/{id}/employees/"
+
+
+def _batch_session():
+    return get_database().session_factory()
+
+
+async def _create_batch(items: list) -> list:
+    async with _batch_session() as db:
+        apply_deadline(db, CREATE_ROUTE)
+        created = await emp_crud.create_employees_batch(db, items)
+        await db.commit()
+    return created
+
+
+@lru_cache
+def get_employee_batcher() -> MicroBatcher:
+    settings = get_settings()
+    return MicroBatcher("employee_create", _create_batch,
+                        settings.EMPLOYEE_BATCH_WINDOW_MS / 1000,
+                        settings.EMPLOYEE_BATCH_MAX_SIZE)
+
 
 @router.post(
     "/departments/{id}/employees/",
     response_model=emp_schema.EmployeeRead,
     summary="Создать сотрудника в подразделении",
-    description="Создаёт нового сотрудника в указанном подразделении. Имя и должность обрезаются по краям.",
+    description="""
+    Создаёт нового сотрудника в указанном подразделении. Имя и должность обрезаются по краям.
+    С EMPLOYEE_BATCHING одновременные запросы собираются в пакеты
+    на EMPLOYEE_BATCH_WINDOW_MS: подразделения пакета проверяются одним
+    запросом, сотрудники вставляются одним INSERT и одним коммитом.
+    Ответ приходит после коммита пакета.
+    """,
     responses={
         200: {"description": "Сотрудник успешно создан"},
         404: {"description": "Подразделение не найдено"},
@@ -23,12 +57,23 @@ router = APIRouter()
 async def create_employee_endpoint(
     id: int,
     payload: emp_schema.EmployeeCreate,
+    org_id: int = Depends(get_org_id),
     db: AsyncSession = Depends(get_db)
 ):
-    dept = await dept_crud.get_department(db, id)
+    if get_settings().EMPLOYEE_BATCHING:
+        # Соединение запроса не должно простаивать, пока пакет
+        # выполняется на своём
+        await db.commit()
+        emp = await get_employee_batcher().submit((org_id, id, payload))
+        if emp is None:
+            raise HTTPException(status_code=404,
+                                detail="Department not found")
+        return emp
+
+    dept = await dept_crud.get_department(db, org_id, id)
     if not dept:
         raise HTTPException(status_code=404, detail="Department not found")
-    emp = await emp_crud.create_employee(db, id, payload)
+    emp = await emp_crud.create_employee(db, org_id, id, payload)
     await db.commit()
     await db.refresh(emp)
     return emp
@@ -0,0 +1,35 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import job as job_crud
+from app.schemas import job as job_schema
+from app.deps import get_db, get_org_id
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get(
+    "/jobs/{id}",
+    response_model=job_schema.JobRead,
+    summary="Статус фоновой задачи",
+    description="Возвращает статус и прогресс фоновой задачи: processed — число обработанных строк, total — оценка их общего числа на момент запуска.",
+    responses={
+        200: {"description": "Успешный ответ"},
+        404: {"description": "Задача не найдена"}
+    }
+)
+async def get_job_endpoint(
+    id: int,
+    org_id: int = Depends(get_org_id),
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"GET /jobs/{id} called")
+    job = await job_crud.get_job(db, id, org_id)
+    if not job:
+        logger.warning(f"Job {id} not found")
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Метрики сервиса",
+    description="Метрики процесса в текстовом формате Prometheus.",
+    include_in_schema=False,
+)
+async def metrics_endpoint():
+    return REGISTRY.render()
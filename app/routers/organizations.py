@@ -0,0 +1,58 @@
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import organization as org_crud
+from app.schemas import organization as org_schema
+from app.deps import get_db
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.post(
+    "/organizations/",
+    response_model=org_schema.OrganizationRead,
+    summary="Создать организацию",
+    description="Создаёт организацию. Её id передаётся в заголовке X-Org-Id во всех запросах к её оргструктуре.",
+    responses={
+        200: {"description": "Организация успешно создана"},
+        400: {"description": "Название пустое или уже занято"},
+        422: {"description": "Ошибка валидации входных данных"}
+    }
+)
+async def create_organization_endpoint(
+    payload: org_schema.OrganizationCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"POST /organizations/ called with name='{payload.name}'")
+    try:
+        org = await org_crud.create_organization(db, payload.name)
+        await db.commit()
+    except ValueError as e:
+        logger.warning(f"Organization creation failed: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    return org
+
+
+@router.get(
+    "/organizations/{id}",
+    response_model=org_schema.OrganizationRead,
+    summary="Получить организацию",
+    responses={
+        200: {"description": "Успешный ответ"},
+        404: {"description": "Организация не найдена"}
+    }
+)
+async def get_organization_endpoint(
+    id: int,
+    db: AsyncSession = Depends(get_db)
+):
+    logger.info(f"GET /organizations/{id} called")
+    org = await org_crud.get_organization(db, id)
+    if not org:
+        logger.warning(f"Organization {id} not found")
+        raise HTTPException(status_code=404, detail="Organization not found")
+    return org
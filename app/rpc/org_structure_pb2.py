@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: app/rpc/org_structure.proto
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'app/rpc/org_structure.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1b\x61pp/rpc/org_structure.proto\x12\x10org_structure.v1\x1a\x1fgoogle/protobuf/timestamp.proto\"\x94\x01\n\x08\x45mployee\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x15\n\rdepartment_id\x18\x02 \x01(\x05\x12\x11\n\tfull_name\x18\x03 \x01(\t\x12\x10\n\x08position\x18\x04 \x01(\t\x12\x10\n\x08hired_at\x18\x05 \x01(\t\x12.\n\ncreated_at\x18\x06 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"|\n\nDepartment\x12\n\n\x02id\x18\x01 \x01(\x05\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x16\n\tparent_id\x18\x03 \x01(\x05H\x00\x88\x01\x01\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.TimestampB\x0c\n\n_parent_id\"\xd6\x01\n\x0e\x44\x65partmentNode\x12\x30\n\ndepartment\x18\x01 \x01(\x0b\x32\x1c.org_structure.v1.Department\x12-\n\temployees\x18\x02 \x03(\x0b\x32\x1a.org_structure.v1.Employee\x12\x32\n\x08\x63hildren\x18\x03 \x03(\x0b\x32 .org_structure.v1.DepartmentNode\x12\x16\n\x0e\x63hildren_count\x18\x04 \x01(\x05\x12\x17\n\x0f\x63hildren_cursor\x18\x05 \x01(\t\"\xa3\x01\n\x18GetDepartmentTreeRequest\x12\x0e\n\x06org_id\x18\x01 \x01(\x05\x12\n\n\x02id\x18\x02 \x01(\x05\x12\r\n\x05\x64\x65pth\x18\x03 \x01(\x05\x12\x19\n\x11include_employees\x18\x04 \x01(\x08\x12\x16\n\x0e\x63hildren_limit\x18\x05 \x01(\x05\x12)\n\x05\x61s_of\x18\x06 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"\x1f\n\rExportRequest\x12\x0e\n\x06org_id\x18\x01 \x01(\x05\x32\x99\x02\n\x0cOrgStructure\x12\x61\n\x11GetDepartmentTree\x12*.org_structure.v1.GetDepartmentTreeRequest\x1a .org_structure.v1.DepartmentNode\x12T\n\x11\x45xportDepartments\x12\x1f.org_structure.v1.ExportRequest\x1a\x1c.org_structure.v1.Department0\x01\x12P\n\x0f\x45xportEmployees\x12\x1f.org_structure.v1.ExportRequest\x1a\x1a.org_structure.v1.Employee0\x01\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'app.rpc.org_structure_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_EMPLOYEE']._serialized_start=83
+  _globals['_EMPLOYEE']._serialized_end=231
+  _globals['_DEPARTMENT']._serialized_start=233
+  _globals['_DEPARTMENT']._serialized_end=357
+  _globals['_DEPARTMENTNODE']._serialized_start=360
+  _globals['_DEPARTMENTNODE']._serialized_end=574
+  _globals['_GETDEPARTMENTTREEREQUEST']._serialized_start=577
+  _globals['_GETDEPARTMENTTREEREQUEST']._serialized_end=740
+  _globals['_EXPORTREQUEST']._serialized_start=742
+  _globals['_EXPORTREQUEST']._serialized_end=773
+  _globals['_ORGSTRUCTURE']._serialized_start=776
+  _globals['_ORGSTRUCTURE']._serialized_end=1057
+# @@protoc_insertion_point(module_scope)
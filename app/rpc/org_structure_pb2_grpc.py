@@ -0,0 +1,186 @@
+# Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
+import grpc
+import warnings
+
+from app.rpc import org_structure_pb2 as app_dot_rpc_dot_org__structure__pb2
+
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
+
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in app/rpc/org_structure_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class OrgStructureStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.GetDepartmentTree = channel.unary_unary(
+                '/org_structure.v1.OrgStructure/GetDepartmentTree',
+                request_serializer=app_dot_rpc_dot_org__structure__pb2.GetDepartmentTreeRequest.SerializeToString,
+                response_deserializer=app_dot_rpc_dot_org__structure__pb2.DepartmentNode.FromString,
+                _registered_method=True)
+        self.ExportDepartments = channel.unary_stream(
+                '/org_structure.v1.OrgStructure/ExportDepartments',
+                request_serializer=app_dot_rpc_dot_org__structure__pb2.ExportRequest.SerializeToString,
+                response_deserializer=app_dot_rpc_dot_org__structure__pb2.Department.FromString,
+                _registered_method=True)
+        self.ExportEmployees = channel.unary_stream(
+                '/org_structure.v1.OrgStructure/ExportEmployees',
+                request_serializer=app_dot_rpc_dot_org__structure__pb2.ExportRequest.SerializeToString,
+                response_deserializer=app_dot_rpc_dot_org__structure__pb2.Employee.FromString,
+                _registered_method=True)
+
+
+class OrgStructureServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def GetDepartmentTree(self, request, context):
+        """Поддерево подразделения, как GET /departments/{id}
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ExportDepartments(self, request, context):
+        """Все подразделения организации по возрастанию id одним снимком
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ExportEmployees(self, request, context):
+        """Все сотрудники организации по возрастанию id одним снимком
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_OrgStructureServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'GetDepartmentTree': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetDepartmentTree,
+                    request_deserializer=app_dot_rpc_dot_org__structure__pb2.GetDepartmentTreeRequest.FromString,
+                    response_serializer=app_dot_rpc_dot_org__structure__pb2.DepartmentNode.SerializeToString,
+            ),
+            'ExportDepartments': grpc.unary_stream_rpc_method_handler(
+                    servicer.ExportDepartments,
+                    request_deserializer=app_dot_rpc_dot_org__structure__pb2.ExportRequest.FromString,
+                    response_serializer=app_dot_rpc_dot_org__structure__pb2.Department.SerializeToString,
+            ),
+            'ExportEmployees': grpc.unary_stream_rpc_method_handler(
+                    servicer.ExportEmployees,
+                    request_deserializer=app_dot_rpc_dot_org__structure__pb2.ExportRequest.FromString,
+                    response_serializer=app_dot_rpc_dot_org__structure__pb2.Employee.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'org_structure.v1.OrgStructure', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('org_structure.v1.OrgStructure', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class OrgStructure:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def GetDepartmentTree(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/org_structure.v1.OrgStructure/GetDepartmentTree',
+            app_dot_rpc_dot_org__structure__pb2.GetDepartmentTreeRequest.SerializeToString,
+            app_dot_rpc_dot_org__structure__pb2.DepartmentNode.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ExportDepartments(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/org_structure.v1.OrgStructure/ExportDepartments',
+            app_dot_rpc_dot_org__structure__pb2.ExportRequest.SerializeToString,
+            app_dot_rpc_dot_org__structure__pb2.Department.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ExportEmployees(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/org_structure.v1.OrgStructure/ExportEmployees',
+            app_dot_rpc_dot_org__structure__pb2.ExportRequest.SerializeToString,
+            app_dot_rpc_dot_org__structure__pb2.Employee.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,42 @@
+import logging
+from typing import Optional
+
+from app.config import get_settings
+
+try:
+    import grpc
+except ImportError:
+    grpc = None
+
+logger = logging.getLogger(__name__)
+
+
+async def start_grpc_server(host: str, port: int, session_factory):
+    """Запускает gRPC-сервер в текущем цикле событий.
+
+    Сервис работает с тем же движком и пулом соединений, что и REST.
+    Возвращает сервер или None, если grpcio не установлен. Порт
+    открывается с SO_REUSEPORT, поэтому его делят все воркеры uvicorn.
+    """
+    if grpc is None:
+        logger.warning("grpcio is not installed, gRPC server is disabled")
+        return None
+    from app.rpc.service import add_service
+
+    compression = {
+        "gzip": grpc.Compression.Gzip,
+        "deflate": grpc.Compression.Deflate,
+    }.get(get_settings().GRPC_COMPRESSION, grpc.Compression.NoCompression)
+    server = grpc.aio.server(options=[("grpc.so_reuseport", 1)],
+                             compression=compression)
+    add_service(server, session_factory)
+    bound = server.add_insecure_port(f"{host}:{port}")
+    await server.start()
+    logger.info(f"gRPC server listening on {host}:{bound}")
+    return server
+
+
+async def stop_grpc_server(server: Optional["grpc.aio.Server"],
+                           grace: float = 5.0):
+    if server is not None:
+        await server.stop(grace)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import timezone
+
+import grpc
+from google.protobuf.timestamp_pb2 import Timestamp
+from sqlalchemy.exc import DBAPIError
+
+from app.admission import AdmissionRejected, get_admission_controller
+from app.config import get_settings
+from app.crud import department as dept_crud
+from app.crud import employee as emp_crud
+from app.crud import organization as org_crud
+from app.database import read_only_transactions
+from app.deadlines import apply_deadline, is_timeout_error
+from app.metrics import counter
+from app.slow_queries import current_route
+from app.rpc import org_structure_pb2 as pb
+from app.rpc import org_structure_pb2_grpc as pb_grpc
+
+logger = logging.getLogger(__name__)
+
+# Строк в одном запросе выгрузки
+EXPORT_BATCH_SIZE = 1000
+
+grpc_requests = counter(
+    "grpc_requests_total",
+    "Вызовы gRPC по методам и кодам завершения",
+    ("method", "code"),
+)
+
+
+def _timestamp(value) -> Timestamp:
+    stamp = Timestamp()
+    if value is not None:
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        stamp.FromDatetime(value)
+    return stamp
+
+
+def _department(row: dict) -> pb.Department:
+    return pb.Department(id=row["id"], name=row["name"],
+                         parent_id=row["parent_id"],
+                         created_at=_timestamp(row["created_at"]))
+
+
+def _employee(row: dict) -> pb.Employee:
+    hired_at = row["hired_at"]
+    return pb.Employee(id=row["id"], department_id=row["department_id"],
+                       full_name=row["full_name"], position=row["position"],
+                       hired_at=hired_at.isoformat() if hired_at else "",
+                       created_at=_timestamp(row["created_at"]))
+
+
+def _tree_node(dept_id: int, depth: int, nodes: dict, children: dict,
+               employees: dict, child_counts: dict) -> pb.DepartmentNode:
+    """Протобуф-аналог _assemble_tree из REST-роутера подразделений."""
+    node = pb.DepartmentNode(department=_department(nodes[dept_id]),
+                             employees=[_employee(row)
+                                        for row in employees[dept_id]],
+                             children_count=child_counts.get(dept_id, 0))
+    if depth > 1:
+        for child_id in children[dept_id]:
+            node.children.append(_tree_node(child_id, depth - 1, nodes,
+                                            children, employees, child_counts))
+        if node.children and len(node.children) < node.children_count:
+            last = node.children[-1].department
+            node.children_cursor = dept_crud.encode_children_cursor(
+                last.name, last.id
+            )
+    return node
+
+
+class OrgStructureService(pb_grpc.OrgStructureServicer):
+    """Чтения структуры по gRPC поверх того же слоя crud и пула, что и REST.
+
+    Вызовы проходят тот же допуск по классам стоимости (ключ маршрута —
+    "gRPC <метод>") и получают тот же statement_timeout.
+    """
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+
+    @asynccontextmanager
+    async def _call(self, context, method: str, depth: int = 0):
+        key = f"gRPC {method}"
+        current_route.set(key)
+        # Сервис только читает
+        read_only_transactions.set(True)
+        controller = get_admission_controller()
+        cost_class = controller.classify_route(key, depth)
+        code = grpc.StatusCode.OK
+        try:
+            await controller.acquire(cost_class)
+        except AdmissionRejected:
+            code = grpc.StatusCode.RESOURCE_EXHAUSTED
+            grpc_requests.inc(method=method, code=code.name)
+            await context.abort(code, "Service overloaded, retry later")
+        try:
+            async with self._session_factory() as db:
+                apply_deadline(db, key)
+                yield db
+        except DBAPIError as exc:
+            if not is_timeout_error(exc):
+                code = grpc.StatusCode.INTERNAL
+                raise
+            code = grpc.StatusCode.DEADLINE_EXCEEDED
+            logger.warning(f"Deadline exceeded for {key}: {exc.orig}")
+            await context.abort(code, "Request deadline exceeded")
+        except grpc.aio.AbortError:
+            code = context.code() or grpc.StatusCode.UNKNOWN
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            # Клиент отменил вызов или закрыл поток выгрузки
+            code = grpc.StatusCode.CANCELLED
+            raise
+        except BaseException:
+            code = grpc.StatusCode.UNKNOWN
+            raise
+        finally:
+            controller.release(cost_class)
+            if code != grpc.StatusCode.RESOURCE_EXHAUSTED:
+                grpc_requests.inc(method=method, code=code.name)
+
+    @staticmethod
+    async def _resolve_org(db, context, org_id: int) -> int:
+        org_id = org_id or get_settings().DEFAULT_ORG_ID
+        if not await org_crud.organization_exists(db, org_id):
+            await context.abort(grpc.StatusCode.NOT_FOUND,
+                                "Organization not found")
+        return org_id
+
+    async def GetDepartmentTree(self, request, context):
+        depth = request.depth or 1
+        children_limit = request.children_limit or 100
+        if not 1 <= depth <= 5 or not 1 <= children_limit <= 1000:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT,
+                                "depth must be 1..5, children_limit 1..1000")
+        as_of = None
+        if request.HasField("as_of"):
+            as_of = request.as_of.ToDatetime(tzinfo=timezone.utc)
+
+        async with self._call(context, "GetDepartmentTree", depth) as db:
+            org_id = await self._resolve_org(db, context, request.org_id)
+            nodes, children, employees, child_counts = (
+                await dept_crud.load_department_forest(
+                    db, org_id, [request.id], depth,
+                    request.include_employees, as_of, children_limit
+                )
+            )
+            if request.id not in nodes:
+                await context.abort(grpc.StatusCode.NOT_FOUND,
+                                    "Department not found")
+            return _tree_node(request.id, depth, nodes, children,
+                              employees, child_counts)
+
+    async def _export(self, context, method: str, org_id: int, list_rows,
+                      to_message):
+        async with self._call(context, method) as db:
+            # Все порции читаются из одного снимка; в SQLite (WAL) снимок
+            # и так один на транзакцию, а такого уровня изоляции нет
+            if db.get_bind().dialect.name == "postgresql":
+                await db.connection(
+                    execution_options={"isolation_level": "REPEATABLE READ"}
+                )
+            org_id = await self._resolve_org(db, context, org_id)
+            after_id = 0
+            while True:
+                rows = await list_rows(db, org_id, after_id,
+                                       EXPORT_BATCH_SIZE)
+                for row in rows:
+                    yield to_message(row)
+                if len(rows) < EXPORT_BATCH_SIZE:
+                    break
+                after_id = rows[-1]["id"]
+
+    async def ExportDepartments(self, request, context):
+        async for message in self._export(context, "ExportDepartments",
+                                          request.org_id,
+                                          dept_crud.list_departments,
+                                          _department):
+            yield message
+
+    async def ExportEmployees(self, request, context):
+        async for message in self._export(context, "ExportEmployees",
+                                          request.org_id,
+                                          emp_crud.list_employees,
+                                          _employee):
+            yield message
+
+
+def add_service(server, session_factory):
+    pb_grpc.add_OrgStructureServicer_to_server(
+        OrgStructureService(session_factory), server
+    )
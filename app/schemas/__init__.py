@@ -5,5 +5,27 @@ from .department import (
     DepartmentTree,
     DepartmentWithEmployees,
     DepartmentDetail,
+    DepartmentChild,
+    DepartmentChildrenPage,
 )
-from .employee import EmployeeCreate, EmployeeRead
\ No newline at end of file
+from .employee import EmployeeCreate, EmployeeRead
+from .hierarchy import (
+    OrgNodeRef,
+    LcaPair,
+    LcaRequest,
+    LcaResult,
+    LcaResponse,
+)
+from .change import ChangeRead, ChangeFeed
+from .job import JobRead
+from .organization import OrganizationCreate, OrganizationRead
+from .analytics import (
+    PositionHeadcount,
+    HeadcountReport,
+    HireCohort,
+    HireCohortReport,
+    SubtreeTenure,
+    TenureReport,
+)
+from .profile import ProfileQuery, ProfileSummary, ProfileReport
+from .slow_query import SlowQueryRead
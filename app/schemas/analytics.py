@@ -0,0 +1,38 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field
+from datetime import date
+
+
+class PositionHeadcount(BaseModel):
+    position: str
+    headcount: int
+
+
+class HeadcountReport(BaseModel):
+    department_id: Optional[int] = Field(None, description="Корень поддерева; null — вся организация")
+    total: int = Field(..., description="Всего сотрудников в области")
+    positions: List[PositionHeadcount] = Field(default_factory=list)
+
+
+class HireCohort(BaseModel):
+    month: date = Field(..., description="Первый день месяца найма")
+    hired: int = Field(..., description="Нанято за месяц")
+
+
+class HireCohortReport(BaseModel):
+    department_id: Optional[int] = Field(None, description="Корень поддерева; null — вся организация")
+    cohorts: List[HireCohort] = Field(default_factory=list)
+
+
+class SubtreeTenure(BaseModel):
+    department_id: int = Field(..., description="Корень ветви")
+    name: str
+    headcount: int = Field(..., description="Сотрудников в ветви")
+    avg_tenure_days: Optional[float] = Field(None, description="Средний стаж в днях; null, если дат найма нет")
+
+
+class TenureReport(BaseModel):
+    department_id: Optional[int] = Field(None, description="Корень поддерева; null — вся организация")
+    headcount: int = Field(..., description="Всего сотрудников в области")
+    avg_tenure_days: Optional[float] = Field(None, description="Средний стаж в днях по области")
+    subtrees: List[SubtreeTenure] = Field(default_factory=list, description="Разбивка по дочерним ветвям")
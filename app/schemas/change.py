@@ -0,0 +1,32 @@
+from typing import Any, List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+
+class ChangeRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int = Field(..., description="Позиция изменения в ленте")
+    entity: str = Field(..., description="Тип сущности: department или employee")
+    entity_id: int = Field(..., description="ID сущности")
+    op: str = Field(..., description="Операция: create, update или delete")
+    data: Optional[dict[str, Any]] = Field(
+        None,
+        description="Состояние сущности после изменения (null для delete)"
+    )
+    recorded_at: datetime = Field(..., description="Время записи изменения")
+
+
+class ChangeFeed(BaseModel):
+    changes: List[ChangeRead] = Field(default_factory=list)
+    next_cursor: int = Field(..., description="Курсор для следующего запроса (since)")
+    has_more: bool = Field(..., description="Есть ли ещё изменения после курсора")
+
+
+class ChangeFeedGone(BaseModel):
+    detail: str
+    horizon: int = Field(..., description="Курсор, с которого хранится история")
+    next_cursor: int = Field(
+        ...,
+        description="Курсор для продолжения после полной синхронизации"
+    )
@@ -65,3 +65,20 @@ class DepartmentDetail(BaseModel):
                                           description="Сотрудники текущего отдела")
     children: List["DepartmentDetail"] = Field(default_factory=list,
                                                description="Дочерние отделы с их сотрудниками")
+    children_count: int = Field(0, description="Общее число дочерних отделов")
+    children_cursor: Optional[str] = Field(
+        None,
+        description="Курсор для GET /departments/{id}/children, если показаны не все дети"
+    )
+
+
+class DepartmentChild(DepartmentRead):
+    children_count: int = Field(..., description="Число дочерних отделов")
+
+
+class DepartmentChildrenPage(BaseModel):
+    children: List[DepartmentChild] = Field(default_factory=list)
+    next_cursor: Optional[str] = Field(
+        None,
+        description="Курсор следующей страницы или null, если страница последняя"
+    )
@@ -0,0 +1,53 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+
+class OrgNodeRef(BaseModel):
+    department_id: Optional[int] = Field(
+        None,
+        description="ID подразделения",
+        example=3
+    )
+    employee_id: Optional[int] = Field(
+        None,
+        description="ID сотрудника (вместо department_id)",
+        example=None
+    )
+
+    @model_validator(mode="after")
+    def check_exactly_one(self):
+        if (self.department_id is None) == (self.employee_id is None):
+            raise ValueError("Exactly one of department_id "
+                             "and employee_id must be set")
+        return self
+
+
+class LcaPair(BaseModel):
+    a: OrgNodeRef
+    b: OrgNodeRef
+
+
+class LcaRequest(BaseModel):
+    pairs: List[LcaPair] = Field(
+        ...,
+        min_length=1,
+        max_length=10000,
+        description="Пары узлов оргструктуры"
+    )
+
+
+class LcaResult(BaseModel):
+    lca_department_id: Optional[int] = Field(
+        None,
+        description="Ближайшее общее подразделение или null, "
+        "если узлы в разных деревьях или не найдены"
+    )
+    distance: Optional[int] = Field(
+        None,
+        description="Число уровней между узлами; "
+        "сотрудник находится на уровень ниже своего подразделения"
+    )
+
+
+class LcaResponse(BaseModel):
+    results: List[LcaResult]
@@ -0,0 +1,18 @@
+from typing import Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+
+class JobRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int = Field(..., description="ID задачи")
+    kind: str = Field(..., description="Тип задачи, например delete_department")
+    params: dict[str, Any] = Field(..., description="Параметры задачи")
+    status: str = Field(..., description="pending, running, done или failed")
+    total: Optional[int] = Field(None, description="Оценка числа строк к обработке")
+    processed: int = Field(..., description="Обработано строк")
+    error: Optional[str] = Field(None, description="Причина ошибки для failed")
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
@@ -0,0 +1,21 @@
+from typing import Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+
+class OrganizationCreate(BaseModel):
+    name: str = Field(
+        ...,
+        min_length=1,
+        max_length=200,
+        description="Уникальное название организации",
+        example="ООО Ромашка"
+    )
+
+
+class OrganizationRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int = Field(..., description="ID организации, передаётся в X-Org-Id")
+    name: str = Field(..., description="Название организации")
+    created_at: Optional[datetime] = Field(None, description="Дата создания")
@@ -0,0 +1,34 @@
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+
+class ProfileQuery(BaseModel):
+    statement: str = Field(..., description="Текст SQL-запроса")
+    duration_ms: float = Field(..., description="Время выполнения, мс")
+    rowcount: int = Field(..., description="Число строк по данным драйвера (-1, если неизвестно)")
+    executemany: bool = Field(..., description="Пакетное выполнение executemany")
+
+
+class ProfileSummary(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str = Field(..., description="ID отчёта")
+    method: str
+    path: str
+    route: Optional[str] = Field(None, description="Шаблон маршрута, например GET /departments/{id}")
+    status: Optional[int] = Field(None, description="Код ответа")
+    trigger: str = Field(..., description="header — по заголовку X-Profile, sample — случайная выборка")
+    started_at: datetime
+    duration_ms: float = Field(..., description="Время обработки запроса, мс")
+    samples: int = Field(..., description="Число снятых стеков")
+    interval_ms: float = Field(..., description="Интервал снятия стеков, мс")
+    sql_ms: float = Field(..., description="Суммарное время SQL-запросов, мс")
+
+
+class ProfileReport(ProfileSummary):
+    queries: List[ProfileQuery] = Field(default_factory=list)
+    stacks: dict[str, int] = Field(
+        default_factory=dict,
+        description="Стеки цикла событий (кадры через ';') и число снимков каждого"
+    )
@@ -0,0 +1,22 @@
+from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import datetime
+
+
+class SlowQueryRead(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int = Field(..., description="Номер записи в журнале процесса")
+    statement: str = Field(..., description="Текст запроса без литералов")
+    parameters: List[str] = Field(
+        default_factory=list,
+        description="Параметры запроса; без SLOW_QUERY_LOG_PARAMS — только их типы"
+    )
+    duration_ms: float = Field(..., description="Время выполнения, мс")
+    route: Optional[str] = Field(None, description="Маршрут, выполнивший запрос")
+    recorded_at: datetime
+    explain: Optional[str] = Field(
+        None,
+        description="План EXPLAIN (ANALYZE, BUFFERS), если запрос попал в выборку"
+    )
+    explain_error: Optional[str] = Field(None, description="Ошибка получения плана")
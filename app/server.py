@@ -0,0 +1,23 @@
+import uvicorn
+
+from app.config import get_settings
+
+
+def main():
+    """Запуск в продакшн-режиме: несколько воркеров, uvloop и httptools."""
+    settings = get_settings()
+    uvicorn.run(
+        "app.main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=settings.SERVER_WORKERS,
+        # "auto" выбирает uvloop и httptools, если они установлены
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from app.metrics import counter
+
+singleflight_leaders = counter(
+    "singleflight_leaders_total",
+    "Вычисления, выполненные запросом-лидером",
+    ("flight",),
+)
+singleflight_coalesced = counter(
+    "singleflight_coalesced_total",
+    "Запросы, получившие результат чужого вычисления",
+    ("flight",),
+)
+
+# Лидер отменён до результата: ожидающие повторяют попытку сами
+_ABANDONED = object()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Объединяет одновременные одинаковые вычисления в одно.
+
+    Первый запрос с ключом выполняет вычисление сам, остальные с тем же
+    ключом ждут его результат или ошибку. Ключ живёт только пока идёт
+    вычисление, результаты не сохраняются. Вычисление идёт в задаче
+    лидера и с его сессией БД; если лидера отменят, ожидающие
+    не получают отмену, а один из них выполняет вычисление заново.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: dict[Hashable, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[Any]]):
+        while (flight := self._flights.get(key)) is not None:
+            await flight.done.wait()
+            if flight.error is _ABANDONED:
+                continue
+            singleflight_coalesced.inc(flight=self.name)
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        flight = self._flights[key] = _Flight()
+        singleflight_leaders.inc(flight=self.name)
+        try:
+            flight.result = await compute()
+            return flight.result
+        except Exception as exc:
+            flight.error = exc
+            raise
+        except BaseException:
+            flight.error = _ABANDONED
+            raise
+        finally:
+            del self._flights[key]
+            flight.done.set()
@@ -0,0 +1,172 @@
+import asyncio
+import itertools
+import logging
+import random
+import re
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import get_settings
+from app.metrics import counter
+
+logger = logging.getLogger(__name__)
+
+slow_queries_total = counter(
+    "slow_queries_total",
+    "SQL-запросы дольше SLOW_QUERY_MS",
+    ("route",),
+)
+
+# Маршрут, от имени которого выполняются запросы; задаётся при допуске
+# запроса (admit_request, gRPC _call) и наследуется его задачами
+current_route: ContextVar[Optional[str]] = ContextVar("query_route",
+                                                      default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_PARAM_LIST = re.compile(r"(?:\$\d+|%\(\w+\)s|\?)(?:\s*,\s*(?:\$\d+|%\(\w+\)s|\?))+")
+# Изменения данных и блокировки строк (FOR UPDATE / FOR [KEY] SHARE)
+_WRITES = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|SHARE)\b", re.IGNORECASE)
+
+
+def normalize_statement(statement: str) -> str:
+    """Текст запроса без литералов и с одним местом под список параметров.
+
+    Запросы, отличающиеся только значениями или длиной IN (...),
+    получают одинаковый текст и группируются вместе.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    return _PARAM_LIST.sub("...", statement)
+
+
+def is_explainable(statement: str) -> bool:
+    """EXPLAIN ANALYZE выполняет запрос, поэтому допускаются только чтения."""
+    words = statement.split(None, 1)
+    return (bool(words) and words[0].upper() in ("SELECT", "WITH")
+            and not _WRITES.search(statement))
+
+
+def _redact(parameters) -> list:
+    if parameters is None:
+        return []
+    values = parameters.values() if isinstance(parameters, dict) else parameters
+    if get_settings().SLOW_QUERY_LOG_PARAMS:
+        return [repr(value)[:200] for value in values]
+    return [f"<{type(value).__name__}>" for value in values]
+
+
+class SlowQuery:
+    _ids = itertools.count(1)
+
+    def __init__(self, statement: str, parameters, duration_ms: float,
+                 route: Optional[str]):
+        self.id = next(self._ids)
+        self.statement = normalize_statement(statement)
+        self.parameters = _redact(parameters)
+        self.duration_ms = duration_ms
+        self.route = route
+        self.recorded_at = datetime.now(timezone.utc)
+        self.explain: Optional[str] = None
+        self.explain_error: Optional[str] = None
+
+
+class SlowQueryLog:
+    """Последние медленные запросы процесса в кольцевом буфере."""
+
+    def __init__(self):
+        self._entries: deque[SlowQuery] = deque()
+        # Идёт ли сейчас EXPLAIN: одновременно не больше одного,
+        # чтобы разбор не занимал пул соединений
+        self.explaining = False
+        self._tasks: set[asyncio.Task] = set()
+
+    def add(self, entry: SlowQuery):
+        self._entries.append(entry)
+        while len(self._entries) > get_settings().SLOW_QUERY_LOG_SIZE:
+            self._entries.popleft()
+
+    def list(self, limit: Optional[int] = None) -> list[SlowQuery]:
+        entries = list(reversed(self._entries))
+        return entries if limit is None else entries[:limit]
+
+    def clear(self):
+        self._entries.clear()
+
+    def schedule_explain(self, engine, entry: SlowQuery, statement: str,
+                         parameters):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self.explaining = True
+        task = loop.create_task(
+            self._explain(AsyncEngine(engine), entry, statement, parameters)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, engine: AsyncEngine, entry: SlowQuery,
+                       statement: str, parameters):
+        timeout_ms = get_settings().SLOW_QUERY_EXPLAIN_TIMEOUT_MS
+        try:
+            async with engine.connect() as conn:
+                # Сам EXPLAIN в журнал не попадает
+                conn = await conn.execution_options(slow_query_log=False)
+                await conn.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {"timeout": f"{timeout_ms}ms"},
+                )
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                )
+                entry.explain = "\n".join(row[0] for row in result)
+                await conn.rollback()
+        except Exception as exc:
+            entry.explain_error = str(exc)
+            logger.warning(f"EXPLAIN of slow query {entry.id} failed: {exc}")
+        finally:
+            self.explaining = False
+
+
+slow_query_log = SlowQueryLog()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    context._slow_query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_slow_query(conn, cursor, statement, parameters, context,
+                       executemany):
+    settings = get_settings()
+    started = getattr(context, "_slow_query_started", None)
+    if (not settings.SLOW_QUERY_MS or started is None
+            or not context.execution_options.get("slow_query_log", True)):
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms < settings.SLOW_QUERY_MS:
+        return
+    route = current_route.get()
+    entry = SlowQuery(statement, None if executemany else parameters,
+                      duration_ms, route)
+    slow_query_log.add(entry)
+    slow_queries_total.inc(route=route or "unknown")
+    logger.warning(f"Slow query {entry.id} ({duration_ms:.0f} ms, "
+                   f"{route or 'no route'}): {entry.statement[:200]}")
+    if (not executemany and not slow_query_log.explaining
+            and conn.dialect.name == "postgresql"
+            and is_explainable(statement)
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE):
+        slow_query_log.schedule_explain(conn.engine, entry, statement,
+                                        parameters)
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import get_settings
+from app.crud import change as change_crud
+from app.crud import department as dept_crud
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+
+async def _warm_hot_queries(db: AsyncSession):
+    # Несуществующий id: выполняются те же запросы, что и на горячих путях,
+    # поэтому SQLAlchemy кеширует их компиляцию, а asyncpg — подготовленные
+    # выражения на этом соединении
+    org_id = get_settings().DEFAULT_ORG_ID
+    await dept_crud.get_department(db, org_id, 0)
+    await dept_crud.get_ancestor_chains(db, org_id, [0])
+    await dept_crud.load_department_forest(db, org_id, [0], 1, True)
+    await change_crud.get_change_horizon(db, org_id)
+
+
+async def prewarm_pool(engine: AsyncEngine, connections: int):
+    """Открывает connections соединений пула и прогревает на них запросы."""
+    async def warm_one():
+        async with engine.connect() as conn:
+            async with AsyncSession(bind=conn) as db:
+                await _warm_hot_queries(db)
+
+    # Соединения удерживаются одновременно, иначе пул вернёт одно и то же
+    await asyncio.gather(*(warm_one() for _ in range(connections)))
+    logger.info(f"Pre-warmed {connections} pool connections")
+
+
+async def create_sqlite_schema(engine: AsyncEngine):
+    """SQLite-режим: создаёт недостающие таблицы и индексы по моделям.
+
+    Миграции Alembic написаны для Postgres, поэтому ревизия схемы
+    в SQLite не проверяется.
+    """
+    from app.database import Base
+    import app.models  # noqa: F401 — регистрирует таблицы в метаданных
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    logger.info("SQLite schema is up to date")
+
+
+async def check_schema_version(engine: AsyncEngine, mode: str):
+    """Сверяет ревизию БД с head миграций Alembic.
+
+    mode: "off" — не проверять, "warn" — писать в лог,
+    "strict" — не запускать приложение на устаревшей схеме.
+    """
+    if mode == "off":
+        return
+    from alembic.config import Config
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    expected = set(
+        ScriptDirectory.from_config(Config(str(ALEMBIC_INI))).get_heads()
+    )
+    async with engine.connect() as conn:
+        current = set(await conn.run_sync(
+            lambda sync_conn:
+                MigrationContext.configure(sync_conn).get_current_heads()
+        ))
+    if current == expected:
+        logger.info(f"Database schema is at {sorted(current)}")
+        return
+    message = (f"Database schema revision {sorted(current)} does not match "
+               f"migrations head {sorted(expected)}")
+    if mode == "strict":
+        raise RuntimeError(message)
+    logger.warning(message)
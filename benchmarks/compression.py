@@ -0,0 +1,85 @@
+"""Сжатие ответов GET /departments/{id}: трафик и стоимость по кодировкам.
+
+Создаёт синтетическое дерево (как benchmarks.tree_read) и для каждой
+установленной кодировки замеряет размер ответа, долю сэкономленного
+трафика, процессорное время сжатия одного тела, а также время ответа
+без кэша (загрузка, сериализация, сжатие) и из кэша сжатых тел.
+Приложение вызывается в процессе через ASGI, без сети.
+
+    python -m benchmarks.compression --fanout 5 --depth 4 --employees 10
+
+Использует DATABASE_URL из настроек и создаёт таблицы при необходимости.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.compression import CODECS, _encode, available_encodings
+from app.database import get_database
+from app.main import app
+from app.routers.departments import get_read_cache
+from benchmarks.tree_read import seed_tree
+
+
+async def timed_get(client, url: str, encoding: str, cold: bool):
+    if cold:
+        get_read_cache().clear()
+    started = time.perf_counter()
+    response = await client.get(url, headers={"Accept-Encoding": encoding})
+    response.raise_for_status()
+    return time.perf_counter() - started, response.num_bytes_downloaded
+
+
+async def run(args):
+    root_id = args.root_id or await seed_tree(args.fanout, args.depth,
+                                              args.employees)
+    url = f"/departments/{root_id}?depth={args.depth}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        await client.get(url)
+        body = (await client.get(url, headers={"Accept-Encoding":
+                                               "identity"})).content
+        print(f"tree: {len(body) / 1024:.0f} KiB JSON; encodings: "
+              f"{', '.join(available_encodings())} "
+              f"(installed codecs: {', '.join(CODECS)})")
+        print(f"{'encoding':10}{'size KiB':>10}{'saved':>8}{'cpu ms':>9}"
+              f"{'MB/s':>8}{'cold ms':>9}{'cached ms':>11}")
+        for encoding in ["identity", *available_encodings()]:
+            if encoding == "identity":
+                size, cpu = len(body), 0.0
+            else:
+                cpu_times = []
+                for _ in range(args.repeat):
+                    data, cpu = _encode(body, encoding)
+                    cpu_times.append(cpu)
+                size, cpu = len(data), statistics.median(cpu_times)
+            cold = [await timed_get(client, url, encoding, True)
+                    for _ in range(args.repeat)]
+            cached = [await timed_get(client, url, encoding, False)
+                      for _ in range(args.repeat)]
+            throughput = f"{len(body) / cpu / 1e6:.0f}" if cpu else "-"
+            print(f"{encoding:10}{size / 1024:>10.1f}"
+                  f"{1 - size / len(body):>8.0%}{cpu * 1000:>9.2f}"
+                  f"{throughput:>8}"
+                  f"{statistics.median(t for t, _ in cold) * 1000:>9.1f}"
+                  f"{statistics.median(t for t, _ in cached) * 1000:>11.1f}")
+    await get_database().dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--employees", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--root-id", type=int, default=None,
+                        help="использовать существующее подразделение")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Пропускная способность создания сотрудников: по одному и пакетами.
+
+Сравнивает путь POST /departments/{id}/employees/ без пакетов
+(проверка подразделения, INSERT, коммит на каждого сотрудника,
+--concurrency одновременных сессий) с create_employees_batch
+для нескольких размеров пакета. HTTP не участвует: замеряется
+только работа с БД, которую экономит EMPLOYEE_BATCHING.
+
+    python -m benchmarks.employee_batch --rows 2000 --concurrency 15
+
+Использует DATABASE_URL из настроек.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from app.crud import department as dept_crud
+from app.crud import employee as emp_crud
+from app.database import get_database
+from app.models import DEFAULT_ORG_ID
+from app.schemas.department import DepartmentCreate
+from app.schemas.employee import EmployeeCreate
+
+PAYLOAD = EmployeeCreate(full_name="Bench Hire", position="Engineer")
+
+
+async def create_department() -> int:
+    async with get_database().session_factory() as db:
+        dept = await dept_crud.create_department(
+            db, DEFAULT_ORG_ID,
+            DepartmentCreate(name=f"bench-{uuid.uuid4().hex[:8]}")
+        )
+        await db.commit()
+        return dept.id
+
+
+async def create_one(dept_id: int):
+    async with get_database().session_factory() as db:
+        await dept_crud.get_department(db, DEFAULT_ORG_ID, dept_id)
+        emp = await emp_crud.create_employee(db, DEFAULT_ORG_ID, dept_id,
+                                             PAYLOAD)
+        await db.commit()
+        await db.refresh(emp)
+
+
+async def create_batch(dept_id: int, size: int):
+    async with get_database().session_factory() as db:
+        await emp_crud.create_employees_batch(
+            db, [(DEFAULT_ORG_ID, dept_id, PAYLOAD)] * size
+        )
+        await db.commit()
+
+
+async def run(args):
+    dept_id = await create_department()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(coro):
+        async with semaphore:
+            await coro
+
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(create_one(dept_id))
+                           for _ in range(args.rows)))
+    single = args.rows / (time.perf_counter() - started)
+    print(f"one per transaction: {single:.0f} rows/s")
+
+    for size in args.sizes:
+        started = time.perf_counter()
+        await asyncio.gather(*(limited(create_batch(dept_id, size))
+                               for _ in range(args.rows // size)))
+        rate = (args.rows // size * size) / (time.perf_counter() - started)
+        print(f"batch of {size}: {rate:.0f} rows/s ({rate / single:.1f}x)")
+    await get_database().dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=15)
+    parser.add_argument("--sizes", type=lambda v: [int(s) for s in v.split(",")],
+                        default=[10, 50, 250])
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
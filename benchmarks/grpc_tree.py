@@ -0,0 +1,119 @@
+"""Размер ответа и пропускная способность: REST JSON против gRPC.
+
+Создаёт синтетическое дерево (как benchmarks.tree_read), запускает сервис
+(python -m app.server, REST и gRPC в одном процессе) и читает одни и те же
+поддеревья через GET /departments/{id} и OrgStructure.GetDepartmentTree.
+Печатает размер тела ответа и число запросов в секунду при заданном
+параллелизме; клиент в обоих случаях полностью разбирает ответ.
+
+    python -m benchmarks.grpc_tree --fanout 5 --depth 5 --employees 10 \\
+        --read-depth 3 --concurrency 8 --duration 10
+
+Использует DATABASE_URL из настроек; нужен пакет grpcio.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+import grpc
+import httpx
+
+from app.database import get_database
+from app.rpc import org_structure_pb2 as pb
+from app.rpc import org_structure_pb2_grpc as pb_grpc
+from benchmarks.history import subtree_ids
+from benchmarks.startup import wait_for_first_response
+from benchmarks.tree_read import seed_tree
+
+
+async def rest_read(client: httpx.AsyncClient, dept_id: int, depth: int):
+    response = await client.get(f"/departments/{dept_id}",
+                                params={"depth": depth})
+    response.raise_for_status()
+    response.json()
+    return len(response.content)
+
+
+async def grpc_read(stub, dept_id: int, depth: int):
+    tree = await stub.GetDepartmentTree(pb.GetDepartmentTreeRequest(
+        id=dept_id, depth=depth, include_employees=True
+    ))
+    return tree.ByteSize()
+
+
+async def throughput(read, ids: list[int], depth: int, concurrency: int,
+                     duration: float) -> float:
+    done = 0
+
+    async def worker(seed: int, deadline: float):
+        nonlocal done
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            await read(rng.choice(ids), depth)
+            done += 1
+
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(worker(seed, deadline)
+                           for seed in range(concurrency)))
+    return done / duration
+
+
+async def run(args):
+    root_id = await seed_tree(args.fanout, args.depth, args.employees)
+    # Чтения начинаются с узлов, у которых есть read_depth уровней
+    ids = (await subtree_ids(root_id))[:args.fanout ** (args.depth
+                                                       - args.read_depth)]
+    await get_database().dispose()
+
+    env = dict(os.environ, SERVER_PORT=str(args.port),
+               GRPC_PORT=str(args.grpc_port), GRPC_ENABLED="true")
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], env=env,
+                              stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}",
+                                     timeout=30) as client, \
+                grpc.aio.insecure_channel(
+                    f"127.0.0.1:{args.grpc_port}") as channel:
+            await wait_for_first_response(client, "/metrics", 60)
+            stub = pb_grpc.OrgStructureStub(channel)
+
+            async def rest(dept_id, depth):
+                return await rest_read(client, dept_id, depth)
+
+            async def rpc(dept_id, depth):
+                return await grpc_read(stub, dept_id, depth)
+
+            print(f"{len(ids)} roots, depth={args.read_depth}, "
+                  f"concurrency={args.concurrency}")
+            for name, read in (("REST JSON", rest), ("gRPC", rpc)):
+                sizes = [await read(dept_id, args.read_depth)
+                         for dept_id in ids[:20]]
+                rate = await throughput(read, ids, args.read_depth,
+                                        args.concurrency, args.duration)
+                print(f"{name:>9}: {sum(sizes) / len(sizes) / 1024:.1f} KiB "
+                      f"per tree, {rate:.1f} req/s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--employees", type=int, default=10)
+    parser.add_argument("--read-depth", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--grpc-port", type=int, default=50052)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
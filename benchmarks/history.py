@@ -0,0 +1,139 @@
+"""Рост хранилища и задержка чтения истории версий.
+
+Создаёт синтетическое дерево (как benchmarks.tree_read), вносит в него
+--changes изменений через API (переименования подразделений и новые
+сотрудники) и печатает размер таблиц истории, прирост на одну версию
+и задержку GET /departments/{id} для текущего состояния и с as_of
+на момент до изменений.
+
+    python -m benchmarks.history --fanout 5 --depth 5 --employees 10
+
+Использует DATABASE_URL из настроек.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+
+from app.database import get_database
+from app.main import app
+from benchmarks.tree_read import seed_tree
+
+HISTORY_TABLES = ("department_history", "employee_history")
+
+
+async def backfill_history():
+    # seed_tree пишет напрямую в таблицы, минуя ленту изменений
+    async with get_database().engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO department_history "
+            "(org_id, id, name, parent_id, created_at, valid_from) "
+            "SELECT org_id, id, name, parent_id, created_at, created_at "
+            "FROM departments d WHERE NOT EXISTS (SELECT 1 FROM "
+            "department_history h WHERE h.org_id = d.org_id AND h.id = d.id)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO employee_history (org_id, id, department_id, "
+            "full_name, position, hired_at, created_at, valid_from) "
+            "SELECT org_id, id, department_id, full_name, position, hired_at, "
+            "created_at, created_at FROM employees e WHERE NOT EXISTS "
+            "(SELECT 1 FROM employee_history h "
+            "WHERE h.org_id = e.org_id AND h.id = e.id)"
+        ))
+
+
+async def history_stats():
+    async with get_database().engine.connect() as conn:
+        stats = {}
+        for table in HISTORY_TABLES:
+            result = await conn.execute(text(
+                f"SELECT (SELECT count(*) FROM {table}), "
+                f"(SELECT sum(pg_total_relation_size(relid)) "
+                f"FROM pg_partition_tree('{table}'))"
+            ))
+            stats[table] = tuple(result.one())
+        return stats
+
+
+async def subtree_ids(root_id: int) -> list[int]:
+    async with get_database().engine.connect() as conn:
+        result = await conn.execute(text(
+            "WITH RECURSIVE t AS (SELECT id FROM departments WHERE id = :root "
+            "UNION ALL SELECT d.id FROM departments d JOIN t "
+            "ON d.parent_id = t.id) SELECT id FROM t"
+        ), {"root": root_id})
+        return list(result.scalars())
+
+
+async def measure(client, url: str, params: dict, repeat: int) -> float:
+    await client.get(url, params=params)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(url, params=params)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return statistics.median(timings)
+
+
+async def run(args):
+    root_id = await seed_tree(args.fanout, args.depth, args.employees)
+    await backfill_history()
+    ids = await subtree_ids(root_id)
+    before = await history_stats()
+    snapshot_at = datetime.now(timezone.utc).isoformat()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        rng = random.Random(42)
+        started = time.perf_counter()
+        for i in range(args.changes):
+            dept_id = rng.choice(ids)
+            if i % 2:
+                response = await client.patch(f"/departments/{dept_id}",
+                                              json={"name": f"renamed-{i}"})
+            else:
+                response = await client.post(
+                    f"/departments/{dept_id}/employees/",
+                    json={"full_name": f"Hire {i}", "position": "Engineer"}
+                )
+            response.raise_for_status()
+        write_ms = (time.perf_counter() - started) * 1000 / max(args.changes, 1)
+
+        after = await history_stats()
+        for table in HISTORY_TABLES:
+            rows, size = after[table]
+            added = rows - before[table][0]
+            growth = (size - before[table][1]) / added if added else 0
+            print(f"{table}: {rows} versions, {size / 2**20:.1f} MiB, "
+                  f"+{added} versions, ~{growth:.0f} bytes/version")
+        print(f"writes: {write_ms:.1f} ms per change")
+
+        url = f"/departments/{root_id}"
+        base = {"depth": args.depth}
+        current = await measure(client, url, base, args.repeat)
+        historic = await measure(client, url, {**base, "as_of": snapshot_at},
+                                 args.repeat)
+        print(f"GET tree depth={args.depth}: current {current * 1000:.0f} ms, "
+              f"as_of {historic * 1000:.0f} ms")
+    await get_database().dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--employees", type=int, default=10)
+    parser.add_argument("--changes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
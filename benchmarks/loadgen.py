@@ -0,0 +1,411 @@
+"""Нагрузочный прогон со смешанным трафиком и отчётом по перцентилям.
+
+Запускает ``python -m app.server`` (или использует уже запущенный
+сервис, --url), создаёт отдельную организацию с деревом подразделений
+и в течение --duration секунд держит --concurrency параллельных
+клиентов. Каждый клиент выбирает операцию по весам --mix:
+
+    tree      GET /departments/{id} с глубиной из --depths
+    patch     PATCH /departments/{id}, переименование
+    employee  POST /departments/{id}/employees/
+    delete    POST /departments/ и DELETE /departments/{id} нового листа
+
+Для каждого маршрута печатаются пропускная способность, p50/p95/p99,
+доли ошибок и отказов контроля допуска (503), а по /metrics — загрузка
+пула соединений. Отчёт сохраняется в JSON; --compare сравнивает его
+с отчётом предыдущего прогона.
+
+    python -m benchmarks.loadgen --concurrency 32 --duration 30 \\
+        --mix tree=90,patch=4,employee=5,delete=1
+    python -m benchmarks.loadgen --compare benchmarks/reports/<old>.json
+
+Нужна база с применёнными миграциями (alembic upgrade head).
+С несколькими воркерами /metrics отвечает случайный воркер, поэтому
+загрузка пула отражает один процесс.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from benchmarks.startup import wait_for_first_response
+
+DEFAULT_MIX = "tree=90,patch=4,employee=5,delete=1"
+REPORT_DIR = Path(__file__).parent / "reports"
+PERCENTILES = (50, 95, 99)
+OPERATIONS = ("tree", "patch", "employee", "delete")
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {name!r}")
+        mix[name] = float(weight)
+    return mix
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Перцентиль методом ближайшего ранга."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Собирает задержки и статусы ответов по маршрутам."""
+
+    def __init__(self):
+        self.enabled = False
+        self.latencies: dict[str, list[float]] = {}
+        self.statuses: dict[str, dict[str, int]] = {}
+
+    def record(self, route: str, latency: float, status: str):
+        if not self.enabled:
+            return
+        self.latencies.setdefault(route, []).append(latency)
+        counts = self.statuses.setdefault(route, {})
+        counts[status] = counts.get(status, 0) + 1
+
+
+class LoadClient:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder,
+                 headers: dict, department_ids: list[int], depths: list[int],
+                 rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.headers = headers
+        self.department_ids = department_ids
+        self.depths = depths
+        self.rng = rng
+
+    async def request(self, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url,
+                                                 headers=self.headers,
+                                                 **kwargs)
+            status = str(response.status_code)
+        except httpx.TransportError as exc:
+            response, status = None, type(exc).__name__
+        self.recorder.record(route, time.perf_counter() - started, status)
+        return response
+
+    async def tree(self):
+        dept_id = self.rng.choice(self.department_ids)
+        depth = self.rng.choice(self.depths)
+        await self.request("GET /departments/{id}", "GET",
+                           f"/departments/{dept_id}?depth={depth}")
+
+    async def patch(self):
+        dept_id = self.rng.choice(self.department_ids)
+        await self.request("PATCH /departments/{id}", "PATCH",
+                           f"/departments/{dept_id}",
+                           json={"name": f"load-{uuid.uuid4().hex[:10]}"})
+
+    async def employee(self):
+        dept_id = self.rng.choice(self.department_ids)
+        await self.request("POST /departments/{id}/employees/", "POST",
+                           f"/departments/{dept_id}/employees/",
+                           json={"full_name": "Load Test",
+                                 "position": "Engineer"})
+
+    async def delete(self):
+        # Удаляется только что созданный лист, чтобы дерево не редело
+        parent_id = self.rng.choice(self.department_ids)
+        response = await self.request(
+            "POST /departments/", "POST", "/departments/",
+            json={"name": f"tmp-{uuid.uuid4().hex[:10]}",
+                  "parent_id": parent_id}
+        )
+        if response is None or response.status_code != 200:
+            return
+        await self.request("DELETE /departments/{id}", "DELETE",
+                           f"/departments/{response.json()['id']}")
+
+
+async def seed_organization(client: httpx.AsyncClient, fanout: int,
+                            depth: int, employees: int):
+    """Создаёт организацию и дерево через API; возвращает заголовки и id."""
+    response = await client.post(
+        "/organizations/", json={"name": f"loadgen-{uuid.uuid4().hex[:8]}"}
+    )
+    response.raise_for_status()
+    headers = {"X-Org-Id": str(response.json()["id"])}
+    semaphore = asyncio.Semaphore(8)
+
+    async def create(name, parent_id):
+        async with semaphore:
+            response = await client.post(
+                "/departments/", headers=headers,
+                json={"name": name, "parent_id": parent_id}
+            )
+            response.raise_for_status()
+            dept_id = response.json()["id"]
+            for i in range(employees):
+                response = await client.post(
+                    f"/departments/{dept_id}/employees/", headers=headers,
+                    json={"full_name": f"Employee {i}", "position": "Engineer"}
+                )
+                response.raise_for_status()
+            return dept_id
+
+    level = [await create("root", None)]
+    ids = list(level)
+    for _ in range(depth - 1):
+        level = await asyncio.gather(*(create(f"d{i}", parent_id)
+                                       for parent_id in level
+                                       for i in range(fanout)))
+        ids.extend(level)
+    return headers, ids
+
+
+def parse_metrics(text: str) -> dict[str, float]:
+    """Значения метрик из текстового формата Prometheus (по меткам — максимум)."""
+    values = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name, _, value = line.rpartition(" ")
+        if "{" in name:
+            name = name.split("{", 1)[0]
+            values[name] = max(values.get(name, 0.0), float(value))
+        else:
+            values[name] = float(value)
+    return values
+
+
+async def sample_pool(client: httpx.AsyncClient, recorder: Recorder,
+                      interval: float, samples: list[dict]):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            response = await client.get("/metrics")
+        except httpx.TransportError:
+            continue
+        if recorder.enabled and response.status_code == 200:
+            samples.append(parse_metrics(response.text))
+
+
+def summarize_pool(samples: list[dict]) -> dict:
+    checked_out = [s["db_pool_checked_out"] for s in samples
+                   if "db_pool_checked_out" in s]
+    if not checked_out:
+        return {"samples": 0}
+    capacity = max(s.get("db_pool_capacity", 0) for s in samples)
+    return {
+        "samples": len(checked_out),
+        "capacity": capacity,
+        "checked_out_mean": round(sum(checked_out) / len(checked_out), 2),
+        "checked_out_max": max(checked_out),
+        # Доля замеров, когда все соединения пула были заняты
+        "saturated_fraction": round(
+            sum(value >= capacity for value in checked_out)
+            / len(checked_out), 3),
+        "admission_queue_max": max(s.get("admission_queue_depth", 0)
+                                   for s in samples),
+    }
+
+
+def build_report(args, recorder: Recorder, elapsed: float,
+                 pool_samples: list[dict]) -> dict:
+    endpoints = {}
+    total = errors = 0
+    for route, latencies in sorted(recorder.latencies.items()):
+        latencies.sort()
+        statuses = recorder.statuses[route]
+        count = len(latencies)
+        # Ошибки — 5xx кроме отказов допуска и обрывы соединения
+        route_errors = sum(n for status, n in statuses.items()
+                           if not status.isdigit()
+                           or (status.startswith("5") and status != "503"))
+        shed = statuses.get("503", 0)
+        endpoints[route] = {
+            "count": count,
+            "throughput": round(count / elapsed, 2),
+            **{f"p{p}_ms": round(percentile(latencies, p) * 1000, 2)
+               for p in PERCENTILES},
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "error_rate": round(route_errors / count, 4),
+            "shed_rate": round(shed / count, 4),
+            "statuses": statuses,
+        }
+        total += count
+        errors += route_errors
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "revision": git_revision(),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": args.mix,
+            "depths": args.depths,
+            "workers": args.workers,
+            "tree": [args.fanout, args.depth, args.employees],
+        },
+        "elapsed_seconds": round(elapsed, 2),
+        "total": {
+            "count": total,
+            "throughput": round(total / elapsed, 2),
+            "error_rate": round(errors / total, 4) if total else 0,
+        },
+        "endpoints": endpoints,
+        "pool": summarize_pool(pool_samples),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report: dict, baseline: dict = None):
+    header = (f"{'route':34} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} "
+              f"{'err':>7} {'shed':>7}")
+    print(header)
+    for route, stats in report["endpoints"].items():
+        line = (f"{route:34} {stats['throughput']:8.1f} "
+                f"{stats['p50_ms']:8.1f} {stats['p95_ms']:8.1f} "
+                f"{stats['p99_ms']:8.1f} {stats['error_rate']:7.2%} "
+                f"{stats['shed_rate']:7.2%}")
+        old = (baseline or {}).get("endpoints", {}).get(route)
+        if old:
+            line += (f"   p95 {_change(old['p95_ms'], stats['p95_ms'])}, "
+                     f"req/s {_change(old['throughput'], stats['throughput'])}")
+        print(line)
+    total = report["total"]
+    print(f"total: {total['count']} requests, {total['throughput']:.1f} req/s, "
+          f"errors {total['error_rate']:.2%}")
+    pool = report["pool"]
+    if pool.get("samples"):
+        print(f"pool: {pool['checked_out_mean']} mean / "
+              f"{pool['checked_out_max']:.0f} max of {pool['capacity']:.0f} "
+              f"connections, saturated {pool['saturated_fraction']:.1%} "
+              f"of samples, admission queue max "
+              f"{pool['admission_queue_max']:.0f}")
+    if baseline:
+        print(f"baseline: {baseline['revision']} at {baseline['created_at']}")
+
+
+def _change(old: float, new: float) -> str:
+    if not old:
+        return "n/a"
+    return f"{(new - old) / old:+.0%}"
+
+
+def save_report(report: dict, directory: Path) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+    path = directory / f"loadgen-{stamp}-{report['revision']}.json"
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+    return path
+
+
+async def drive(args, client: httpx.AsyncClient) -> dict:
+    headers, ids = await seed_organization(client, args.fanout, args.depth,
+                                           args.employees)
+    print(f"Seeded {len(ids)} departments in org {headers['X-Org-Id']}")
+
+    recorder = Recorder()
+    names = list(args.mix)
+    weights = [args.mix[name] for name in names]
+
+    async def worker(seed: int, deadline: float):
+        load = LoadClient(client, recorder, headers, ids, args.depths,
+                          random.Random(seed))
+        while time.perf_counter() < deadline:
+            operation = load.rng.choices(names, weights)[0]
+            await getattr(load, operation)()
+
+    pool_samples: list[dict] = []
+    sampler = asyncio.create_task(
+        sample_pool(client, recorder, args.sample_interval, pool_samples)
+    )
+    try:
+        started = time.perf_counter()
+        measure_from = started + args.warmup
+        deadline = measure_from + args.duration
+
+        async def enable():
+            await asyncio.sleep(args.warmup)
+            recorder.enabled = True
+
+        await asyncio.gather(enable(), *(worker(args.seed + i, deadline)
+                                         for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - measure_from
+    finally:
+        sampler.cancel()
+    return build_report(args, recorder, elapsed, pool_samples)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 2)
+    base = args.url or f"http://127.0.0.1:{args.port}"
+    server = None
+    if args.url is None:
+        env = dict(os.environ, SERVER_PORT=str(args.port),
+                   SERVER_WORKERS=str(args.workers))
+        server = subprocess.Popen([sys.executable, "-m", "app.server"],
+                                  env=env, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+    try:
+        async with httpx.AsyncClient(base_url=base, timeout=args.timeout,
+                                     limits=limits) as client:
+            await wait_for_first_response(client, "/metrics", 60)
+            report = await drive(args, client)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    baseline = (json.loads(Path(args.compare).read_text())
+                if args.compare else None)
+    print_report(report, baseline)
+    if not args.no_save:
+        print(f"Report saved to {save_report(report, Path(args.report_dir))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None,
+                        help="адрес запущенного сервиса вместо запуска своего")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    parser.add_argument("--depths", type=lambda v: [int(d) for d in v.split(",")],
+                        default=[1, 2, 3, 5])
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--employees", type=int, default=3)
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--report-dir", default=str(REPORT_DIR))
+    parser.add_argument("--compare", default=None,
+                        help="JSON-отчёт прошлого прогона для сравнения")
+    parser.add_argument("--no-save", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Старт и задержка чтения: SQLite-режим против Postgres.
+
+Для каждой базы запускает ``python -m app.server`` (один воркер, без gRPC)
+и замеряет время от запуска процесса до первого ответа, заполняет дерево
+через API и замеряет GET /departments/{id} последовательно и под
+нагрузкой. Файл SQLite удаляется перед прогоном, поэтому его старт
+включает создание схемы.
+
+    python -m benchmarks.sqlite_mode --sqlite-url sqlite+aiosqlite:///./bench.db
+
+Postgres берётся из DATABASE_URL настроек (миграции должны быть применены).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from sqlalchemy.engine import make_url
+
+from app.config import get_settings
+from benchmarks.startup import timed_get, wait_for_first_response
+
+
+def remove_sqlite_files(url: str):
+    database = make_url(url).database
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{database}{suffix}").unlink(missing_ok=True)
+
+
+async def seed_tree(client: httpx.AsyncClient, fanout: int, depth: int,
+                    employees: int) -> int:
+    async def post(url: str, payload: dict) -> dict:
+        response = await client.post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    root = await post("/departments/", {"name": f"bench-{time.time_ns()}"})
+    level = [root["id"]]
+    ids = list(level)
+    for _ in range(depth - 1):
+        children = await asyncio.gather(*(
+            post("/departments/", {"name": f"d{i}", "parent_id": parent_id})
+            for parent_id in level for i in range(fanout)
+        ))
+        level = [child["id"] for child in children]
+        ids.extend(level)
+    await asyncio.gather(*(
+        post(f"/departments/{dept_id}/employees/",
+             {"full_name": f"Employee {i}", "position": "Engineer"})
+        for dept_id in ids for i in range(employees)
+    ))
+    return root["id"]
+
+
+def percentile(values: list[float], share: float) -> float:
+    return sorted(values)[min(int(len(values) * share), len(values) - 1)]
+
+
+async def bench(name: str, url: str, args) -> dict:
+    env = dict(os.environ, DATABASE_URL=url, SERVER_PORT=str(args.port),
+               SERVER_WORKERS="1", GRPC_ENABLED="false")
+    base = f"http://127.0.0.1:{args.port}"
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, "-m", "app.server"],
+                                  env=env, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        try:
+            first = await wait_for_first_response(
+                client, "/departments/batch?ids=0", 60
+            )
+            root_id = await seed_tree(client, args.fanout, args.depth,
+                                      args.employees)
+            tree_url = (f"/departments/{root_id}?depth={args.depth}"
+                        f"&include_employees=true")
+            for _ in range(20):
+                await timed_get(client, tree_url)
+            sequential = [await timed_get(client, tree_url)
+                          for _ in range(args.repeat)]
+
+            concurrent: list[float] = []
+
+            async def worker(deadline):
+                while time.perf_counter() < deadline:
+                    concurrent.append(await timed_get(client, tree_url))
+
+            deadline = time.perf_counter() + args.duration
+            await asyncio.gather(*(worker(deadline)
+                                   for _ in range(args.concurrency)))
+        finally:
+            server.terminate()
+            server.wait()
+    return {
+        "name": name,
+        "startup": first - started,
+        "p50": statistics.median(sequential) * 1000,
+        "p99": percentile(sequential, 0.99) * 1000,
+        "rps": len(concurrent) / args.duration,
+        "loaded_p50": statistics.median(concurrent) * 1000,
+        "loaded_p99": percentile(concurrent, 0.99) * 1000,
+    }
+
+
+async def run(args):
+    remove_sqlite_files(args.sqlite_url)
+    results = [await bench("postgres", get_settings().DATABASE_URL, args),
+               await bench("sqlite", args.sqlite_url, args)]
+    remove_sqlite_files(args.sqlite_url)
+    nodes = sum(args.fanout ** level for level in range(args.depth))
+    print(f"tree: {nodes} departments, {nodes * args.employees} employees")
+    print(f"{'':10}{'startup':>10}{'p50':>10}{'p99':>10}"
+          f"{'req/s':>10}{'load p50':>10}{'load p99':>10}")
+    for r in results:
+        print(f"{r['name']:10}{r['startup']:>9.2f}s{r['p50']:>8.1f}ms"
+              f"{r['p99']:>8.1f}ms{r['rps']:>10.0f}{r['loaded_p50']:>8.1f}ms"
+              f"{r['loaded_p99']:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sqlite-url", default="sqlite+aiosqlite:///./bench.db")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--employees", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Холодный старт и пропускная способность продакшн-режима.
+
+Запускает ``python -m app.server`` с заданными настройками, замеряет время
+от запуска процесса до первого ответа и до первого «быстрого» ответа
+(не медленнее прогретого медианного более чем в FAST_FACTOR раз),
+затем — пропускную способность GET /departments/{id} под нагрузкой.
+
+    python -m benchmarks.startup --workers 4 --prewarm 5
+
+Нужна база с применёнными миграциями (alembic upgrade head).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+FAST_FACTOR = 1.5
+
+
+async def wait_for_first_response(client: httpx.AsyncClient, url: str,
+                                  timeout: float) -> float:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.get(url)
+            if response.status_code < 500:
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.01)
+    raise TimeoutError(f"Server did not answer {url} in {timeout}s")
+
+
+async def timed_get(client: httpx.AsyncClient, url: str) -> float:
+    started = time.perf_counter()
+    response = await client.get(url)
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run(args):
+    env = dict(os.environ,
+               SERVER_PORT=str(args.port),
+               SERVER_WORKERS=str(args.workers),
+               SERVER_LOOP=args.loop,
+               SERVER_HTTP=args.http,
+               DB_POOL_PREWARM=str(args.prewarm))
+    base = f"http://127.0.0.1:{args.port}"
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, "-m", "app.server"],
+                                  env=env, stdout=subprocess.DEVNULL,
+                                  stderr=subprocess.DEVNULL)
+        try:
+            probe = "/departments/batch?ids=0"
+            first = await wait_for_first_response(client, probe, 60)
+
+            # Первые запросы к «горячему» эндпоинту после старта
+            url = f"/departments/{args.department_id}?depth={args.depth}"
+            cold = []
+            for _ in range(20):
+                cold.append((time.perf_counter(), await timed_get(client, url)))
+            warm = [await timed_get(client, url) for _ in range(200)]
+            warm_median = statistics.median(warm)
+            first_fast = next(
+                (at for at, latency in cold
+                 if latency <= warm_median * FAST_FACTOR),
+                None
+            )
+
+            latencies = []
+
+            async def worker(deadline):
+                while time.perf_counter() < deadline:
+                    latencies.append(await timed_get(client, url))
+
+            deadline = time.perf_counter() + args.duration
+            await asyncio.gather(*(worker(deadline)
+                                   for _ in range(args.concurrency)))
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"workers={args.workers} loop={args.loop} http={args.http} "
+          f"prewarm={args.prewarm}")
+    print(f"  start -> first response:      {first - started:.3f}s")
+    if first_fast is not None:
+        print(f"  start -> first fast response: {first_fast - started:.3f}s")
+    print(f"  first hot request latency:    {cold[0][1] * 1000:.1f}ms "
+          f"(warm median {warm_median * 1000:.1f}ms)")
+    print(f"  throughput: {len(latencies) / args.duration:.0f} req/s, "
+          f"p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99)] * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--loop", default="auto")
+    parser.add_argument("--http", default="auto")
+    parser.add_argument("--prewarm", type=int, default=0)
+    parser.add_argument("--department-id", type=int, default=1)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
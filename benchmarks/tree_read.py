@@ -0,0 +1,116 @@
+"""Стоимость чтения дерева GET /departments/{id}.
+
+Создаёт синтетическое подразделение (fanout^depth узлов, по N сотрудников
+в каждом) и замеряет для include_employees=true/false число SQL-запросов,
+время ответа и пиковую память Python на запрос. Приложение вызывается
+в процессе через ASGI, без сети.
+
+    python -m benchmarks.tree_read --fanout 5 --depth 5 --employees 10
+
+Использует DATABASE_URL из настроек и создаёт таблицы при необходимости.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+import uuid
+from datetime import date
+
+import httpx
+from sqlalchemy import event, insert
+
+from app.database import Base, get_database
+from app.main import app
+from app.models import DEFAULT_ORG_ID, Department, Employee
+
+
+async def seed_tree(fanout: int, depth: int, employees: int) -> int:
+    database = get_database()
+    async with database.engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with database.session_factory() as db:
+        root = Department(org_id=DEFAULT_ORG_ID,
+                          name=f"bench-{uuid.uuid4().hex[:8]}")
+        db.add(root)
+        await db.flush()
+        level = [root.id]
+        all_ids = [root.id]
+        for _ in range(depth - 1):
+            rows = [{"org_id": DEFAULT_ORG_ID, "name": f"d{i}",
+                     "parent_id": parent_id}
+                    for parent_id in level for i in range(fanout)]
+            result = await db.execute(
+                insert(Department).returning(Department.id), rows
+            )
+            level = list(result.scalars())
+            all_ids.extend(level)
+        await db.execute(insert(Employee), [
+            {"org_id": DEFAULT_ORG_ID, "department_id": dept_id,
+             "full_name": f"Employee {i}",
+             "position": "Engineer", "hired_at": date(2020, 1, 1)}
+            for dept_id in all_ids for i in range(employees)
+        ])
+        await db.commit()
+        print(f"Seeded {len(all_ids)} departments, "
+              f"{len(all_ids) * employees} employees under id={root.id}")
+        return root.id
+
+
+async def measure(client, url: str, repeat: int):
+    queries = 0
+
+    def count(*args):
+        nonlocal queries
+        queries += 1
+
+    sync_engine = get_database().engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", count)
+    try:
+        timings = []
+        peaks = []
+        for _ in range(repeat):
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = await client.get(url)
+            timings.append(time.perf_counter() - started)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            response.raise_for_status()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", count)
+    return (queries / repeat, statistics.median(timings),
+            statistics.median(peaks), len(response.content))
+
+
+async def run(args):
+    root_id = args.root_id or await seed_tree(args.fanout, args.depth,
+                                              args.employees)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        for include in ("true", "false"):
+            url = (f"/departments/{root_id}?depth={args.depth}"
+                   f"&include_employees={include}")
+            await client.get(url)
+            queries, latency, peak, size = await measure(client, url,
+                                                         args.repeat)
+            print(f"include_employees={include}: {queries:.0f} queries, "
+                  f"{latency * 1000:.0f} ms, peak {peak / 2**20:.1f} MiB, "
+                  f"{size / 1024:.0f} KiB response")
+    await get_database().dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fanout", type=int, default=5)
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--employees", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--root-id", type=int, default=None,
+                        help="использовать существующее подразделение")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,32 @@ import asyncio
 import pytest
 from typing import AsyncGenerator
 from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.database import Base
+from app.database import Base, make_engine
 from app.deps import get_db
-from app.config import settings
+from app.hierarchy import hierarchy_index
+from app.routers.analytics import analytics_cache
+from app.routers.departments import get_read_cache
+from app.config import get_settings
 
-TEST_DATABASE_URL = settings.DATABASE_URL
+TEST_DATABASE_URL = get_settings().DATABASE_URL
 
-engine = create_async_engine(TEST_DATABASE_URL, echo=False, poolclass=NullPool)
+engine = make_engine(TEST_DATABASE_URL, echo=False, poolclass=NullPool)
 TestingSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
 
+def pytest_collection_modifyitems(config, items):
+    if engine.dialect.name == "postgresql":
+        return
+    skip = pytest.mark.skip(reason="только для Postgres")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     loop = asyncio.new_event_loop()
@@ -58,6 +70,11 @@ async def client(db_session) -> AsyncGenerator[AsyncClient, None]:
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
+    # Версии данных откатываемых тестов повторяются: кэш из прошлого теста
+    # не должен отвечать на чтения этого
+    get_read_cache().clear()
+    analytics_cache.clear()
+    hierarchy_index.clear()
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app import deps
+from app.admission import (AdmissionController, AdmissionRejected, CostClass,
+                           admission_shed)
+
+
+@pytest.mark.asyncio
+async def test_cost_class_queue_and_handoff():
+    cost_class = CostClass("heavy", limit=1, max_queue=1, queue_timeout=1)
+    await cost_class.acquire()
+
+    waiter = asyncio.create_task(cost_class.acquire())
+    await asyncio.sleep(0)
+    assert cost_class.queued == 1
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await cost_class.acquire()
+    assert exc_info.value.reason == "queue_full"
+
+    # Слот передаётся ожидающему, счётчик активных не меняется
+    cost_class.release()
+    await waiter
+    assert (cost_class.active, cost_class.queued) == (1, 0)
+    cost_class.release()
+    assert cost_class.active == 0
+
+
+@pytest.mark.asyncio
+async def test_cost_class_queue_timeout():
+    cost_class = CostClass("heavy", limit=1, max_queue=4, queue_timeout=0.05)
+    await cost_class.acquire()
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await cost_class.acquire()
+    assert exc_info.value.reason == "timeout"
+    assert cost_class.queued == 0
+
+    cost_class.release()
+    await cost_class.acquire()
+    assert cost_class.active == 1
+
+
+@pytest.fixture
+def saturated_controller(monkeypatch):
+    controller = AdmissionController(
+        route_classes={"GET /departments/{id}": "heavy"},
+        limits={"heavy": 1}, queue_sizes={"heavy": 0},
+        queue_timeout=1, shallow_depth=2,
+    )
+    monkeypatch.setattr(deps, "get_admission_controller", lambda: controller)
+    return controller
+
+
+@pytest.mark.asyncio
+async def test_heavy_requests_shed_cheap_admitted(client: AsyncClient,
+                                                  saturated_controller):
+    response = await client.post("/departments/", json={"name": "Admission"})
+    dept_id = response.json()["id"]
+
+    await saturated_controller.acquire("heavy")
+    try:
+        before = admission_shed.value(cost_class="heavy", reason="queue_full")
+        response = await client.get(f"/departments/{dept_id}?depth=5")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert admission_shed.value(cost_class="heavy",
+                                    reason="queue_full") == before + 1
+
+        # Неглубокое чтение того же маршрута и дешёвые запросы проходят
+        response = await client.get(f"/departments/{dept_id}?depth=1")
+        assert response.status_code == 200
+        response = await client.get(f"/departments/{dept_id}/path")
+        assert response.status_code == 200
+    finally:
+        saturated_controller.release("heavy")
+
+    response = await client.get(f"/departments/{dept_id}?depth=5")
+    assert response.status_code == 200
+    assert saturated_controller.classes["heavy"].active == 0
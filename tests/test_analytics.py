@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from app.routers import analytics
+
+
+async def create_org(client: AsyncClient, name: str) -> dict:
+    response = await client.post("/organizations/", json={"name": name})
+    return {"X-Org-Id": str(response.json()["id"])}
+
+
+async def hire(client: AsyncClient, headers: dict, dept_id: int, position: str,
+               hired_at=None):
+    response = await client.post(f"/departments/{dept_id}/employees/",
+                                 json={"full_name": "Employee", "position": position,
+                                       "hired_at": hired_at},
+                                 headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.fixture
+async def org_tree(client: AsyncClient):
+    headers = await create_org(client, "Analytics")
+
+    async def create(name, parent_id=None):
+        response = await client.post("/departments/", json={"name": name, "parent_id": parent_id},
+                                     headers=headers)
+        return response.json()["id"]
+
+    root = await create("Root")
+    dev = await create("Dev", root)
+    backend = await create("Backend", dev)
+    sales = await create("Sales", root)
+    await hire(client, headers, root, "CEO", "2020-01-15")
+    await hire(client, headers, dev, "Engineer", "2021-03-01")
+    await hire(client, headers, backend, "Engineer", "2021-03-20")
+    await hire(client, headers, backend, "Manager")
+    await hire(client, headers, sales, "Manager", "2022-07-04")
+    return headers, {"root": root, "dev": dev, "backend": backend, "sales": sales}
+
+
+@pytest.mark.asyncio
+async def test_headcount_by_position(client: AsyncClient, org_tree):
+    headers, ids = org_tree
+    response = await client.get("/analytics/headcount", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "department_id": None,
+        "total": 5,
+        "positions": [{"position": "Engineer", "headcount": 2},
+                      {"position": "Manager", "headcount": 2},
+                      {"position": "CEO", "headcount": 1}],
+    }
+
+    response = await client.get(f"/analytics/headcount?department_id={ids['dev']}",
+                                headers=headers)
+    assert response.json()["positions"] == [{"position": "Engineer", "headcount": 2},
+                                            {"position": "Manager", "headcount": 1}]
+
+
+@pytest.mark.asyncio
+async def test_hire_cohorts(client: AsyncClient, org_tree):
+    headers, ids = org_tree
+    response = await client.get(f"/analytics/hire-cohorts?department_id={ids['root']}",
+                                headers=headers)
+    assert response.status_code == 200
+    assert response.json()["cohorts"] == [
+        {"month": "2020-01-01", "hired": 1},
+        {"month": "2021-03-01", "hired": 2},
+        {"month": "2022-07-01", "hired": 1},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_tenure_by_subtree(client: AsyncClient, org_tree):
+    headers, ids = org_tree
+    response = await client.get(f"/analytics/tenure?department_id={ids['root']}",
+                                headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+
+    today = date.today()
+    days = {name: (today - date.fromisoformat(value)).days
+            for name, value in [("ceo", "2020-01-15"), ("dev", "2021-03-01"),
+                                ("backend", "2021-03-20"), ("sales", "2022-07-04")]}
+    assert data["headcount"] == 5
+    assert data["avg_tenure_days"] == pytest.approx(sum(days.values()) / 4)
+    assert data["subtrees"] == [
+        {"department_id": ids["dev"], "name": "Dev", "headcount": 3,
+         "avg_tenure_days": pytest.approx((days["dev"] + days["backend"]) / 2)},
+        {"department_id": ids["sales"], "name": "Sales", "headcount": 1,
+         "avg_tenure_days": pytest.approx(days["sales"])},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reports_follow_changes(client: AsyncClient, org_tree):
+    headers, ids = org_tree
+    url = f"/analytics/headcount?department_id={ids['sales']}"
+    response = await client.get(url, headers=headers)
+    assert response.json()["total"] == 1
+
+    await hire(client, headers, ids["sales"], "Manager", "2023-01-01")
+    response = await client.get(url, headers=headers)
+    assert response.json()["total"] == 2
+
+    response = await client.get("/analytics/tenure?department_id=999999", headers=headers)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_tenure_follows_date(client: AsyncClient, org_tree, monkeypatch):
+    headers, ids = org_tree
+    url = f"/analytics/tenure?department_id={ids['sales']}"
+    today = date.today()
+    monkeypatch.setattr(analytics, "_today", lambda: today)
+    response = await client.get(url, headers=headers)
+    days = response.json()["avg_tenure_days"]
+    assert days == (today - date(2022, 7, 4)).days
+
+    # Без изменений данных отчёт следующего дня пересчитывается
+    monkeypatch.setattr(analytics, "_today", lambda: today + timedelta(days=1))
+    response = await client.get(url, headers=headers)
+    assert response.json()["avg_tenure_days"] == days + 1
@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import get_settings
+from app.crud import change as change_crud
+from app.models import DEFAULT_ORG_ID, ChangeLogEntry
+
+
+@pytest.fixture
+def no_gap_grace(monkeypatch):
+    # Откатанные транзакции других тестов оставляют дыры в id
+    monkeypatch.setattr(get_settings(), "CHANGE_FEED_GAP_GRACE_SECONDS", 0)
+
+
+async def read_all_changes(client: AsyncClient, since: int):
+    changes = []
+    while True:
+        response = await client.get(f"/changes?since={since}&limit=2")
+        assert response.status_code == 200
+        data = response.json()
+        changes.extend(data["changes"])
+        since = data["next_cursor"]
+        if not data["has_more"]:
+            return changes, since
+
+
+@pytest.mark.asyncio
+async def test_change_feed_records_mutations(client: AsyncClient, no_gap_grace):
+    _, cursor = await read_all_changes(client, 0)
+
+    root_resp = await client.post("/departments/", json={"name": "Feed Root"})
+    root_id = root_resp.json()["id"]
+    child_resp = await client.post("/departments/", json={"name": "Feed Child", "parent_id": root_id})
+    child_id = child_resp.json()["id"]
+    emp_resp = await client.post(f"/departments/{child_id}/employees/",
+                                 json={"full_name": "Jane", "position": "Dev"})
+    emp_id = emp_resp.json()["id"]
+    await client.patch(f"/departments/{child_id}", json={"name": "Renamed"})
+    await client.delete(f"/departments/{root_id}?mode=cascade")
+
+    changes, cursor = await read_all_changes(client, cursor)
+    assert [(c["entity"], c["entity_id"], c["op"]) for c in changes] == [
+        ("department", root_id, "create"),
+        ("department", child_id, "create"),
+        ("employee", emp_id, "create"),
+        ("department", child_id, "update"),
+        ("employee", emp_id, "delete"),
+        ("department", child_id, "delete"),
+        ("department", root_id, "delete"),
+    ]
+    assert changes[3]["data"]["name"] == "Renamed"
+
+    response = await client.get(f"/changes?since={cursor}")
+    assert response.json() == {"changes": [], "next_cursor": cursor, "has_more": False}
+
+
+@pytest.mark.asyncio
+async def test_change_feed_reassign(client: AsyncClient, no_gap_grace):
+    _, cursor = await read_all_changes(client, 0)
+    src_resp = await client.post("/departments/", json={"name": "Source"})
+    src_id = src_resp.json()["id"]
+    tgt_resp = await client.post("/departments/", json={"name": "Target"})
+    tgt_id = tgt_resp.json()["id"]
+    await client.post(f"/departments/{src_id}/employees/",
+                      json={"full_name": "Bob", "position": "Dev"})
+    _, cursor = await read_all_changes(client, cursor)
+
+    await client.delete(f"/departments/{src_id}?mode=reassign&reassign_to_department_id={tgt_id}")
+
+    changes, _ = await read_all_changes(client, cursor)
+    assert [(c["entity"], c["op"]) for c in changes] == [
+        ("employee", "update"),
+        ("department", "delete"),
+    ]
+    assert changes[0]["data"]["department_id"] == tgt_id
+
+
+@pytest.mark.asyncio
+async def test_change_feed_waits_for_fresh_gap(db_session):
+    change_crud.record_change(db_session, DEFAULT_ORG_ID, "department", 1, "create")
+    change_crud.record_change(db_session, DEFAULT_ORG_ID, "department", 1, "update")
+    await db_session.flush()
+    result = await db_session.execute(
+        ChangeLogEntry.__table__.select().order_by(ChangeLogEntry.id.desc()).limit(2)
+    )
+    last_id, first_id = [row.id for row in result]
+
+    # Запись first_id ещё «не видна»: читатель не должен перескочить дыру
+    changes, has_more = await change_crud.get_changes(
+        db_session, DEFAULT_ORG_ID, first_id - 2, 10, timedelta(seconds=30)
+    )
+    assert changes == [] and has_more
+
+    changes, has_more = await change_crud.get_changes(
+        db_session, DEFAULT_ORG_ID, first_id - 1, 10, timedelta(seconds=30)
+    )
+    assert [c.id for c in changes] == [first_id, last_id]
+
+
+@pytest.mark.asyncio
+async def test_change_log_compaction(client: AsyncClient, db_session, no_gap_grace):
+    _, cursor = await read_all_changes(client, 0)
+    resp = await client.post("/departments/", json={"name": "Compact"})
+    dept_id = resp.json()["id"]
+    await client.patch(f"/departments/{dept_id}", json={"name": "Compact 2"})
+    stable = await client.post("/departments/", json={"name": "Stable"})
+    stable_id = stable.json()["id"]
+    other = await client.post("/departments/", json={"name": "Gone"})
+    await client.delete(f"/departments/{other.json()['id']}")
+
+    now = datetime.now(timezone.utc)
+    future = now + timedelta(minutes=1)
+    await change_crud.compact_change_log(db_session, compact_before=future,
+                                         purge_before=now - timedelta(days=1))
+    await db_session.commit()
+
+    changes, _ = await read_all_changes(client, cursor)
+    assert [(c["entity_id"], c["op"]) for c in changes] == [
+        (dept_id, "update"),
+        (stable_id, "create"),
+        (other.json()["id"], "delete"),
+    ]
+
+    # Удаления за пределами срока хранения стираются: отставший
+    # потребитель должен выполнить полную синхронизацию
+    await change_crud.compact_change_log(db_session, compact_before=future,
+                                         purge_before=future)
+    await db_session.commit()
+    seen = changes[0]["id"]
+    response = await client.get(f"/changes?since={seen}")
+    assert response.status_code == 410
+    gone = response.json()
+    horizon = await change_crud.get_change_horizon(db_session, DEFAULT_ORG_ID)
+    assert gone["horizon"] == horizon > seen
+    assert gone["next_cursor"] >= horizon
+
+    # После полной синхронизации лента продолжается с next_cursor
+    await client.patch(f"/departments/{dept_id}", json={"name": "Compact 3"})
+    changes, _ = await read_all_changes(client, gone["next_cursor"])
+    assert changes[-1]["data"]["name"] == "Compact 3"
+
+    # since=0 возвращает всю сохранённую историю: последнее состояние
+    # подразделения, не менявшегося после компакции, лежит ниже горизонта
+    changes, _ = await read_all_changes(client, 0)
+    latest = {c["entity_id"]: c for c in changes}
+    assert latest[stable_id]["id"] < horizon
+    assert latest[stable_id]["data"]["name"] == "Stable"
+    assert latest[dept_id]["data"]["name"] == "Compact 3"
+
+
+@pytest.mark.asyncio
+async def test_change_horizon_is_per_org(client: AsyncClient, db_session,
+                                         no_gap_grace):
+    await client.post("/departments/", json={"name": "Kept"})
+    _, cursor = await read_all_changes(client, 0)
+
+    org = await client.post("/organizations/", json={"name": "Purged"})
+    headers = {"X-Org-Id": str(org.json()["id"])}
+    dept = await client.post("/departments/", json={"name": "Gone"},
+                             headers=headers)
+    await client.delete(f"/departments/{dept.json()['id']}", headers=headers)
+    future = datetime.now(timezone.utc) + timedelta(minutes=1)
+    await change_crud.compact_change_log(db_session, compact_before=future,
+                                         purge_before=future)
+    await db_session.commit()
+
+    # Очистка чужой ленты не сдвигает горизонт этой организации
+    response = await client.get(f"/changes?since={cursor}")
+    assert response.status_code == 200
+    response = await client.get(f"/changes?since={cursor}", headers=headers)
+    assert response.status_code == 410
+
+
+@pytest.mark.asyncio
+async def test_data_version_is_monotonic(client: AsyncClient, db_session):
+    versions = [await change_crud.get_change_version(db_session,
+                                                     DEFAULT_ORG_ID)]
+    dept = (await client.post("/departments/", json={"name": "Versioned"})).json()
+    versions.append(await change_crud.get_change_version(db_session,
+                                                         DEFAULT_ORG_ID))
+    await client.patch(f"/departments/{dept['id']}", json={"name": "Renamed"})
+    versions.append(await change_crud.get_change_version(db_session,
+                                                         DEFAULT_ORG_ID))
+    assert versions == sorted(set(versions))
+
+    # Компакция ленты удаляет записи, но не возвращает прежнюю версию
+    future = datetime.now(timezone.utc) + timedelta(minutes=1)
+    await change_crud.compact_change_log(db_session, compact_before=future,
+                                         purge_before=future)
+    await db_session.commit()
+    assert await change_crud.get_change_version(db_session,
+                                                DEFAULT_ORG_ID) == versions[-1]
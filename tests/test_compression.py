@@ -0,0 +1,80 @@
+import pytest
+from httpx import AsyncClient
+
+from app import compression
+from app.compression import choose_encoding, compressed_responses
+from app.config import get_settings
+from app.crud import department as dept_crud
+
+
+def test_choose_encoding(monkeypatch):
+    monkeypatch.setattr(get_settings(), "COMPRESSION_ENCODINGS",
+                        ["zstd", "br", "gzip"])
+    monkeypatch.setattr(compression, "CODECS",
+                        {"gzip": compression._gzip, "zstd": compression._zstd})
+    assert choose_encoding(None) is None
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0") is None
+    # При равных q — порядок сервера, иначе — больший q клиента
+    assert choose_encoding("gzip, zstd") == "zstd"
+    assert choose_encoding("zstd;q=0.5, gzip") == "gzip"
+    assert choose_encoding("*") == "zstd"
+    assert choose_encoding("*, zstd;q=0") == "gzip"
+    # br не установлен
+    assert choose_encoding("br") is None
+
+
+@pytest.mark.asyncio
+async def test_tree_served_precompressed(client: AsyncClient, monkeypatch):
+    root = (await client.post("/departments/", json={"name": "Compressed"})).json()
+    for i in range(30):
+        await client.post("/departments/", json={"name": f"Team {i}",
+                                                 "parent_id": root["id"]})
+    url = f"/departments/{root['id']}?depth=2"
+    plain = await client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+
+    loads = []
+    encodes = []
+    load_forest = dept_crud.load_department_forest
+    encode = compression._encode
+
+    async def counting_load(*args, **kwargs):
+        loads.append(args)
+        return await load_forest(*args, **kwargs)
+
+    def counting_encode(body, encoding):
+        encodes.append(encoding)
+        return encode(body, encoding)
+
+    monkeypatch.setattr(dept_crud, "load_department_forest", counting_load)
+    monkeypatch.setattr(compression, "_encode", counting_encode)
+    sent = compressed_responses.value(encoding="gzip")
+    for _ in range(2):
+        response = await client.get(url, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert int(response.headers["content-length"]) < len(plain.content)
+        assert response.content == plain.content
+    # Тело взято из кэша, сжатие выполнено один раз на оба ответа
+    assert loads == []
+    assert encodes == ["gzip"]
+    assert compressed_responses.value(encoding="gzip") == sent + 2
+
+    await client.patch(f"/departments/{root['id']}", json={"name": "Renamed"})
+    response = await client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.json()["department"]["name"] == "Renamed"
+    assert len(loads) == 1
+
+
+@pytest.mark.asyncio
+async def test_middleware_compresses_other_responses(client: AsyncClient):
+    response = await client.get("/metrics", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert "compressed_responses_total" in response.text
+
+    small = await client.get("/departments/batch?ids=0",
+                             headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
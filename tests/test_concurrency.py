@@ -0,0 +1,82 @@
+import asyncio
+import random
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+
+from app.database import get_database
+from app.main import app
+from app.models import Department
+
+MOVERS = 16
+MOVES_PER_MOVER = 20
+TREE_SIZE = 40
+
+
+def find_cycle(parents):
+    for start in parents:
+        seen = set()
+        node = start
+        while node is not None:
+            if node in seen:
+                return node
+            seen.add(node)
+            node = parents.get(node)
+    return None
+
+
+@pytest.mark.asyncio
+async def test_parallel_moves_never_create_cycles():
+    """Стресс-тест: много параллельных перемещений через настоящие сессии.
+
+    Без блокировок цепочек предков два встречных перемещения легко
+    проходят проверку цикла одновременно и зацикливают дерево.
+    """
+    prefix = uuid.uuid4().hex[:8]
+    rng = random.Random(7)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        root = await ac.post("/departments/", json={"name": f"{prefix}-root"})
+        root_id = root.json()["id"]
+        ids = [root_id]
+        for i in range(TREE_SIZE):
+            resp = await ac.post("/departments/", json={
+                "name": f"{prefix}-{i}", "parent_id": rng.choice(ids)
+            })
+            assert resp.status_code == 200
+            ids.append(resp.json()["id"])
+        movable = ids[1:]
+
+        statuses = []
+
+        async def mover(seed):
+            mover_rng = random.Random(seed)
+            for _ in range(MOVES_PER_MOVER):
+                dept_id = mover_rng.choice(movable)
+                parent_id = mover_rng.choice(ids)
+                resp = await ac.patch(f"/departments/{dept_id}",
+                                      json={"parent_id": parent_id})
+                statuses.append(resp.status_code)
+
+        await asyncio.gather(*(mover(seed) for seed in range(MOVERS)))
+
+        async with get_database().session_factory() as db:
+            result = await db.execute(
+                select(Department.id, Department.parent_id)
+                .where(Department.id.in_(ids))
+            )
+            parents = dict(result.tuples().all())
+
+        assert len(statuses) == MOVERS * MOVES_PER_MOVER
+        assert set(statuses) <= {200, 400, 409}
+        assert find_cycle(parents) is None
+        assert statuses.count(200) > 0
+
+        # Корень мог оказаться под другим узлом — удаляем все корни набора
+        for dept_id, parent_id in parents.items():
+            if parent_id is None or parent_id not in parents:
+                resp = await ac.delete(f"/departments/{dept_id}")
+                assert resp.status_code == 200
+    await get_database().dispose()
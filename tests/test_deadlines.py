@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.config import get_settings
+from app.database import Database
+from app.deadlines import (CancelOnDisconnectMiddleware, is_timeout_error,
+                           requests_cancelled, resolve_timeouts)
+
+
+def test_resolve_timeouts_per_route(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "ROUTE_DEADLINES",
+                        {"DELETE /departments/{id}": 30000,
+                         "GET /departments/{id}": 500})
+    assert resolve_timeouts("DELETE /departments/{id}") == \
+        (30000, settings.LOCK_TIMEOUT_MS)
+    # lock_timeout не превышает дедлайн маршрута
+    assert resolve_timeouts("GET /departments/{id}") == (500, 500)
+    assert resolve_timeouts("GET /changes")[0] == settings.STATEMENT_TIMEOUT_MS
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_statement_timeout_applied_to_session():
+    database = Database(pool_size=1, max_overflow=0)
+    try:
+        async with database.session_factory() as session:
+            session.info["db_timeouts"] = (100, 100)
+            with pytest.raises(DBAPIError) as exc_info:
+                await session.execute(text("SELECT pg_sleep(2)"))
+            assert is_timeout_error(exc_info.value)
+            await session.rollback()
+
+            # SET LOCAL не переживает транзакцию
+            session.info.pop("db_timeouts")
+            result = await session.execute(text("SHOW statement_timeout"))
+            assert result.scalar() == "0"
+    finally:
+        await database.dispose()
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_disconnect_cancels_query_and_releases_connection():
+    database = Database(pool_size=1, max_overflow=0)
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        async with database.session_factory() as session:
+            started.set()
+            try:
+                await session.execute(text("SELECT pg_sleep(30)"))
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+    async def receive():
+        await started.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        raise AssertionError("response must not be sent")
+
+    scope = {"type": "http", "method": "GET", "path": "/slow"}
+    before = requests_cancelled.value(route="unmatched")
+    try:
+        await asyncio.wait_for(
+            CancelOnDisconnectMiddleware(slow_app)(scope, receive, send), 5
+        )
+        assert cancelled.is_set()
+        assert requests_cancelled.value(route="unmatched") == before + 1
+
+        # Единственное соединение пула вернулось и пригодно для работы
+        async with database.session_factory() as session:
+            assert (await session.execute(text("SELECT 1"))).scalar() == 1
+    finally:
+        await database.dispose()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client: AsyncClient):
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert "requests_cancelled_total" in response.text
+    assert "requests_timed_out_total" in response.text
+    assert "# TYPE db_pool_checked_out gauge" in response.text
@@ -1,5 +1,10 @@
+import base64
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import update
+
+from app.models import DEFAULT_ORG_ID, Department, Organization
 
 
 @pytest.mark.asyncio
@@ -57,6 +62,54 @@ async def test_get_department_with_tree(client: AsyncClient):
     assert len(data["children"][0]["employees"]) == 1
 
 
+@pytest.mark.asyncio
+async def test_wide_department_children_paginated(client: AsyncClient):
+    root_id = (await client.post("/departments/", json={"name": "Wide"})).json()["id"]
+    names = [f"Unit {i:02d}" for i in range(7)]
+    ids = {}
+    for name in reversed(names):
+        resp = await client.post("/departments/",
+                                 json={"name": name, "parent_id": root_id})
+        ids[name] = resp.json()["id"]
+    await client.post("/departments/",
+                      json={"name": "Nested", "parent_id": ids["Unit 00"]})
+
+    # В дереве — первые children_limit детей по имени, число и курсор
+    response = await client.get(f"/departments/{root_id}?depth=2&children_limit=3")
+    data = response.json()
+    assert [child["name"] for child in data["children"]] == names[:3]
+    assert data["children_count"] == 7
+    assert data["children"][0]["children_count"] == 1
+    assert data["children"][0]["children"] == []
+
+    # Остальные — страницами по курсору
+    seen = []
+    cursor = data["children_cursor"]
+    while cursor:
+        response = await client.get(f"/departments/{root_id}/children",
+                                    params={"limit": 3, "cursor": cursor})
+        assert response.status_code == 200
+        page = response.json()
+        seen += [child["name"] for child in page["children"]]
+        cursor = page["next_cursor"]
+    assert seen == names[3:]
+
+    response = await client.get(f"/departments/{root_id}/children?limit=1")
+    [first] = response.json()["children"]
+    assert (first["id"], first["children_count"]) == (ids["Unit 00"], 1)
+
+    response = await client.get(f"/departments/{root_id}/children?cursor=bad")
+    assert response.status_code == 400
+    # Корректный JSON, но не пара (name, id)
+    for payload in (b"5", b"null", b'["x"]', b'["x", true]', b'{"a": 1}'):
+        cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+        response = await client.get(f"/departments/{root_id}/children",
+                                    params={"cursor": cursor})
+        assert response.status_code == 400, payload
+    response = await client.get("/departments/999999/children")
+    assert response.status_code == 404
+
+
 @pytest.mark.asyncio
 async def test_update_department_prevent_cycle(client: AsyncClient):
     # Создаем два отдела: A и B, где B дочерний A
@@ -121,3 +174,154 @@ async def test_delete_department_reassign(client: AsyncClient):
     # Проверяем, что исходный отдел удален
     get_resp = await client.get(f"/departments/{src_id}")
     assert get_resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_departments_batch(client: AsyncClient):
+    root_resp = await client.post("/departments/", json={"name": "Batch Root"})
+    root_id = root_resp.json()["id"]
+    child_resp = await client.post("/departments/", json={"name": "Batch Child", "parent_id": root_id})
+    child_id = child_resp.json()["id"]
+    await client.post(f"/departments/{child_id}/employees/",
+                      json={"full_name": "John Doe", "position": "Developer"})
+
+    # Дочерний отдел запрошен и отдельно, и как часть дерева корня
+    response = await client.get(
+        f"/departments/batch?ids={root_id}&ids={child_id}&ids=999999&depth=2"
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["not_found"] == [999999]
+    root = data["departments"][str(root_id)]
+    assert root["department"]["name"] == "Batch Root"
+    assert root["employees"] == []
+    assert root["children"][0]["name"] == "Batch Child"
+    assert len(root["children"][0]["employees"]) == 1
+    child = data["departments"][str(child_id)]
+    assert child["department"]["parent_id"] == root_id
+    assert len(child["employees"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_departments_batch_without_employees(client: AsyncClient):
+    root_resp = await client.post("/departments/", json={"name": "Batch Root"})
+    root_id = root_resp.json()["id"]
+    await client.post(f"/departments/{root_id}/employees/",
+                      json={"full_name": "Jane", "position": "Manager"})
+
+    response = await client.get(
+        f"/departments/batch?ids={root_id}&include_employees=false"
+    )
+    assert response.status_code == 200
+    root = response.json()["departments"][str(root_id)]
+    assert root["employees"] == []
+    assert root["children"] == []
+
+
+@pytest.mark.asyncio
+async def test_get_department_path(client: AsyncClient):
+    resp_a = await client.post("/departments/", json={"name": "A"})
+    a_id = resp_a.json()["id"]
+    resp_b = await client.post("/departments/", json={"name": "B", "parent_id": a_id})
+    b_id = resp_b.json()["id"]
+    resp_c = await client.post("/departments/", json={"name": "C", "parent_id": b_id})
+    c_id = resp_c.json()["id"]
+
+    response = await client.get(f"/departments/{c_id}/path")
+    assert response.status_code == 200
+    assert [d["id"] for d in response.json()] == [a_id, b_id, c_id]
+
+    response = await client.get(f"/departments/paths?ids={c_id}&ids={a_id}&ids=999999")
+    assert response.status_code == 200
+    data = response.json()
+    assert [d["name"] for d in data["paths"][str(c_id)]] == ["A", "B", "C"]
+    assert [d["name"] for d in data["paths"][str(a_id)]] == ["A"]
+    assert data["not_found"] == [999999]
+
+
+@pytest.mark.asyncio
+async def test_get_department_path_not_found(client: AsyncClient):
+    response = await client.get("/departments/999999/path")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_update_department_prevent_deep_cycle(client: AsyncClient):
+    resp_a = await client.post("/departments/", json={"name": "A"})
+    a_id = resp_a.json()["id"]
+    parent_id = a_id
+    for name in ("B", "C", "D"):
+        resp = await client.post("/departments/", json={"name": name, "parent_id": parent_id})
+        parent_id = resp.json()["id"]
+
+    response = await client.patch(f"/departments/{a_id}", json={"parent_id": parent_id})
+    assert response.status_code == 409
+
+    response = await client.patch(f"/departments/{a_id}", json={"parent_id": 999999})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_departments_lca(client: AsyncClient):
+    resp_root = await client.post("/departments/", json={"name": "Root"})
+    root_id = resp_root.json()["id"]
+    resp_a = await client.post("/departments/", json={"name": "A", "parent_id": root_id})
+    a_id = resp_a.json()["id"]
+    resp_b = await client.post("/departments/", json={"name": "B", "parent_id": root_id})
+    b_id = resp_b.json()["id"]
+    emp_resp = await client.post(f"/departments/{a_id}/employees/",
+                                 json={"full_name": "Jane", "position": "Dev"})
+    emp_id = emp_resp.json()["id"]
+
+    payload = {"pairs": [
+        {"a": {"department_id": a_id}, "b": {"department_id": b_id}},
+        {"a": {"employee_id": emp_id}, "b": {"department_id": b_id}},
+        {"a": {"department_id": a_id}, "b": {"department_id": 999999}},
+    ]}
+    response = await client.post("/departments/lca", json=payload)
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"lca_department_id": root_id, "distance": 2},
+        {"lca_department_id": root_id, "distance": 3},
+        {"lca_department_id": None, "distance": None},
+    ]
+
+    # После перемещения индекс перестраивается
+    await client.patch(f"/departments/{b_id}", json={"parent_id": a_id})
+    response = await client.post("/departments/lca", json=payload)
+    assert response.json()["results"][0] == {"lca_department_id": a_id, "distance": 1}
+
+
+@pytest.mark.asyncio
+async def test_departments_lca_sees_writes_of_other_workers(client: AsyncClient,
+                                                            db_session):
+    root_id = (await client.post("/departments/", json={"name": "Root"})).json()["id"]
+    a_id = (await client.post("/departments/",
+                              json={"name": "A", "parent_id": root_id})).json()["id"]
+    b_id = (await client.post("/departments/",
+                              json={"name": "B", "parent_id": root_id})).json()["id"]
+    payload = {"pairs": [{"a": {"department_id": a_id},
+                          "b": {"department_id": b_id}}]}
+    response = await client.post("/departments/lca", json=payload)
+    assert response.json()["results"][0] == {"lca_department_id": root_id,
+                                             "distance": 2}
+
+    # Перемещение другим воркером: локальной инвалидации нет,
+    # меняется только версия данных организации
+    await db_session.execute(update(Department).where(Department.id == b_id)
+                             .values(parent_id=a_id))
+    await db_session.execute(update(Organization)
+                             .where(Organization.id == DEFAULT_ORG_ID)
+                             .values(data_version=Organization.data_version + 1))
+    await db_session.commit()
+    response = await client.post("/departments/lca", json=payload)
+    assert response.json()["results"][0] == {"lca_department_id": a_id,
+                                             "distance": 1}
+
+
+@pytest.mark.asyncio
+async def test_departments_lca_invalid_ref(client: AsyncClient):
+    payload = {"pairs": [{"a": {"department_id": 1, "employee_id": 1},
+                          "b": {"department_id": 2}}]}
+    response = await client.post("/departments/lca", json=payload)
+    assert response.status_code == 422
@@ -0,0 +1,39 @@
+import sqlite3
+
+from sqlalchemy import BigInteger, Integer, column, select, values
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError
+
+from app.deadlines import is_timeout_error
+from app.dialects import contains_any, month_start
+from app.models import Department
+
+
+def compiled(statement, dialect) -> str:
+    return " ".join(str(statement.compile(dialect=dialect)).split())
+
+
+def test_constructs_compile_per_dialect():
+    gaps = values(column("lo", BigInteger), column("hi", BigInteger),
+                  name="gaps").data([(1, 5), (9, 12)])
+    query = select(gaps.c.lo, gaps.c.hi)
+    assert "AS gaps (lo, hi)" in compiled(query, postgresql.dialect())
+    assert ("(SELECT column1 AS lo, column2 AS hi FROM (VALUES (?, ?), (?, ?))) "
+            "AS gaps") in compiled(query, sqlite.dialect())
+
+    ids = column("ids", Integer)
+    where = contains_any(column("r"), Department.id, ids)
+    assert "@> ANY" in compiled(where, postgresql.dialect())
+    assert "IN (SELECT value FROM json_each(ids))" in compiled(where, sqlite.dialect())
+
+    month = month_start(column("hired_at"))
+    assert "date_trunc('month'" in compiled(month, postgresql.dialect())
+    assert compiled(month, sqlite.dialect()) == "date(hired_at, 'start of month')"
+
+
+def test_sqlite_busy_is_timeout():
+    busy = sqlite3.OperationalError("database is locked")
+    busy.sqlite_errorcode = sqlite3.SQLITE_BUSY
+    assert is_timeout_error(OperationalError("BEGIN IMMEDIATE", None, busy))
+    other = sqlite3.OperationalError("no such table: x")
+    assert not is_timeout_error(OperationalError("SELECT", None, other))
@@ -1,5 +1,15 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.batching import MicroBatcher, write_batches
+from app.config import get_settings
+from app.models import DEFAULT_ORG_ID, ChangeLogEntry
+from app.routers import employees as emp_router
+from app.schemas.employee import EmployeeCreate
 
 
 @pytest.mark.asyncio
@@ -53,4 +63,54 @@ async def test_create_employee_empty_name(client: AsyncClient):
 
     payload = {"full_name": "", "position": "Dev"}
     response = await client.post(f"/departments/{dept_id}/employees/", json=payload)
-    assert response.status_code == 422
\ No newline at end of file
+    assert response.status_code == 422
+
+@pytest.fixture
+def batching(monkeypatch, db_session):
+    @asynccontextmanager
+    async def session():
+        yield db_session
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "EMPLOYEE_BATCHING", True)
+    monkeypatch.setattr(emp_router, "_batch_session", session)
+    batcher = MicroBatcher("test_employee_create", emp_router._create_batch,
+                           window=0.05, max_size=100)
+    monkeypatch.setattr(emp_router, "get_employee_batcher", lambda: batcher)
+    return batcher
+
+
+@pytest.mark.asyncio
+async def test_create_employees_batched(client: AsyncClient, batching,
+                                        db_session):
+    dept_id = (await client.post("/departments/", json={"name": "Onboarding"})).json()["id"]
+
+    # Одновременные создания уходят одним пакетом, каждый получает свою строку
+    payloads = [(dept_id, {"full_name": "Same", "position": "Dev"}),
+                (dept_id, {"full_name": "Same", "position": "Dev"}),
+                (dept_id, {"full_name": " Other ", "position": "QA"}),
+                (999999, {"full_name": "Lost", "position": "Dev"})]
+    results = await asyncio.gather(*(
+        batching.submit((DEFAULT_ORG_ID, target, EmployeeCreate(**payload)))
+        for target, payload in payloads
+    ))
+    assert write_batches.value(batcher="test_employee_create") == 1
+    assert results[3] is None
+    assert results[0]["id"] != results[1]["id"]
+    assert results[2]["full_name"] == "Other"
+
+    response = await client.post(f"/departments/{dept_id}/employees/",
+                                 json={"full_name": "Via API", "position": "Dev"})
+    assert response.status_code == 200
+    assert response.json()["department_id"] == dept_id
+    response = await client.post("/departments/999999/employees/",
+                                 json={"full_name": "Lost", "position": "Dev"})
+    assert response.status_code == 404
+
+    tree = (await client.get(f"/departments/{dept_id}")).json()
+    assert len(tree["employees"]) == 4
+    created = await db_session.scalar(
+        select(func.count()).select_from(ChangeLogEntry)
+        .where(ChangeLogEntry.entity == "employee", ChangeLogEntry.op == "create")
+    )
+    assert created == 4
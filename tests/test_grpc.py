@@ -0,0 +1,78 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+from httpx import AsyncClient
+
+grpc = pytest.importorskip("grpc")
+
+from app.rpc import org_structure_pb2 as pb  # noqa: E402
+from app.rpc import org_structure_pb2_grpc as pb_grpc  # noqa: E402
+from app.rpc.service import add_service, grpc_requests  # noqa: E402
+
+
+@pytest.fixture
+async def stub(db_session):
+    @asynccontextmanager
+    async def session_factory():
+        yield db_session
+
+    server = grpc.aio.server()
+    add_service(server, session_factory)
+    port = server.add_insecure_port("127.0.0.1:0")
+    await server.start()
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+        yield pb_grpc.OrgStructureStub(channel)
+    await server.stop(None)
+
+
+@pytest.mark.asyncio
+async def test_grpc_tree_matches_rest(client: AsyncClient, stub):
+    root = (await client.post("/departments/", json={"name": "RPC Root"})).json()
+    child = (await client.post("/departments/", json={"name": "RPC Child",
+                                                      "parent_id": root["id"]})).json()
+    await client.post(f"/departments/{child['id']}/employees/",
+                      json={"full_name": "Bob", "position": "QA",
+                            "hired_at": "2024-02-01"})
+
+    tree = await stub.GetDepartmentTree(pb.GetDepartmentTreeRequest(
+        id=root["id"], depth=2, include_employees=True
+    ))
+    rest = (await client.get(f"/departments/{root['id']}?depth=2")).json()
+    assert tree.department.name == rest["department"]["name"]
+    assert not tree.department.HasField("parent_id")
+    [node] = tree.children
+    assert node.department.parent_id == root["id"]
+    assert [(e.full_name, e.hired_at) for e in node.employees] == [("Bob", "2024-02-01")]
+    assert tree.children_count == rest["children_count"] == 1
+
+    with pytest.raises(grpc.aio.AioRpcError) as exc_info:
+        await stub.GetDepartmentTree(pb.GetDepartmentTreeRequest(id=999999))
+    assert exc_info.value.code() == grpc.StatusCode.NOT_FOUND
+    # Статус уходит клиенту при abort, счётчик обновляется после
+    await asyncio.sleep(0.05)
+    assert grpc_requests.value(method="GetDepartmentTree", code="NOT_FOUND") >= 1
+
+
+@pytest.mark.asyncio
+async def test_grpc_export_streams(client: AsyncClient, stub, monkeypatch):
+    monkeypatch.setattr("app.rpc.service.EXPORT_BATCH_SIZE", 2)
+    ids = []
+    for i in range(5):
+        dept = (await client.post("/departments/", json={"name": f"Export {i}"})).json()
+        ids.append(dept["id"])
+    await client.post(f"/departments/{ids[0]}/employees/",
+                      json={"full_name": "Carol", "position": "Dev"})
+
+    exported = [dept.id async for dept in
+                stub.ExportDepartments(pb.ExportRequest())]
+    assert exported == sorted(exported)
+    assert set(ids) <= set(exported)
+
+    employees = [emp async for emp in stub.ExportEmployees(pb.ExportRequest())]
+    assert "Carol" in {emp.full_name for emp in employees}
+
+    with pytest.raises(grpc.aio.AioRpcError) as exc_info:
+        async for _ in stub.ExportEmployees(pb.ExportRequest(org_id=999999)):
+            pass
+    assert exc_info.value.code() == grpc.StatusCode.NOT_FOUND
@@ -0,0 +1,40 @@
+import random
+
+from app.hierarchy import HierarchyIndex, resolve_lca
+
+
+def naive_lca(parents, a, b):
+    chain = []
+    while a is not None:
+        chain.append(a)
+        a = parents[a]
+    while b is not None:
+        if b in chain:
+            return b
+        b = parents[b]
+    return None
+
+
+def test_hierarchy_index_matches_naive_walk():
+    rng = random.Random(42)
+    parents = {1: None, 2: None}
+    for dept_id in range(3, 400):
+        parents[dept_id] = rng.choice(list(parents))
+    index = HierarchyIndex(parents.items())
+
+    for _ in range(2000):
+        a, b = rng.choice(list(parents)), rng.choice(list(parents))
+        assert index.lca(a, b) == naive_lca(parents, a, b)
+
+
+def test_resolve_lca_distance():
+    # 1 -> 2 -> 3, 1 -> 4; 5 отдельный корень
+    index = HierarchyIndex([(1, None), (2, 1), (3, 2), (4, 1), (5, None)])
+
+    assert resolve_lca(index, (3, None), (4, None)) == (1, 3)
+    assert resolve_lca(index, (3, None), (2, None)) == (2, 1)
+    assert resolve_lca(index, (3, 10), (4, None)) == (1, 4)
+    assert resolve_lca(index, (3, 10), (3, 11)) == (3, 2)
+    assert resolve_lca(index, (3, 10), (3, 10)) == (3, 0)
+    assert resolve_lca(index, (3, None), (5, None)) == (None, None)
+    assert resolve_lca(index, (3, None), (999, None)) == (None, None)
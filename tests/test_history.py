@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+
+
+async def moment():
+    # Версии получают время flush; пауза разделяет соседние изменения
+    await asyncio.sleep(0.01)
+    at = datetime.now(timezone.utc)
+    await asyncio.sleep(0.01)
+    return at.isoformat()
+
+
+async def tree_at(client: AsyncClient, dept_id: int, as_of: str, depth: int = 2):
+    return await client.get(f"/departments/{dept_id}",
+                            params={"depth": depth, "as_of": as_of})
+
+
+@pytest.mark.asyncio
+async def test_tree_as_of(client: AsyncClient):
+    before_root = await moment()
+    root = (await client.post("/departments/", json={"name": "History Root"})).json()
+    child = (await client.post("/departments/", json={"name": "Team",
+                                                      "parent_id": root["id"]})).json()
+    await client.post(f"/departments/{child['id']}/employees/",
+                      json={"full_name": "Alice", "position": "Dev"})
+    initial = await moment()
+
+    await client.patch(f"/departments/{child['id']}", json={"name": "Renamed Team"})
+    await client.post(f"/departments/{child['id']}/employees/",
+                      json={"full_name": "Bob", "position": "QA"})
+    renamed = await moment()
+
+    await client.delete(f"/departments/{child['id']}?mode=reassign"
+                        f"&reassign_to_department_id={root['id']}")
+    reassigned = await moment()
+
+    response = await tree_at(client, root["id"], initial)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["department"]["name"] == "History Root"
+    assert data["employees"] == []
+    [team] = data["children"]
+    assert team["name"] == "Team"
+    assert [e["full_name"] for e in team["employees"]] == ["Alice"]
+
+    data = (await tree_at(client, root["id"], renamed)).json()
+    [team] = data["children"]
+    assert team["name"] == "Renamed Team"
+    assert [e["full_name"] for e in team["employees"]] == ["Alice", "Bob"]
+
+    data = (await tree_at(client, root["id"], reassigned)).json()
+    assert data["children"] == []
+    assert [e["full_name"] for e in data["employees"]] == ["Alice", "Bob"]
+    assert data == (await client.get(f"/departments/{root['id']}?depth=2")).json()
+
+    response = await tree_at(client, root["id"], before_root)
+    assert response.status_code == 404
+    response = await tree_at(client, child["id"], reassigned)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_batch_as_of(client: AsyncClient):
+    root = (await client.post("/departments/", json={"name": "Batch History"})).json()
+    created = await moment()
+    await client.delete(f"/departments/{root['id']}?mode=cascade")
+
+    response = await client.get("/departments/batch",
+                                params={"ids": [root["id"]], "as_of": created})
+    assert response.status_code == 200
+    assert response.json()["not_found"] == []
+    response = await client.get("/departments/batch", params={"ids": [root["id"]]})
+    assert response.json()["not_found"] == [root["id"]]
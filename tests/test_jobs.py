@@ -0,0 +1,193 @@
+import asyncio
+import uuid
+
+import pytest
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import select
+
+from app import jobs
+from app.config import get_settings
+from app.crud import job as job_crud
+from app.database import get_database
+from app.jobs import job_worker, run_job
+from app.main import app
+from app.models import ChangeLogEntry, Department, Employee
+
+
+@pytest.fixture
+async def live_client(monkeypatch):
+    """Клиент без подмены get_db: задачи работают в своих транзакциях."""
+    monkeypatch.setattr(get_settings(), "JOB_CHUNK_SIZE", 2)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        yield ac
+    await get_database().dispose()
+
+
+async def build_tree(client: AsyncClient, prefix: str):
+    """Корень, 2 ребёнка, у каждого по 2 внука; по 3 сотрудника в узле."""
+    root = (await client.post("/departments/",
+                              json={"name": f"{prefix}-root"})).json()["id"]
+    ids = [root]
+    for i in range(2):
+        child = (await client.post("/departments/", json={
+            "name": f"{prefix}-{i}", "parent_id": root
+        })).json()["id"]
+        ids.append(child)
+        for j in range(2):
+            grandchild = (await client.post("/departments/", json={
+                "name": f"{prefix}-{i}-{j}", "parent_id": child
+            })).json()["id"]
+            ids.append(grandchild)
+    for dept_id in ids:
+        for k in range(3):
+            await client.post(f"/departments/{dept_id}/employees/",
+                              json={"full_name": f"E{k}", "position": "Dev"})
+    return ids
+
+
+async def wait_for_job(client: AsyncClient, job_id: int, timeout: float = 10):
+    for _ in range(int(timeout / 0.05)):
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.05)
+    raise TimeoutError(f"Job {job_id} did not finish")
+
+
+@pytest.mark.asyncio
+async def test_background_cascade_delete(live_client: AsyncClient):
+    ids = await build_tree(live_client, uuid.uuid4().hex[:8])
+    other = (await live_client.post("/departments/", json={
+        "name": f"untouched-{uuid.uuid4().hex[:8]}"
+    })).json()["id"]
+
+    await job_worker.start()
+    try:
+        response = await live_client.delete(f"/departments/{ids[0]}"
+                                            f"?background=true")
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.headers["Location"] == f"/jobs/{job_id}"
+        job = await wait_for_job(live_client, job_id)
+    finally:
+        await job_worker.stop()
+
+    assert job["status"] == "done"
+    assert job["total"] == job["processed"] == 7 + 21
+
+    async with get_database().session_factory() as db:
+        left = await db.scalar(
+            select(Department.id).where(Department.id.in_(ids)).limit(1)
+        )
+        assert left is None
+        deleted = (await db.execute(
+            select(ChangeLogEntry.entity_id)
+            .where(ChangeLogEntry.entity == "department",
+                   ChangeLogEntry.op == "delete",
+                   ChangeLogEntry.entity_id.in_(ids))
+        )).scalars().all()
+        assert sorted(deleted) == sorted(ids)
+
+    assert (await live_client.get(f"/departments/{other}")).status_code == 200
+    await live_client.delete(f"/departments/{other}")
+
+
+@pytest.mark.asyncio
+async def test_background_reassign_delete(live_client: AsyncClient):
+    prefix = uuid.uuid4().hex[:8]
+    ids = await build_tree(live_client, prefix)
+    target = (await live_client.post("/departments/", json={
+        "name": f"{prefix}-target"
+    })).json()["id"]
+
+    response = await live_client.delete(
+        f"/departments/{ids[0]}?mode=reassign"
+        f"&reassign_to_department_id={target}&background=true"
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    await run_job(job_id)
+
+    job = (await live_client.get(f"/jobs/{job_id}")).json()
+    assert job["status"] == "done"
+    # 3 сотрудника, 2 ребёнка и само подразделение
+    assert job["total"] == job["processed"] == 6
+
+    async with get_database().session_factory() as db:
+        moved = await db.scalar(
+            select(Employee.id).where(Employee.department_id == target)
+            .limit(1)
+        )
+        assert moved is not None
+        parents = dict((await db.execute(
+            select(Department.id, Department.parent_id)
+            .where(Department.id.in_(ids[1:]))
+        )).tuples().all())
+    assert (await live_client.get(f"/departments/{ids[0]}")).status_code == 404
+    assert parents[ids[1]] is None and parents[ids[4]] is None
+
+    for dept_id in (ids[1], ids[4], target):
+        assert (await live_client.delete(f"/departments/{dept_id}")
+                ).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_background_reassign_fails_without_target(live_client):
+    prefix = uuid.uuid4().hex[:8]
+    dept = (await live_client.post("/departments/", json={
+        "name": f"{prefix}-dept"
+    })).json()["id"]
+    target = (await live_client.post("/departments/", json={
+        "name": f"{prefix}-target"
+    })).json()["id"]
+
+    response = await live_client.delete(
+        f"/departments/{dept}?mode=reassign"
+        f"&reassign_to_department_id={target}&background=true"
+    )
+    job_id = response.json()["job_id"]
+    await live_client.delete(f"/departments/{target}")
+    await run_job(job_id)
+
+    job = (await live_client.get(f"/jobs/{job_id}")).json()
+    assert job["status"] == "failed"
+    assert job["error"] == "Target department not found"
+    assert (await live_client.get(f"/departments/{dept}")).status_code == 200
+    await live_client.delete(f"/departments/{dept}")
+
+
+@pytest.mark.asyncio
+async def test_job_fails_on_unexpected_error(live_client, monkeypatch):
+    async def broken_step(db, org_id, params, chunk_size):
+        return params["missing"]
+
+    count, _ = jobs.JOB_KINDS[job_crud.DELETE_DEPARTMENT]
+    monkeypatch.setitem(jobs.JOB_KINDS, job_crud.DELETE_DEPARTMENT,
+                        (count, broken_step))
+    dept = (await live_client.post("/departments/", json={
+        "name": f"{uuid.uuid4().hex[:8]}-dept"
+    })).json()["id"]
+    response = await live_client.delete(f"/departments/{dept}?background=true")
+    job_id = response.json()["job_id"]
+    await run_job(job_id)
+
+    job = (await live_client.get(f"/jobs/{job_id}")).json()
+    assert job["status"] == "failed"
+    assert job["error"] == "KeyError('missing')"
+
+    # Неизвестный вид задачи тоже завершает её ошибкой
+    monkeypatch.delitem(jobs.JOB_KINDS, job_crud.DELETE_DEPARTMENT)
+    response = await live_client.delete(f"/departments/{dept}?background=true")
+    job_id = response.json()["job_id"]
+    await run_job(job_id)
+    job = (await live_client.get(f"/jobs/{job_id}")).json()
+    assert job["status"] == "failed"
+    assert job["error"] == f"KeyError('{job_crud.DELETE_DEPARTMENT}')"
+    await live_client.delete(f"/departments/{dept}")
+
+
+@pytest.mark.asyncio
+async def test_job_not_found(client: AsyncClient):
+    response = await client.get("/jobs/999999")
+    assert response.status_code == 404
@@ -0,0 +1,78 @@
+import re
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.config import get_settings
+
+
+@pytest.fixture
+def no_gap_grace(monkeypatch):
+    monkeypatch.setattr(get_settings(), "CHANGE_FEED_GAP_GRACE_SECONDS", 0)
+
+
+async def create_org(client: AsyncClient, name: str) -> dict:
+    response = await client.post("/organizations/", json={"name": name})
+    assert response.status_code == 200
+    return {"X-Org-Id": str(response.json()["id"])}
+
+
+@pytest.mark.asyncio
+async def test_organizations_are_isolated(client: AsyncClient):
+    acme = await create_org(client, "Acme")
+    globex = await create_org(client, "Globex")
+
+    # Имена корней уникальны только внутри организации
+    acme_root = await client.post("/departments/", json={"name": "HQ"}, headers=acme)
+    globex_root = await client.post("/departments/", json={"name": "HQ"}, headers=globex)
+    assert acme_root.status_code == 200
+    assert globex_root.status_code == 200
+    acme_id = acme_root.json()["id"]
+
+    response = await client.get(f"/departments/{acme_id}", headers=globex)
+    assert response.status_code == 404
+    response = await client.post("/departments/", json={"name": "Sub", "parent_id": acme_id},
+                                 headers=globex)
+    assert response.status_code == 400
+
+    response = await client.get(f"/departments/{acme_id}", headers=acme)
+    assert response.status_code == 200
+    assert response.json()["department"]["name"] == "HQ"
+
+    response = await client.post("/organizations/", json={"name": "Acme"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_change_feed_is_per_organization(client: AsyncClient, no_gap_grace):
+    acme = await create_org(client, "Acme Feed")
+    globex = await create_org(client, "Globex Feed")
+
+    root = await client.post("/departments/", json={"name": "Root"}, headers=acme)
+    await client.post("/departments/", json={"name": "Root"}, headers=globex)
+
+    response = await client.get("/changes?since=0", headers=acme)
+    assert response.status_code == 200
+    changes = response.json()["changes"]
+    assert [(c["entity"], c["entity_id"]) for c in changes] == [
+        ("department", root.json()["id"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unknown_organization(client: AsyncClient):
+    response = await client.get("/departments/1", headers={"X-Org-Id": "999999"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Organization not found"
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_queries_touch_single_partition(db_session):
+    result = await db_session.execute(text(
+        "EXPLAIN SELECT * FROM departments WHERE org_id = 7 AND parent_id IS NULL"
+    ))
+    plan = "\n".join(row[0] for row in result)
+    partitions = set(re.findall(r"\bdepartments_p\d+\b", plan))
+    assert len(partitions) == 1
@@ -0,0 +1,76 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import get_settings
+from app.profiling import _before_cursor_execute, profile_store
+
+TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def admin_token(monkeypatch):
+    monkeypatch.setattr(get_settings(), "ADMIN_TOKEN", TOKEN)
+    profile_store.clear()
+    yield TOKEN
+    profile_store.clear()
+
+
+@pytest.mark.asyncio
+async def test_profile_request_by_header(client: AsyncClient, admin_token):
+    dept = (await client.post("/departments/", json={"name": "Profiled"})).json()
+
+    plain = await client.get(f"/departments/{dept['id']}")
+    assert "x-profile-id" not in plain.headers
+    assert not event.contains(Engine, "before_cursor_execute",
+                              _before_cursor_execute)
+    ignored = await client.get(f"/departments/{dept['id']}",
+                               headers={"X-Profile": "wrong"})
+    assert "x-profile-id" not in ignored.headers
+
+    # Другая глубина: повтор того же чтения отдаётся из кэша без запросов
+    response = await client.get(f"/departments/{dept['id']}?depth=2",
+                                headers={"X-Profile": admin_token})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+    assert not event.contains(Engine, "before_cursor_execute",
+                              _before_cursor_execute)
+
+    assert (await client.get("/admin/profiles")).status_code == 403
+    headers = {"X-Admin-Token": admin_token}
+    [summary] = (await client.get("/admin/profiles", headers=headers)).json()
+    assert summary["id"] == profile_id
+    assert summary["route"] == "GET /departments/{id}"
+    assert summary["status"] == 200
+    assert summary["trigger"] == "header"
+
+    report = (await client.get(f"/admin/profiles/{profile_id}",
+                               headers=headers)).json()
+    assert any("departments" in query["statement"] for query in report["queries"])
+    assert report["sql_ms"] == pytest.approx(
+        sum(query["duration_ms"] for query in report["queries"]))
+
+    collapsed = await client.get(f"/admin/profiles/{profile_id}/collapsed",
+                                 headers=headers)
+    for line in collapsed.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+    assert (await client.get("/admin/profiles/missing",
+                             headers=headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_profile_sampled_requests(client: AsyncClient, admin_token,
+                                        monkeypatch):
+    monkeypatch.setattr(get_settings(), "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(get_settings(), "PROFILE_REPORTS_KEPT", 2)
+    for _ in range(3):
+        response = await client.get("/organizations/1")
+        assert "x-profile-id" not in response.headers
+
+    reports = (await client.get("/admin/profiles",
+                                headers={"X-Admin-Token": admin_token})).json()
+    # Запрос к /admin/profiles тоже выбран, но сохраняется после ответа
+    assert len(reports) == 2
+    assert {report["trigger"] for report in reports} == {"sample"}
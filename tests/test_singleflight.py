@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.models import DEFAULT_ORG_ID
+from app.routers import departments as dept_router
+from app.singleflight import SingleFlight, singleflight_coalesced
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight("test_share")
+    release = asyncio.Event()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"value": calls}
+
+    tasks = [asyncio.create_task(flight.do("key", compute)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert flight.in_flight == 1
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert singleflight_coalesced.value(flight="test_share") == 4
+    assert flight.in_flight == 0
+
+    # Завершённое вычисление не кэшируется
+    assert await flight.do("key", compute) == {"value": 2}
+
+
+@pytest.mark.asyncio
+async def test_errors_shared_and_cancelled_leader_replaced():
+    flight = SingleFlight("test_errors")
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise ValueError("boom")
+
+    tasks = [asyncio.create_task(flight.do("key", failing)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+    # Отмена лидера не отменяет ожидающего: он вычисляет сам
+    release.clear()
+
+    async def slow():
+        await release.wait()
+        return "done"
+
+    leader = asyncio.create_task(flight.do("key", slow))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flight.do("key", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await follower == "done"
+    assert leader.cancelled()
+
+
+async def _create_department(client: AsyncClient, name: str) -> int:
+    response = await client.post("/departments/", json={"name": name})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_tree_read_joins_flight_of_same_version(client: AsyncClient,
+                                                      db_session):
+    dept_id = await _create_department(client, "Coalesced")
+    key = await dept_router._read_key(db_session, DEFAULT_ORG_ID, dept_id,
+                                      1, True, None, 100)
+    release = asyncio.Event()
+    shared = {"department": {"id": dept_id, "name": "from leader",
+                             "parent_id": None, "created_at": None},
+              "employees": [], "children": []}
+
+    async def leader_read():
+        await release.wait()
+        return shared
+
+    coalesced = singleflight_coalesced.value(flight="department_tree")
+    leader = asyncio.create_task(dept_router.tree_reads.do(key, leader_read))
+    await asyncio.sleep(0)
+    request = asyncio.create_task(client.get(f"/departments/{dept_id}"))
+    await asyncio.sleep(0.2)
+    release.set()
+    await leader
+    response = await request
+    assert response.json()["department"]["name"] == "from leader"
+    assert (singleflight_coalesced.value(flight="department_tree")
+            == coalesced + 1)
+
+
+@pytest.mark.asyncio
+async def test_tree_read_after_write_skips_stale_flight(client: AsyncClient,
+                                                        db_session):
+    dept_id = await _create_department(client, "Before")
+    stale_key = await dept_router._read_key(db_session, DEFAULT_ORG_ID,
+                                            dept_id, 1, True, None, 100)
+    release = asyncio.Event()
+
+    async def stale_read():
+        await release.wait()
+        return None
+
+    stale = asyncio.create_task(dept_router.tree_reads.do(stale_key,
+                                                          stale_read))
+    await asyncio.sleep(0)
+    response = await client.patch(f"/departments/{dept_id}",
+                                  json={"name": "After"})
+    assert response.status_code == 200
+
+    # Изменение закоммичено до чтения — чтение не ждёт старое вычисление
+    response = await asyncio.wait_for(
+        client.get(f"/departments/{dept_id}"), timeout=5
+    )
+    assert response.status_code == 200
+    assert response.json()["department"]["name"] == "After"
+    release.set()
+    await stale
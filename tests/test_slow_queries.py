@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import get_settings
+from app.slow_queries import is_explainable, normalize_statement, slow_query_log
+
+TOKEN = "test-admin-token"
+
+
+def test_normalize_and_explainable():
+    assert normalize_statement(
+        "SELECT *\n  FROM departments WHERE id IN ($1, $2, $3) AND name = 'x''y' LIMIT 10"
+    ) == "SELECT * FROM departments WHERE id IN (...) AND name = ? LIMIT ?"
+    assert is_explainable("WITH RECURSIVE t AS (SELECT 1) SELECT * FROM t")
+    assert not is_explainable("SELECT id FROM departments FOR KEY SHARE")
+    assert not is_explainable("WITH d AS (DELETE FROM jobs RETURNING id) SELECT * FROM d")
+    assert not is_explainable("UPDATE departments SET name = $1")
+
+
+@pytest.mark.postgres
+@pytest.mark.asyncio
+async def test_slow_queries_recorded_with_explain(client: AsyncClient,
+                                                  monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", TOKEN)
+    dept = (await client.post("/departments/", json={"name": "Slow"})).json()
+    slow_query_log.clear()
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.001)
+    monkeypatch.setattr(settings, "SLOW_QUERY_EXPLAIN_RATE", 1.0)
+
+    assert (await client.get(f"/departments/{dept['id']}?depth=2")).status_code == 200
+    for _ in range(100):
+        if any(entry.explain or entry.explain_error
+               for entry in slow_query_log.list()):
+            break
+        await asyncio.sleep(0.05)
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0)
+
+    assert (await client.get("/admin/slow-queries")).status_code == 403
+    entries = (await client.get("/admin/slow-queries",
+                                headers={"X-Admin-Token": TOKEN})).json()
+    assert {entry["route"] for entry in entries} == {"GET /departments/{id}"}
+    assert any(entry["parameters"] for entry in entries)
+    assert all(param.startswith("<") and param.endswith(">")
+               for entry in entries for param in entry["parameters"])
+    [explained] = [entry for entry in entries
+                   if entry["explain"] or entry["explain_error"]]
+    assert explained["explain_error"] is None
+    assert "Execution Time" in explained["explain"]
+    assert not any(entry["statement"].startswith("EXPLAIN") for entry in entries)
+    slow_query_log.clear()
@@ -0,0 +1,18 @@
+import pytest
+
+from app.startup import check_schema_version, prewarm_pool
+from tests.conftest import engine
+
+
+@pytest.mark.asyncio
+async def test_prewarm_pool():
+    await prewarm_pool(engine, 2)
+
+
+@pytest.mark.asyncio
+async def test_schema_check_strict_rejects_unmigrated_db():
+    # Тестовая схема создаётся через create_all, без alembic_version
+    with pytest.raises(RuntimeError, match="does not match"):
+        await check_schema_version(engine, "strict")
+    await check_schema_version(engine, "warn")
+    await check_schema_version(engine, "off")